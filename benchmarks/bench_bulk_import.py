@@ -0,0 +1,179 @@
+"""
+Benchmarks the bulk importer end to end on synthetic Scryfall dumps, without
+touching the real Scryfall API. For every size, the synthetic default_cards and
+oracle_cards files are generated once and published on a local stand-in HTTP
+server. Each import mode then runs in a fresh subprocess, against an empty
+database file and an empty download cache, so the measured peak RSS belongs to
+that run alone.
+
+Every run records the wall time, the peak RSS of the importer process and of its
+worker processes, the rows/s of each pipeline stage (pipelined mode) or of the
+whole import (other modes), and the size of the resulting SQLite file. The
+results are written to a JSON report; pass a previous report as `--baseline` to
+fail when a run got slower than `--tolerance` allows.
+
+Run from the project root:
+    python -m benchmarks.bench_bulk_import --sizes 10000 100000 --modes default pipelined
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT / "test"))
+
+from benchmarks.synthetic_scryfall import write_bulk_files
+
+MODES = ('default', 'pipelined', 'shadow')
+DEFAULT_REPORT_PATH = PROJECT_ROOT / "benchmarks" / "results" / "bulk_import.json"
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _run_import(mode: str, api_url: str, work_dir: Path, workers: int) -> Dict[str, Any]:
+    """Runs one import in this process and measures it. Called inside the benchmark subprocess."""
+    from sqlalchemy import create_engine
+
+    from core.models import Base
+    from core.utils import bulk_importer
+
+    database_path = work_dir / "collection.db"
+    bulk_importer.engine = create_engine(f"sqlite:///{database_path}")
+    bulk_importer.DOWNLOAD_DIR = work_dir / "cache"
+    bulk_importer.BULK_DATA_API_URL = f"{api_url}/bulk-data"
+    Base.metadata.create_all(bind=bulk_importer.engine)
+
+    started = time.perf_counter()
+    stages = []
+    if mode == 'pipelined':
+        report = bulk_importer.run_pipelined_import(workers=workers)
+        tables, stages = report.tables, report.stages
+    elif mode == 'shadow':
+        tables = bulk_importer.run_shadow_import(workers=workers)
+    else:
+        tables = bulk_importer.run_bulk_import(workers=workers)
+    wall_seconds = time.perf_counter() - started
+    bulk_importer.engine.dispose()
+
+    rows = sum(table.inserted + table.updated + table.unchanged for table in tables)
+    return {
+        'ok': len(tables) == 2,
+        'wall_seconds': round(wall_seconds, 3),
+        'rows': rows,
+        'rows_per_second': round(rows / wall_seconds, 1) if wall_seconds else None,
+        'peak_rss_mb': _peak_rss_mb(resource.RUSAGE_SELF),
+        'peak_worker_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        'database_mb': round(database_path.stat().st_size / (1024 * 1024), 2),
+        'tables': {table.table: table.inserted + table.updated + table.unchanged for table in tables},
+        'stages': {
+            stage.stage: {'amount': stage.amount, 'unit': stage.unit, 'seconds': round(stage.seconds, 3),
+                          'per_second': round(stage.throughput, 1)}
+            for stage in stages
+        },
+    }
+
+
+def _run_in_subprocess(mode: str, api_url: str, work_dir: Path, workers: int) -> Dict[str, Any]:
+    spec = json.dumps({'mode': mode, 'api_url': api_url, 'work_dir': str(work_dir), 'workers': workers})
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_bulk_import', '--run-one', spec],
+        cwd=PROJECT_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    if completed.returncode != 0:
+        return {'ok': False, 'error': completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _compare_with_baseline(results: List[Dict[str, Any]], baseline_path: Path, tolerance: float) -> List[str]:
+    """Returns a description of every run that is slower than the same run in the baseline report."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(run['size'], run['mode']): run for run in json.load(f)['runs']}
+
+    regressions = []
+    for run in results:
+        previous = baseline.get((run['size'], run['mode']))
+        if not previous or not previous.get('ok') or not run.get('ok'):
+            continue
+        if run['wall_seconds'] > previous['wall_seconds'] * (1 + tolerance):
+            regressions.append(f"{run['mode']} @ {run['size']} cards: {previous['wall_seconds']:.2f}s -> "
+                               f"{run['wall_seconds']:.2f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000],
+                        help="Numbers of synthetic printings to import (e.g. 10000 100000 1000000).")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes used to decode and map cards.")
+    parser.add_argument('--output', type=Path, default=DEFAULT_REPORT_PATH, help="Where to write the JSON report.")
+    parser.add_argument('--baseline', type=Path, help="A previous report to check for regressions against.")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed slowdown against the baseline, as a fraction (default: 0.2).")
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        spec = json.loads(args.run_one)
+        print(json.dumps(_run_import(spec['mode'], spec['api_url'], Path(spec['work_dir']), spec['workers'])))
+        return
+
+    from scryfall_standin import ScryfallStandIn
+
+    runs = []
+    with tempfile.TemporaryDirectory() as directory, ScryfallStandIn() as standin:
+        for size in args.sizes:
+            print(f"Generating {size} synthetic printings...")
+            data_dir = Path(directory) / f"data-{size}"
+            for data_type, path in write_bulk_files(data_dir, size).items():
+                standin.add_bulk_file(data_type, path)
+
+            for mode in args.modes:
+                work_dir = Path(directory) / f"{mode}-{size}"
+                work_dir.mkdir()
+                result = _run_in_subprocess(mode, standin.url, work_dir, args.workers)
+                runs.append({'size': size, 'mode': mode, **result})
+                if result.get('ok'):
+                    print(f"{mode:>10} @ {size:>8}: {result['wall_seconds']:8.2f}s, "
+                          f"{result['rows_per_second']:>10,.0f} rows/s, peak RSS {result['peak_rss_mb']} MB, "
+                          f"database {result['database_mb']} MB")
+                else:
+                    print(f"{mode:>10} @ {size:>8}: FAILED {result.get('error', '')}")
+
+    report = {
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'runs': runs,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to '{args.output}'.")
+
+    if args.baseline:
+        regressions = _compare_with_baseline(runs, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
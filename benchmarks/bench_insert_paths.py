@@ -0,0 +1,71 @@
+"""
+Compares the ORM `bulk_insert_mappings` path with the importer's Core
+executemany fast path (`_insert_mappings` under IMPORT_PRAGMAS, with secondary
+indexes dropped and rebuilt) on a synthetic card file.
+
+Run from the project root:
+    python -m benchmarks.bench_insert_paths --cards 100000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.synthetic_scryfall import iter_cards
+from core.models import Base, CardPrinting, OracleCard
+from core.utils.bulk_importer import IMPORT_BATCH_SIZE, ImportReport, _drop_secondary_indexes, \
+    _import_pragmas, _insert_mappings, _iter_batches, _prepare_data_for_bulk_insert, _rebuild_indexes
+
+
+def _load_orm(database_path: Path, cards: list) -> None:
+    engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        seen_names = set()
+        for batch in _iter_batches(cards, IMPORT_BATCH_SIZE):
+            session.bulk_insert_mappings(OracleCard, _prepare_data_for_bulk_insert(batch, 'oracle', seen_names))
+        for batch in _iter_batches(cards, IMPORT_BATCH_SIZE):
+            session.bulk_insert_mappings(CardPrinting, _prepare_data_for_bulk_insert(batch, 'printing'))
+        session.commit()
+    engine.dispose()
+
+
+def _load_core(database_path: Path, cards: list) -> None:
+    engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection, _import_pragmas(connection):
+        dropped_indexes = _drop_secondary_indexes(connection, (OracleCard, CardPrinting))
+        with Session(bind=connection) as session:
+            seen_names = set()
+            for batch in _iter_batches(cards, IMPORT_BATCH_SIZE):
+                mappings = _prepare_data_for_bulk_insert(batch, 'oracle', seen_names)
+                _insert_mappings(session, OracleCard, mappings, ImportReport('oracle_cards'))
+            for batch in _iter_batches(cards, IMPORT_BATCH_SIZE):
+                mappings = _prepare_data_for_bulk_insert(batch, 'printing')
+                _insert_mappings(session, CardPrinting, mappings, ImportReport('card_printings'))
+            session.commit()
+        _rebuild_indexes(connection, dropped_indexes)
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=100_000, help="Number of synthetic printings to load.")
+    args = parser.parse_args()
+
+    cards = list(iter_cards(args.cards))
+    print(f"Loading {len(cards)} synthetic printings...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, load in (('ORM bulk_insert_mappings', _load_orm), ('Core executemany', _load_core)):
+            started = time.perf_counter()
+            load(Path(directory) / f"{load.__name__}.db", cards)
+            elapsed = time.perf_counter() - started
+            print(f"{label:>26}: {elapsed:6.2f}s ({len(cards) / elapsed:,.0f} printings/s)")
+
+
+if __name__ == '__main__':
+    main()
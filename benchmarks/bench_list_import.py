@@ -0,0 +1,121 @@
+"""
+Measures `CollectionRepository.add_cards_from_list_transactional` on pasted card
+lists of 1k, 10k and 100k lines, resolved against a synthetic local catalog in
+offline mode (no network). With --per-line, the old path of one
+`add_card_from_string` call per line is measured as well, for comparison; it is
+skipped above 10k lines, where it takes minutes.
+
+Run from the project root:
+    python -m benchmarks.bench_list_import --lines 1000 10000 100000 --per-line
+"""
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.synthetic_scryfall import iter_cards
+from core.api.scryfall_client import ScryfallClient
+from core.exceptions import CoreLogicError
+from core.models import CardInstance, CardPrinting, OracleCard
+from core.repo.collection_repository import CollectionRepository
+from core.utils.bulk_importer import IMPORT_BATCH_SIZE, ImportReport, _insert_mappings, _iter_batches, \
+    _prepare_data_for_bulk_insert
+from core.utils.database_setup import upgrade_database
+
+# The per-line path is only measured up to this many lines
+PER_LINE_MAX_LINES = 10_000
+
+
+def _build_catalog(database_path: Path, cards: list) -> None:
+    engine = create_engine(f"sqlite:///{database_path}")
+    upgrade_database(engine)
+    with Session(engine) as session:
+        seen_names = set()
+        for batch in _iter_batches(cards, IMPORT_BATCH_SIZE):
+            mappings = _prepare_data_for_bulk_insert(batch, 'oracle', seen_names)
+            _insert_mappings(session, OracleCard, mappings, ImportReport('oracle_cards'))
+        for batch in _iter_batches(cards, IMPORT_BATCH_SIZE):
+            mappings = _prepare_data_for_bulk_insert(batch, 'printing')
+            _insert_mappings(session, CardPrinting, mappings, ImportReport('card_printings'))
+        session.commit()
+    engine.dispose()
+
+
+def _card_lines(cards: list, count: int, seed: int = 7) -> List[str]:
+    """A pasted collection export: mostly distinct cards, with the odd repeat, quantity and foil."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        card = rng.choice(cards)
+        quantity = rng.choice([1, 1, 1, 2, 4])
+        foil = " *F*" if rng.random() < 0.1 else ""
+        lines.append(f"{quantity} {card['name']} ({card['set'].upper()}) {card['collector_number']}{foil}")
+    return lines
+
+
+def _add_set_based(repository: CollectionRepository, lines: List[str]) -> int:
+    return len(repository.add_cards_from_list_transactional(lines)["successes"])
+
+
+def _add_per_line(repository: CollectionRepository, lines: List[str]) -> int:
+    added = 0
+    for line in lines:
+        try:
+            added += len(repository.add_card_from_string(line))
+        except CoreLogicError:
+            pass
+    repository.session.flush()
+    return added
+
+
+def _measure(database_path: Path, add, lines: List[str]) -> tuple[float, int]:
+    """Adds the lines on a fresh session and commits; returns the elapsed seconds and the instances added."""
+    engine = create_engine(f"sqlite:///{database_path}")
+    with Session(engine) as session:
+        session.query(CardInstance).delete()
+        session.commit()
+        # The repository reports every line; keep that off the terminal and out of the timing
+        with contextlib.redirect_stdout(io.StringIO()):
+            repository = CollectionRepository(session, ScryfallClient(session, offline=True))
+            started = time.perf_counter()
+            added = add(repository, lines)
+            session.commit()
+            elapsed = time.perf_counter() - started
+    engine.dispose()
+    return elapsed, added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="Sizes of the pasted lists to measure.")
+    parser.add_argument('--cards', type=int, default=50_000, help="Number of synthetic printings in the catalog.")
+    parser.add_argument('--per-line', action='store_true', help="Also measure the old per-line path.")
+    args = parser.parse_args()
+
+    cards = list(iter_cards(args.cards))
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = Path(directory) / "collection.db"
+        print(f"Building a catalog of {len(cards)} synthetic printings...")
+        _build_catalog(database_path, cards)
+
+        paths = [('set-based', _add_set_based)] + ([('per-line', _add_per_line)] if args.per_line else [])
+        for count in args.lines:
+            lines = _card_lines(cards, count)
+            for label, add in paths:
+                if add is _add_per_line and count > PER_LINE_MAX_LINES:
+                    continue
+                elapsed, added = _measure(database_path, add, lines)
+                print(f"{count:>8,} lines, {label:>9}: {elapsed:7.2f}s "
+                      f"({count / elapsed:,.0f} lines/s, {added:,} instances)")
+
+
+if __name__ == '__main__':
+    main()
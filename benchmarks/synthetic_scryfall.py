@@ -0,0 +1,92 @@
+"""
+Generates synthetic, Scryfall-shaped card data for benchmarks, so the importer
+can be measured without downloading the real bulk files.
+"""
+import json
+import random
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+SETS = [f"s{index:02d}" for index in range(60)]
+RARITIES = ['common', 'uncommon', 'rare', 'mythic']
+ARTISTS = [f"Artist {index}" for index in range(400)]
+TYPE_LINES = ['Creature — Elf Druid', 'Instant', 'Sorcery', 'Artifact', 'Enchantment — Aura',
+              'Legendary Creature — Human Wizard', 'Basic Land — Island', 'Planeswalker — Jace']
+KEYWORDS = ['Flying', 'Trample', 'Haste', 'Vigilance', 'Deathtouch', 'Lifelink', 'Ward']
+
+
+def iter_cards(count: int, printings_per_card: int = 4, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """
+    Yields `count` synthetic default_cards entries. Every `printings_per_card`
+    consecutive entries are printings of the same Oracle card.
+    """
+    rng = random.Random(seed)
+    oracle_id = name = None
+    for index in range(count):
+        if index % printings_per_card == 0:
+            oracle_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            name = f"Synthetic Card {index // printings_per_card}"
+        set_code = rng.choice(SETS)
+        image_base = f"https://cards.example.invalid/{set_code}/{index}"
+        yield {
+            'object': 'card',
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'oracle_id': oracle_id,
+            'name': name,
+            'lang': 'en',
+            'layout': 'normal',
+            'mana_cost': '{2}{G}',
+            'cmc': float(rng.randint(0, 8)),
+            'type_line': rng.choice(TYPE_LINES),
+            'oracle_text': "{T}: Add {G}. When this enters, draw a card.\nTrample",
+            'power': str(rng.randint(0, 6)),
+            'toughness': str(rng.randint(1, 6)),
+            'colors': ['G'],
+            'color_identity': rng.sample(['W', 'U', 'B', 'R', 'G'], rng.randint(0, 2)),
+            'keywords': rng.sample(KEYWORDS, rng.randint(0, 2)),
+            'set': set_code,
+            'collector_number': str(index),
+            'digital': False,
+            'rarity': rng.choice(RARITIES),
+            'artist': rng.choice(ARTISTS),
+            'image_uris': {
+                'small': f"{image_base}/small.jpg",
+                'normal': f"{image_base}/normal.jpg",
+                'large': f"{image_base}/large.jpg",
+            },
+            'prices': {
+                'usd': f"{rng.uniform(0.05, 50):.2f}",
+                'usd_foil': f"{rng.uniform(0.10, 100):.2f}" if rng.random() < 0.5 else None,
+                'eur': None,
+                'tix': None,
+            },
+        }
+
+
+def write_bulk_files(directory: Path, count: int, printings_per_card: int = 4, seed: int = 42) -> Dict[str, Path]:
+    """
+    Writes `count` synthetic printings to 'default_cards.json', and the first printing
+    of every Oracle card to 'oracle_cards.json', in the layout of the real Scryfall
+    bulk files (a JSON array with one card per line). The cards are streamed to disk,
+    so even a million of them never have to fit in memory.
+
+    Returns the paths keyed by bulk data type.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = {'default_cards': directory / "default_cards.json", 'oracle_cards': directory / "oracle_cards.json"}
+
+    with open(paths['default_cards'], 'w', encoding='utf-8') as default_file, \
+            open(paths['oracle_cards'], 'w', encoding='utf-8') as oracle_file:
+        default_file.write("[")
+        oracle_file.write("[")
+        for index, card in enumerate(iter_cards(count, printings_per_card, seed)):
+            line = json.dumps(card)
+            default_file.write(f"\n{line}," if index < count - 1 else f"\n{line}")
+            if index % printings_per_card == 0:
+                is_last_oracle = index + printings_per_card >= count
+                oracle_file.write(f"\n{line}," if not is_last_oracle else f"\n{line}")
+        default_file.write("\n]\n")
+        oracle_file.write("\n]\n")
+
+    return paths
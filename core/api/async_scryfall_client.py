@@ -0,0 +1,111 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, Iterable, List, TypeVar
+
+import requests
+
+from core.api.http_session import SCRYFALL_API_URL, REQUEST_TIMEOUT, ClientStats, get_http_session, rate_limiter
+from core.api.rate_limiter import TokenBucket
+from core.api.response_cache import ResponseCache
+
+T = TypeVar('T')
+
+# Lookups in flight at the same time; must not exceed the pool size of the shared HTTP session
+MAX_CONCURRENCY = 8
+
+
+class AsyncScryfallClient:
+    """
+    An asyncio variant of the network side of ScryfallClient, used to look up many
+    cards concurrently. It never touches the database: it only fetches card data,
+    which the synchronous ScryfallClient then caches in one step.
+
+    The requests are sent on the shared pooled HTTP session from worker threads, at
+    most `max_concurrency` at a time, and every request waits for the same global
+    rate limiter as the synchronous client. Overall throughput is therefore bound by
+    the rate limit rather than by the round-trip latency of each lookup.
+    """
+
+    def __init__(self, base_url: str | None = None, http_session: requests.Session | None = None,
+                 limiter: TokenBucket | None = None, max_concurrency: int = MAX_CONCURRENCY,
+                 stats: ClientStats | None = None, response_cache: ResponseCache | None = None):
+        self.base_url = base_url or SCRYFALL_API_URL
+        self.http = http_session or get_http_session()
+        self.limiter = limiter or rate_limiter
+        self.max_concurrency = max_concurrency
+        self.stats = stats or ClientStats()
+        self.response_cache = response_cache
+
+    async def _get_json(self, semaphore: asyncio.Semaphore, path: str,
+                        params: dict) -> tuple[int | None, Dict[str, Any] | None]:
+        """
+        Fetches one resource, going through the response cache if there is one.
+        Returns the HTTP status and the JSON body of a successful response; the
+        status is None when the request itself failed.
+        """
+        url = f"{self.base_url}{path}"
+        cache_key = cached = None
+        headers = {}
+        if self.response_cache is not None:
+            cache_key = ResponseCache.key(url, params)
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if cached is not None and self.response_cache.is_fresh(cached):
+                self.response_cache.hits += 1
+                return 200, cached.to_response().json()
+            if cached is not None:
+                headers = cached.validators()
+
+        async with semaphore:
+            self.stats.throttled_seconds += await self.limiter.acquire_async()
+            self.stats.requests += 1
+            try:
+                response = await asyncio.to_thread(
+                    self.http.get, url, params=params, headers=headers, timeout=REQUEST_TIMEOUT
+                )
+            except requests.exceptions.RequestException as e:
+                print(f"Scryfall API error for {params}: {e}")
+                return None, None
+
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None:
+            self.stats.retries += len(retries.history)
+        if cached is not None and response.status_code == 304:
+            self.response_cache.revalidations += 1
+            await asyncio.to_thread(self.response_cache.refresh, cache_key)
+            return 200, cached.to_response().json()
+        if not response.ok:
+            print(f"Scryfall API error for {params}: HTTP {response.status_code}")
+            return response.status_code, None
+        if cache_key is not None:
+            self.response_cache.misses += 1
+            await asyncio.to_thread(self.response_cache.store, cache_key, response)
+        return response.status_code, response.json()
+
+    async def fetch_cards_by_name(self, names: Iterable[str]) -> tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Looks up every name with Scryfall's fuzzy /cards/named search, concurrently.
+        Returns the card data keyed by the requested name, and the names Scryfall
+        answered with 'not found'. Names whose lookup failed otherwise are in neither.
+        """
+        names = list(dict.fromkeys(names))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self._get_json(semaphore, "/cards/named", {"fuzzy": name}) for name in names)
+        )
+        found = {name: card_data for name, (_, card_data) in zip(names, results) if card_data is not None}
+        not_found = [name for name, (status, _) in zip(names, results) if status == 404]
+        return found, not_found
+
+
+def run_sync(coroutine: Awaitable[T]) -> T:
+    """
+    Runs a coroutine to completion from synchronous code. If the calling thread
+    already runs an event loop, the coroutine gets its own loop on a helper thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
@@ -0,0 +1,135 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Tuple
+
+# A candidate must be at least this similar to the query (0..1) to count as a match
+MIN_SIMILARITY = 0.8
+
+# Number of candidates sharing the most trigrams with the query that are scored in full
+SHORTLIST_SIZE = 20
+
+# Trigrams shared by more than this fraction of all names (and by more than COMMON_TRIGRAM_MIN_COUNT)
+# say little about a match and are skipped when building the shortlist, as long as the query has
+# MIN_RARE_TRIGRAMS rarer ones
+COMMON_TRIGRAM_RATIO = 0.01
+COMMON_TRIGRAM_MIN_COUNT = 50
+MIN_RARE_TRIGRAMS = 3
+
+# A query this long or longer also matches the only card whose name it is a word prefix of
+# ('Delver' -> 'Delver of Secrets'); a prefix of several cards' names matches none of them
+MIN_PREFIX_LENGTH = 4
+
+# Apostrophes and the like disappear ("Nalia de'Arnise" == "nalia dearnise")
+_REMOVED_PUNCTUATION = re.compile(r"['’`\".,!?:;()]")
+# Other separators become spaces ("Jace, Vryn's Prodigy" / "Will-o'-the-Wisp")
+_SEPARATORS = re.compile(r"[-_/\\]+")
+
+
+def normalize_name(name: str) -> str:
+    """Folds a card name for matching: no accents, no case, no punctuation, single spaces."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    folded = _REMOVED_PUNCTUATION.sub("", without_accents.casefold().replace("æ", "ae"))
+    return " ".join(_SEPARATORS.sub(" ", folded).split())
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyNameIndex:
+    """
+    An in-memory index for matching misspelled or partial card names against the
+    Oracle cards of the local catalog.
+
+    Every name is indexed in normalized form, and multi-faced names ('A // B') are
+    also indexed under each face. A query is answered in three steps:
+    1. an exact lookup of the normalized name, then of the only card whose name the
+       query is a word prefix of;
+    2. a shortlist of the SHORTLIST_SIZE names sharing the most character trigrams
+       with the query, from an inverted index (very common trigrams are skipped);
+    3. a full similarity score for each name on the shortlist.
+    The best candidate wins if it scores at least MIN_SIMILARITY.
+
+    The index only knows the cards it was given: a name missing from it is matched
+    to its closest neighbour ('Lightning Blast' -> 'Lightning Bolt'), so it should
+    cover the whole catalog.
+    """
+
+    def __init__(self, cards: Iterable[Tuple[str, str]] = ()):
+        self._exact: Dict[str, str] = {}
+        self._keys: List[str] = []
+        self._oracle_ids: List[str] = []
+        self._postings: Dict[str, List[int]] = {}
+        # The keys in order, for prefix lookups; sorted again after keys were added
+        self._sorted_keys: List[str] | None = None
+        for oracle_id, name in cards:
+            self.add(oracle_id, name)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, oracle_id: str, name: str) -> None:
+        """Indexes one Oracle card under its full name and the name of each of its faces."""
+        faces = name.split(" // ")
+        for key in {normalize_name(text) for text in [name] + (faces if len(faces) > 1 else [])}:
+            if not key or key in self._exact:
+                continue
+            self._exact[key] = oracle_id
+            position = len(self._keys)
+            self._keys.append(key)
+            self._oracle_ids.append(oracle_id)
+            self._sorted_keys = None
+            for trigram in _trigrams(key):
+                self._postings.setdefault(trigram, []).append(position)
+
+    def match(self, name: str) -> str | None:
+        """Returns the Oracle ID of the best plausible match for `name`, or None if there is none."""
+        query = normalize_name(name)
+        if not query:
+            return None
+        if query in self._exact:
+            return self._exact[query]
+        if len(query) >= MIN_PREFIX_LENGTH:
+            oracle_id = self._unique_prefix_match(query)
+            if oracle_id is not None:
+                return oracle_id
+
+        postings = [self._postings[trigram] for trigram in _trigrams(query) if trigram in self._postings]
+        common_count = max(len(self._keys) * COMMON_TRIGRAM_RATIO, COMMON_TRIGRAM_MIN_COUNT)
+        rare = [posting for posting in postings if len(posting) <= common_count]
+        shared = Counter()
+        for posting in (rare if len(rare) >= MIN_RARE_TRIGRAMS else postings):
+            shared.update(posting)
+
+        # The matcher caches what it learns about its second sequence, so that is the query
+        matcher = SequenceMatcher(None, "", query, autojunk=False)
+        best_score, best_position = MIN_SIMILARITY, None
+        for position, _ in shared.most_common(SHORTLIST_SIZE):
+            matcher.set_seq1(self._keys[position])
+            # The quick ratios are cheap upper bounds of the full one
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            score = matcher.ratio()
+            if score >= best_score:
+                best_score, best_position = score, position
+
+        return self._oracle_ids[best_position] if best_position is not None else None
+
+    def _unique_prefix_match(self, query: str) -> str | None:
+        """Returns the Oracle ID of the only card with a name starting with the words of `query`, if there is one."""
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self._keys)
+        prefix = query + " "
+        oracle_ids = set()
+        position = bisect_left(self._sorted_keys, prefix)
+        while position < len(self._sorted_keys) and self._sorted_keys[position].startswith(prefix):
+            oracle_ids.add(self._exact[self._sorted_keys[position]])
+            if len(oracle_ids) > 1:
+                return None
+            position += 1
+        return oracle_ids.pop() if oracle_ids else None
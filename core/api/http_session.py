@@ -0,0 +1,61 @@
+import threading
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.api.rate_limiter import TokenBucket
+
+SCRYFALL_API_URL = "https://api.scryfall.com"
+
+# Scryfall asks for no more than 10 requests per second on average
+REQUESTS_PER_SECOND = 10
+
+# Seconds to wait for Scryfall to connect and to respond
+REQUEST_TIMEOUT = (5, 30)
+
+# Transient failures are retried with exponential backoff (Retry-After is honoured for 429 and 503)
+RETRY_POLICY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({'GET', 'HEAD', 'POST'}),
+    raise_on_status=False
+)
+
+# Shared by all clients, so the rate limit holds for the whole application
+rate_limiter = TokenBucket(rate=REQUESTS_PER_SECOND)
+
+_http_session: requests.Session | None = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the HTTP session shared by all clients. It keeps connections to Scryfall
+    alive between requests and retries transient failures according to RETRY_POLICY.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=RETRY_POLICY)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            # Scryfall requires both headers on every request
+            session.headers.update({'User-Agent': 'MTGCollectionManager/1.0', 'Accept': 'application/json'})
+            _http_session = session
+        return _http_session
+
+
+@dataclass
+class ClientStats:
+    """Counters describing the HTTP traffic of a ScryfallClient."""
+    requests: int = 0
+    retries: int = 0
+    throttled_seconds: float = 0.0
+
+    def __str__(self):
+        return (f"{self.requests} requests, {self.retries} retries, "
+                f"{self.throttled_seconds:.2f}s throttled")
@@ -0,0 +1,73 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Hashable
+
+# Number of identifiers remembered per cache
+LOOKUP_CACHE_SIZE = 10_000
+
+# Every live LookupCache, so a catalog import can invalidate all of them
+_registry: "weakref.WeakSet[LookupCache]" = weakref.WeakSet()
+
+
+class LookupCache:
+    """
+    A bounded, least-recently-used map from lookup identifiers (e.g. a set code and
+    collector number, or a normalized card name) to primary keys.
+
+    Only primary keys are stored, never ORM objects, so entries stay valid across
+    sessions: the caller loads the object with Session.get, which is answered from
+    the identity map when the object is already loaded. A key whose row has since
+    disappeared is simply dropped by the caller with `discard`.
+    """
+
+    def __init__(self, max_size: int = LOOKUP_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+        _registry.add(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.0%} hit rate)"
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: Hashable) -> str | None:
+        """Returns the primary key stored for `key` and marks it as recently used."""
+        with self._lock:
+            primary_key = self._entries.get(key)
+            if primary_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return primary_key
+
+    def put(self, key: Hashable, primary_key: str) -> None:
+        with self._lock:
+            self._entries[key] = primary_key
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def invalidate_lookup_caches() -> None:
+    """Empties every LookupCache of this process; called after the card catalog was (re)imported."""
+    for cache in list(_registry):
+        cache.clear()
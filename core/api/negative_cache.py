@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Set
+
+from sqlalchemy import delete, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, SessionTransaction
+
+from core.models import FailedLookup
+from core.utils.database_setup import IN_QUERY_BATCH_SIZE
+
+# How long a failed lookup is remembered; Scryfall adds new cards regularly
+NEGATIVE_CACHE_TTL = timedelta(hours=24)
+
+
+def fuzzy_name_key(name: str) -> str:
+    """The key of a fuzzy name lookup (/cards/named?fuzzy=...)."""
+    return f"fuzzy:{_normalize(name)}"
+
+
+def exact_name_key(name: str) -> str:
+    """The key of an exact name lookup (/cards/collection)."""
+    return f"name:{_normalize(name)}"
+
+
+def printing_key(set_code: str, collector_number: str) -> str:
+    """The key of a printing lookup by set code and collector number."""
+    return f"printing:{set_code.strip().lower()}/{collector_number.strip()}"
+
+
+def _normalize(text: str) -> str:
+    # Case and runs of whitespace never change what Scryfall finds
+    return " ".join(text.casefold().split())
+
+
+class NegativeLookupCache:
+    """
+    A persistent cache of lookups that Scryfall answered with 'not found', stored in
+    the failed_lookups table and kept for `ttl`.
+
+    Failures usually happen while the service is about to roll its transaction
+    back (the card was not found, after all), so new entries are not written in
+    the caller's transaction. They are kept in memory and written in a separate,
+    short transaction as soon as the session's transaction has ended, whether it
+    was committed or rolled back.
+
+    `hits` counts lookups answered from the cache, `misses` the ones that had to
+    go to the network.
+    """
+
+    def __init__(self, db_session: Session, ttl: timedelta = NEGATIVE_CACHE_TTL,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.session = db_session
+        self.ttl = ttl
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[str, datetime] = {}
+        event.listen(db_session, 'after_transaction_end', self._after_transaction_end)
+
+    def __str__(self):
+        return f"{self.hits} hits, {self.misses} misses"
+
+    def known_failures(self, keys: Iterable[str]) -> Set[str]:
+        """Returns the keys that failed less than `ttl` ago, and updates the hit/miss counters."""
+        keys = list(dict.fromkeys(keys))
+        cutoff = self._clock() - self.ttl
+        failed = {key for key in keys if key in self._pending}
+
+        remaining = [key for key in keys if key not in failed]
+        for start in range(0, len(remaining), IN_QUERY_BATCH_SIZE):
+            chunk = remaining[start:start + IN_QUERY_BATCH_SIZE]
+            failed.update(
+                key for (key,) in self.session.query(FailedLookup.key)
+                .filter(FailedLookup.key.in_(chunk), FailedLookup.failed_at > cutoff)
+            )
+
+        self.hits += len(failed)
+        self.misses += len(keys) - len(failed)
+        return failed
+
+    def is_known_failure(self, key: str) -> bool:
+        return bool(self.known_failures([key]))
+
+    def add(self, key: str) -> None:
+        """Remembers a failed lookup. It is written once the current transaction ends."""
+        self._pending[key] = self._clock()
+        if not self.session.in_transaction():
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the pending entries in their own transaction and drops the expired ones."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+
+        statement = sqlite_insert(FailedLookup)
+        statement = statement.on_conflict_do_update(
+            index_elements=[FailedLookup.key], set_={'failed_at': statement.excluded.failed_at}
+        )
+        with self.session.get_bind().begin() as connection:
+            connection.execute(statement, [{'key': key, 'failed_at': failed_at} for key, failed_at in pending.items()])
+            connection.execute(delete(FailedLookup).where(FailedLookup.failed_at <= self._clock() - self.ttl))
+
+    def _after_transaction_end(self, session: Session, transaction: SessionTransaction) -> None:
+        # Savepoints (begin_nested) end inside the outer transaction; wait for that one
+        if transaction.parent is None:
+            self.flush()
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    A thread-safe token-bucket rate limiter.
+
+    The bucket holds up to `capacity` tokens and is refilled at `rate` tokens per
+    second. Every request takes one token; a request only has to wait when the
+    bucket is empty, i.e. when requests actually arrive faster than `rate` (after
+    an idle period up to `capacity` requests go through immediately).
+
+    The capacity is the largest burst allowed. It defaults to a single request, so
+    even a client that has just started never sends requests closer together than
+    1 / `rate` seconds, which is what API limits like Scryfall's ask for.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError("The rate of a TokenBucket must be positive.")
+        if capacity < 1:
+            raise ValueError("The capacity of a TokenBucket must hold at least one request.")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes a token, possibly ahead of time. Returns how long the caller has to wait for it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            # A negative balance means the token is only available once it has been refilled
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """Blocks until a request may be made. Returns the number of seconds spent waiting."""
+        delay = self._reserve()
+        if delay:
+            self._sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        """Like `acquire`, but waits without blocking the event loop."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict
+
+import requests
+
+# Where the cached API responses are stored
+RESPONSE_CACHE_DIR = Path(__file__).parent / "response_cache"
+
+# The least recently used responses are evicted once the cached bodies exceed this size
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64MB
+
+# How long a response is served without asking Scryfall; Scryfall updates prices once a day
+RESPONSE_CACHE_FRESHNESS = timedelta(hours=12)
+
+
+@dataclass
+class CachedResponse:
+    """A stored response body with the validators to revalidate it."""
+    url: str
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+    stored_at: float
+
+    def validators(self) -> Dict[str, str]:
+        """The headers that make a request conditional on this response having changed."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """Rebuilds a requests.Response, so callers cannot tell a cached response from a live one."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = self.body
+        response.headers['Content-Type'] = 'application/json'
+        return response
+
+
+class ResponseCache:
+    """
+    An on-disk cache of successful API responses, keyed by their full URL and
+    stored in a small SQLite file of its own.
+
+    A response younger than `freshness` is served as is. An older one is kept as
+    long as there is room, so the next request can be made conditional (ETag /
+    Last-Modified); a '304 Not Modified' answer then serves the stored body and
+    restarts its freshness. The least recently used responses are evicted once the
+    stored bodies exceed `max_bytes`.
+
+    Safe to use from several threads.
+    """
+
+    def __init__(self, directory: Path = RESPONSE_CACHE_DIR, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 freshness: timedelta = RESPONSE_CACHE_FRESHNESS):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.freshness = freshness
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(directory / "responses.sqlite3", check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+                "stored_at REAL NOT NULL, used_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS ix_responses_used_at ON responses (used_at)")
+
+    def __str__(self):
+        return f"{self.hits} hits, {self.revalidations} revalidated, {self.misses} misses"
+
+    @staticmethod
+    def key(url: str, params: dict | None = None) -> str:
+        """The cache key of a GET request: its full URL, including the encoded query string."""
+        return requests.Request('GET', url, params=params).prepare().url
+
+    def get(self, url: str) -> CachedResponse | None:
+        """Returns the stored response for `url`, fresh or not, and marks it as recently used."""
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE responses SET used_at = ? WHERE url = ?", (time.time(), url))
+        return CachedResponse(url, *row)
+
+    def is_fresh(self, cached: CachedResponse) -> bool:
+        return time.time() - cached.stored_at < self.freshness.total_seconds()
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """Stores a successful response, then evicts the least recently used ones if over `max_bytes`."""
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, stored_at, used_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, response.headers.get('ETag'), response.headers.get('Last-Modified'), now, now, len(body))
+            )
+            self._evict()
+
+    def refresh(self, url: str) -> None:
+        """Restarts the freshness of a stored response after Scryfall confirmed it is unchanged."""
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE responses SET stored_at = ?, used_at = ? WHERE url = ?", (now, now, url))
+
+    def _evict(self) -> None:
+        excess = self._connection.execute("SELECT coalesce(sum(size), 0) FROM responses").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for url, size in self._connection.execute("SELECT url, size FROM responses ORDER BY used_at"):
+            evicted.append((url,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._connection.executemany("DELETE FROM responses WHERE url = ?", evicted)
+
+    def close(self) -> None:
+        self._connection.close()
@@ -1,9 +1,20 @@
 import requests
-import time
+from typing import Dict, Hashable, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session, joinedload
 
+from core.api.async_scryfall_client import AsyncScryfallClient, run_sync
+from core.api.fuzzy_index import FuzzyNameIndex
+from core.api.http_session import SCRYFALL_API_URL, REQUEST_TIMEOUT, ClientStats, get_http_session, rate_limiter
+from core.api.lookup_cache import LookupCache
+from core.api.negative_cache import NegativeLookupCache, exact_name_key, fuzzy_name_key, printing_key
+from core.api.rate_limiter import TokenBucket
+from core.api.response_cache import ResponseCache
+from core.api.set_prefetcher import SetPrefetcher
 from core.exceptions import CardNotFoundError
-from core.models import OracleCard, CardPrinting
+from core.models import OracleCard, CardPrinting, fold_name
+from core.utils.database_setup import IN_QUERY_BATCH_SIZE
 
 
 class ScryfallClient:
@@ -11,45 +22,136 @@ class ScryfallClient:
     A client to interact with the Scryfall API, with a caching layer
     that checks our local database before making a network request.
     """
-    BASE_URL = "https://api.scryfall.com"
+    BASE_URL = SCRYFALL_API_URL
+
+    # The /cards/collection endpoint accepts at most 75 identifiers per request
+    COLLECTION_BATCH_SIZE = 75
 
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, base_url: str | None = None,
+                 http_session: requests.Session | None = None, limiter: TokenBucket | None = None,
+                 offline: bool = False, response_cache: ResponseCache | None = None,
+                 lookup_cache: LookupCache | None = None, prefetch: bool = False):
         self.session = db_session
+        # In offline mode every lookup is answered from the local catalog alone; misses fail immediately
+        self.offline = offline
+        # The API can be pointed elsewhere, e.g. at a local stand-in server in tests
+        self.base_url = base_url or self.BASE_URL
+        self.http = http_session or get_http_session()
+        self.limiter = limiter or rate_limiter
+        self.stats = ClientStats()
+        # Optional on-disk cache for the single-card endpoints; cached responses skip the rate limiter
+        self.response_cache = response_cache
+        # Lookups Scryfall recently answered with 'not found' are not repeated
+        self.negative_cache = NegativeLookupCache(db_session)
+        # Primary keys of recently resolved printings and names, so repeated lookups skip the query
+        self.lookup_cache = lookup_cache if lookup_cache is not None else LookupCache()
+        # Built from the local catalog on the first name that has no exact match
+        self._fuzzy_index: FuzzyNameIndex | None = None
+        # Whether the local catalog came from a bulk import; checked on the first name that has no exact match
+        self._has_bulk_catalog: bool | None = None
+        # Optionally warms the local catalog with the sets that printings are looked up from
+        self.prefetcher = SetPrefetcher(self._make_prefetch_client) if prefetch and not offline else None
         print("Scryfall Client initialized.")
 
+    def _make_prefetch_client(self) -> 'ScryfallClient':
+        """A client for the prefetcher's thread: its own session, but the same API, HTTP session and rate limiter."""
+        return ScryfallClient(Session(bind=self.session.get_bind()), base_url=self.base_url, http_session=self.http,
+                              limiter=self.limiter)
+
+    def close(self) -> None:
+        """Stops the prefetcher, if there is one. The session is left to its owner."""
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+
+    def _request(self, method: str, path: str, cache: bool = False, **kwargs) -> requests.Response:
+        """
+        Sends one request to the API through the pooled session, after waiting for
+        the rate limiter. Raises requests.HTTPError for 4xx/5xx responses that are
+        left after the retries.
+
+        With `cache` (GET only) and a response cache configured, a fresh cached
+        response is returned without any network request, and a stale one is
+        revalidated with a conditional request.
+        """
+        url = f"{self.base_url}{path}"
+        cache_key = cached = None
+        if cache and self.response_cache is not None:
+            cache_key = ResponseCache.key(url, kwargs.get('params'))
+            cached = self.response_cache.get(cache_key)
+            if cached is not None and self.response_cache.is_fresh(cached):
+                self.response_cache.hits += 1
+                return cached.to_response()
+            if cached is not None:
+                kwargs['headers'] = {**kwargs.get('headers', {}), **cached.validators()}
+
+        self.stats.throttled_seconds += self.limiter.acquire()
+        self.stats.requests += 1
+        response = self.http.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None:
+            self.stats.retries += len(retries.history)
+
+        if cached is not None and response.status_code == 304:
+            self.response_cache.revalidations += 1
+            self.response_cache.refresh(cache_key)
+            return cached.to_response()
+        response.raise_for_status()  # Raise an exception for 4xx/5xx errors
+        if cache_key is not None:
+            self.response_cache.misses += 1
+            self.response_cache.store(cache_key, response)
+        return response
+
     def get_oracle_card_by_name(self, name: str) -> OracleCard | None:
         """
         Finds an abstract OracleCard by its name.
         Uses a 'fuzzy' search for convenience.
         """
-        # First, check our local DB for an exact match. We use ilike for case-insensitivity.
-        oracle_card = self.session.query(OracleCard).filter(OracleCard.name.ilike(name)).first()
+        lookup_key = fuzzy_name_key(name)
+        oracle_card = self._cached_lookup(OracleCard, lookup_key)
+        if oracle_card:
+            return oracle_card
+
+        # First, check our local DB for an exact match, ignoring case (answered from an index).
+        oracle_card = self.session.query(OracleCard).filter(OracleCard.name_folded == fold_name(name)).first()
         if oracle_card:
             print(f"Found OracleCard '{name}' in local DB.")
+            self.lookup_cache.put(lookup_key, oracle_card.id)
+            return oracle_card
+
+        # Next, try to match misspelled or partial names against the local catalog
+        oracle_card = self._match_local_name(name) if self._matches_names_locally() else None
+        if oracle_card:
+            print(f"Matched '{name}' to OracleCard '{oracle_card.name}' in local DB.")
+            self.lookup_cache.put(lookup_key, oracle_card.id)
             return oracle_card
 
+        if self.offline:
+            print(f"Offline mode: no card named '{name}' in the local catalog.")
+            raise CardNotFoundError(identifier=name)
+
+        if self.negative_cache.is_known_failure(lookup_key):
+            print(f"Scryfall recently found no card named '{name}'; not asking again.")
+            raise CardNotFoundError(identifier=name)
+
         # If not found, query Scryfall API
         print(f"Querying Scryfall for card named '{name}'...")
         try:
-            # Scryfall API is polite; they ask for a small delay between requests.
-            time.sleep(0.1)  # 100ms delay
-
-            url = f"{self.BASE_URL}/cards/named"
-            params = {"fuzzy": name}
-            response = requests.get(url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx/5xx errors
-
+            # Scryfall API is polite; the shared rate limiter keeps us within their limits.
+            response = self._request('GET', "/cards/named", cache=True, params={"fuzzy": name})
             card_data = response.json()
 
             # UPDATED: Use the new centralized caching method
             # This method will find/create the OracleCard and the CardPrinting
             # and returns the fully populated CardPrinting object.
             new_printing = self._cache_card_data(card_data)
+            self.lookup_cache.put(lookup_key, new_printing.oracle_card.id)
             return new_printing.oracle_card
 
         except requests.exceptions.RequestException as e:
             # This will catch 404 Not Found errors as well
             print(f"Error fetching card data for '{name}': {e}")
+            if _is_not_found(e):
+                self.negative_cache.add(lookup_key)
             raise CardNotFoundError(identifier=name) from e
 
     # UPDATED: This method is now the primary entry point for finding a specific printing
@@ -58,6 +160,11 @@ class ScryfallClient:
         The primary method for finding a specific card printing.
         It first checks the local database. If not found, it queries Scryfall.
         """
+        lookup_key = printing_key(set_code, collector_number)
+        printing = self._cached_lookup(CardPrinting, lookup_key)
+        if printing:
+            return self._resolved_printing(lookup_key, printing)
+
         # First, check our local database for this specific printing
         # Using joinedload tells SQLAlchemy to fetch the related OracleCard in the same query,
         # which is more efficient than loading it later.
@@ -68,76 +175,396 @@ class ScryfallClient:
 
         if printing:
             print(f"Found '{printing.oracle_card.name} ({printing.set_code.upper()})' in local DB.")
-            return printing
+            return self._resolved_printing(lookup_key, printing)
+
+        identifier = f"{set_code.upper()} #{collector_number}"
+        if self.offline:
+            print(f"Offline mode: {identifier} is not in the local catalog.")
+            raise CardNotFoundError(identifier=identifier)
+
+        if self.negative_cache.is_known_failure(lookup_key):
+            print(f"Scryfall recently found no card for {identifier}; not asking again.")
+            raise CardNotFoundError(identifier=identifier)
 
         # If not in our DB, query the Scryfall API
-        print(f"Querying Scryfall for {set_code.upper()} #{collector_number}...")
+        print(f"Querying Scryfall for {identifier}...")
         try:
-            time.sleep(0.1)
-
-            url = f"{self.BASE_URL}/cards/{set_code.lower()}/{collector_number}"
-            response = requests.get(url)
-            response.raise_for_status()
+            response = self._request('GET', f"/cards/{set_code.lower()}/{collector_number}", cache=True)
 
             card_data = response.json()
             # UPDATED: Use the new centralized caching method
-            return self._cache_card_data(card_data)
+            return self._resolved_printing(lookup_key, self._cache_card_data(card_data), fetched=True)
 
         except requests.exceptions.RequestException as e:
-            identifier = f"{set_code.upper()} #{collector_number}"
             print(f"Scryfall API error for '{identifier}': {e}")
+            if _is_not_found(e):
+                self.negative_cache.add(lookup_key)
             raise CardNotFoundError(identifier=identifier) from e
 
-    # NEW: This method replaces the old '_create_from_scryfall_data'
+    def get_printings_by_set_and_number(self, identifiers: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], CardPrinting]:
+        """
+        Batch version of `get_printing_by_set_and_number`. Resolves many
+        (set_code, collector_number) pairs at once: the ones in the lookup cache are
+        loaded by primary key and the others by set and number, one query each (per
+        IN_QUERY_BATCH_SIZE identifiers), and only the misses are requested from
+        Scryfall's /cards/collection endpoint, COLLECTION_BATCH_SIZE at a time.
+        Every fetched card is cached in one flush.
+
+        Returns a dictionary keyed by (lowercase set_code, collector_number).
+        Identifiers that Scryfall does not know are simply absent from it.
+        """
+        keys = list(dict.fromkeys((set_code.lower(), collector_number) for set_code, collector_number in identifiers))
+
+        found = self._cached_lookups(CardPrinting, {key: printing_key(*key) for key in keys},
+                                     joinedload(CardPrinting.oracle_card))
+        uncached = [key for key in keys if key not in found]
+        for start in range(0, len(uncached), IN_QUERY_BATCH_SIZE):
+            chunk = uncached[start:start + IN_QUERY_BATCH_SIZE]
+            printings = (
+                self.session.query(CardPrinting)
+                .options(joinedload(CardPrinting.oracle_card))
+                .filter(_printings_filter(chunk))
+                .all()
+            )
+            for printing in printings:
+                found[(printing.set_code, printing.collector_number)] = printing
+        print(f"Found {len(found)} of {len(keys)} printings in local DB.")
+
+        missing = [key for key in keys if key not in found]
+        if self.offline:
+            if missing:
+                print(f"Offline mode: {len(missing)} printings are not in the local catalog.")
+            return self._remember_printings(keys, found)
+
+        known_failures = self.negative_cache.known_failures(printing_key(*key) for key in missing)
+        missing = [key for key in missing if printing_key(*key) not in known_failures]
+        if missing:
+            print(f"Querying Scryfall for {len(missing)} printings...")
+            cards_data, not_found = self._fetch_collection(
+                [{'set': set_code, 'collector_number': collector_number} for set_code, collector_number in missing]
+            )
+            for printing in self._cache_cards_data(cards_data):
+                found[(printing.set_code.lower(), printing.collector_number)] = printing
+            for identifier in not_found:
+                self.negative_cache.add(printing_key(identifier['set'], identifier['collector_number']))
+
+        return self._remember_printings(keys, found, fetched=missing)
+
+    def get_oracle_cards_by_name(self, names: Iterable[str], fuzzy: bool = False) -> Dict[str, OracleCard]:
+        """
+        Batch version of `get_oracle_card_by_name`. Names in the lookup cache are
+        loaded by primary key in a single query, and the others are matched exactly
+        (but case-insensitively) in the local database with another. The misses are
+        resolved on Scryfall in one of two ways:
+        - by default, with exact names through the /cards/collection endpoint, which
+          also matches the front face of a multi-faced card (e.g. 'Delver of Secrets');
+        - with `fuzzy`, through concurrent fuzzy /cards/named lookups on the
+          AsyncScryfallClient, which forgive typos and partial names.
+        All fetched cards are cached in one flush.
+
+        Returns a dictionary keyed by the names as they were passed in.
+        Names that Scryfall does not know are simply absent from it.
+        """
+        names = list(dict.fromkeys(names))
+        lookup_key = fuzzy_name_key if fuzzy else exact_name_key
+        folded = list(dict.fromkeys(fold_name(name) for name in names))
+        found = self._cached_lookups(OracleCard, {name: lookup_key(name) for name in folded})
+        uncached = [name for name in folded if name not in found]
+        for start in range(0, len(uncached), IN_QUERY_BATCH_SIZE):
+            chunk = uncached[start:start + IN_QUERY_BATCH_SIZE]
+            for oracle_card in self.session.query(OracleCard).filter(OracleCard.name_folded.in_(chunk)).all():
+                found[oracle_card.name_folded] = oracle_card
+        print(f"Found {len(found)} of {len(folded)} Oracle cards in local DB.")
+
+        missing = [name for name in folded if name not in found]
+        if fuzzy and self._matches_names_locally():
+            for name in missing:
+                oracle_card = self._match_local_name(name)
+                if oracle_card:
+                    found[name] = oracle_card
+            missing = [name for name in missing if name not in found]
+        if self.offline:
+            if missing:
+                print(f"Offline mode: {len(missing)} card names are not in the local catalog.")
+            return self._remember_oracle_cards(names, found, lookup_key)
+
+        known_failures = self.negative_cache.known_failures(lookup_key(name) for name in missing)
+        missing = [name for name in missing if lookup_key(name) not in known_failures]
+        if missing and fuzzy:
+            print(f"Querying Scryfall for {len(missing)} card names concurrently...")
+            async_client = AsyncScryfallClient(self.base_url, self.http, self.limiter, stats=self.stats,
+                                               response_cache=self.response_cache)
+            cards_by_name, not_found = run_sync(async_client.fetch_cards_by_name(missing))
+            printings = self._cache_cards_data(list(cards_by_name.values()))
+            for name, printing in zip(cards_by_name, printings):
+                found[name] = printing.oracle_card
+            for name in not_found:
+                self.negative_cache.add(lookup_key(name))
+        elif missing:
+            print(f"Querying Scryfall for {len(missing)} card names...")
+            cards_data, not_found = self._fetch_collection([{'name': name} for name in missing])
+            printings = self._cache_cards_data(cards_data)
+            for card_data, printing in zip(cards_data, printings):
+                for key in _name_keys(card_data['name']):
+                    found.setdefault(key, printing.oracle_card)
+            for identifier in not_found:
+                self.negative_cache.add(lookup_key(identifier['name']))
+
+        return self._remember_oracle_cards(names, found, lookup_key)
+
+    def _cached_lookup(self, model, lookup_key: str):
+        """
+        Loads the row the lookup cache remembers for `lookup_key`, by primary key.
+        Returns None when the key is not cached, or when its row no longer exists
+        (e.g. the transaction that cached the card was rolled back); such a stale
+        entry is dropped.
+        """
+        primary_key = self.lookup_cache.get(lookup_key)
+        if primary_key is None:
+            return None
+        instance = self.session.get(model, primary_key)
+        if instance is None:
+            self.lookup_cache.discard(lookup_key)
+        return instance
+
+    def _cached_lookups(self, model, lookup_keys: Dict[Hashable, str], *options) -> Dict[Hashable, object]:
+        """
+        Batch version of `_cached_lookup`: loads the rows the lookup cache remembers for
+        the lookup keys in the values of `lookup_keys`, IN_QUERY_BATCH_SIZE primary keys
+        per query, with the given loader options. Returns the rows under the keys of
+        `lookup_keys`; stale entries are dropped.
+        """
+        primary_keys = {}
+        for key, lookup_key in lookup_keys.items():
+            primary_key = self.lookup_cache.get(lookup_key)
+            if primary_key is not None:
+                primary_keys[key] = primary_key
+
+        unique_keys = list(dict.fromkeys(primary_keys.values()))
+        rows = {}
+        for start in range(0, len(unique_keys), IN_QUERY_BATCH_SIZE):
+            chunk = unique_keys[start:start + IN_QUERY_BATCH_SIZE]
+            for row in self.session.query(model).options(*options).filter(model.id.in_(chunk)).all():
+                rows[row.id] = row
+
+        found = {}
+        for key, primary_key in primary_keys.items():
+            if primary_key in rows:
+                found[key] = rows[primary_key]
+            else:
+                self.lookup_cache.discard(lookup_keys[key])
+        return found
+
+    def _remember_printings(self, keys: List[Tuple[str, str]], found: Dict[Tuple[str, str], CardPrinting],
+                            fetched: Iterable[Tuple[str, str]] = ()) -> Dict[Tuple[str, str], CardPrinting]:
+        """
+        Stores the resolved printings in the lookup cache and returns them in the order
+        of `keys`. `fetched` are the keys that were requested from Scryfall.
+        """
+        fetched = set(fetched)
+        result = {key: found[key] for key in keys if key in found}
+        for key, printing in result.items():
+            self._resolved_printing(printing_key(*key), printing, fetched=key in fetched)
+        return result
+
+    def _resolved_printing(self, lookup_key: str, printing: CardPrinting, fetched: bool = False) -> CardPrinting:
+        """
+        Remembers a resolved printing in the lookup cache. A printing `fetched` from
+        Scryfall also tells the prefetcher about its set; the sets of printings found
+        locally are already in the catalog, so they are not worth prefetching.
+        """
+        self.lookup_cache.put(lookup_key, printing.id)
+        if fetched and self.prefetcher is not None:
+            self.prefetcher.notice(printing.set_code)
+        return printing
+
+    def _remember_oracle_cards(self, names: List[str], found: Dict[str, OracleCard],
+                               lookup_key) -> Dict[str, OracleCard]:
+        """Stores the resolved names in the lookup cache and returns them keyed by the names as passed in."""
+        result = {name: found[fold_name(name)] for name in names if fold_name(name) in found}
+        for name, oracle_card in result.items():
+            self.lookup_cache.put(lookup_key(name), oracle_card.id)
+        return result
+
+    def get_set_printings(self, set_code: str) -> Iterator[List[CardPrinting]]:
+        """
+        Fetches every printing of a set from Scryfall's search, one page at a time,
+        and caches the cards of each page in one flush. Yields the CardPrintings of
+        every page; stopping early simply leaves the remaining pages unfetched.
+        This method does NOT commit.
+        """
+        path, params = "/cards/search", {'q': f"e:{set_code.lower()}", 'unique': 'prints', 'order': 'set'}
+        while path:
+            page = self._request('GET', path, params=params).json()
+            yield self._cache_cards_data(page.get('data', []))
+            # next_page is a full URL that already carries the query
+            path = page['next_page'].removeprefix(self.base_url) if page.get('has_more') else None
+            params = None
+
+    def _matches_names_locally(self) -> bool:
+        """
+        Whether misspelled or partial names are matched against the local catalog:
+        offline, or when the catalog was bulk imported (only the importer stores
+        content hashes). A catalog of only the cards looked up so far would match a
+        name to a cached neighbour ('Shock' -> 'Shock Troops'), so otherwise such
+        names are left to Scryfall's fuzzy search.
+        """
+        if self.offline:
+            return True
+        if self._has_bulk_catalog is None:
+            self._has_bulk_catalog = self.session.query(OracleCard.id).filter(
+                OracleCard.content_hash != None).first() is not None
+        return self._has_bulk_catalog
+
+    def _match_local_name(self, name: str) -> OracleCard | None:
+        """
+        Finds the OracleCard in the local catalog that best matches a misspelled or
+        partial name, using an in-memory fuzzy index that is built on first use.
+        Returns None when the catalog has no plausible candidate.
+        """
+        if self._fuzzy_index is None:
+            self._fuzzy_index = FuzzyNameIndex(self.session.query(OracleCard.id, OracleCard.name))
+            print(f"Built the fuzzy name index ({len(self._fuzzy_index)} names).")
+
+        oracle_id = self._fuzzy_index.match(name)
+        # The card may be gone if the transaction that cached it was rolled back
+        return self.session.get(OracleCard, oracle_id) if oracle_id else None
+
+    def _fetch_collection(self, identifiers: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """
+        Posts identifiers to Scryfall's /cards/collection endpoint in batches of
+        COLLECTION_BATCH_SIZE. Returns the card data of every card found, and the
+        identifiers Scryfall reported as not found.
+        A failed batch is reported and skipped; its identifiers are in neither list.
+        """
+        cards_data, not_found = [], []
+        for start in range(0, len(identifiers), self.COLLECTION_BATCH_SIZE):
+            batch = identifiers[start:start + self.COLLECTION_BATCH_SIZE]
+            try:
+                response = self._request('POST', "/cards/collection", json={'identifiers': batch})
+            except requests.exceptions.RequestException as e:
+                print(f"Scryfall API error for a batch of {len(batch)} cards: {e}")
+                continue
+
+            result = response.json()
+            cards_data.extend(result.get('data', []))
+            if result.get('not_found'):
+                print(f"Scryfall could not find {len(result['not_found'])} of {len(batch)} cards.")
+                not_found.extend(result['not_found'])
+        return cards_data, not_found
+
     def _cache_card_data(self, card_data: dict) -> CardPrinting:
         """
         Processes Scryfall JSON data. Finds/creates the OracleCard and the
         CardPrinting, populating all fields from the TRS. This is the core
         caching logic.
         """
+        return self._cache_cards_data([card_data])[0]
+
+    def _cache_cards_data(self, cards_data: List[dict]) -> List[CardPrinting]:
+        """
+        Caches any number of Scryfall cards in one atomic step: the existing
+        OracleCards and CardPrintings are looked up with one query each (per
+        IN_QUERY_BATCH_SIZE identifiers), the new ones
+        are created, and everything is flushed once.
+        Returns the CardPrinting of every card, in the order of `cards_data`.
+        """
+        if not cards_data:
+            return []
+
         # Use a transaction block to ensure this is an atomic operation
         with self.session.begin_nested():
-            # Step 1: Find or create the OracleCard
-            oracle_id = card_data['oracle_id']
-            oracle_card = self.session.get(OracleCard, oracle_id)
-
-            if not oracle_card:
-                print(f"OracleCard not found for '{card_data['name']}'. Creating new entry.")
-                oracle_card = OracleCard(
-                    id=oracle_id,
-                    name=card_data['name'],
-                    mana_cost=card_data.get('mana_cost', ''),
-                    cmc=card_data.get('cmc', 0.0),
-                    color_identity="".join(card_data.get('color_identity', [])),
-                    type_line=card_data.get('type_line', ''),
-                    oracle_text=card_data.get('oracle_text', ''),
-                    power=card_data.get('power'),  # .get() handles missing keys gracefully
-                    toughness=card_data.get('toughness'),
-                    loyalty=card_data.get('loyalty'),
-                    keywords=", ".join(card_data.get('keywords', []))  # Store as string
-                )
-                self.session.add(oracle_card)
-
-            # Step 2: Find or create the CardPrinting
-            printing_id = card_data['id']
-            printing = self.session.get(CardPrinting, printing_id)
-
-            if not printing:
-                print(f"Printing not found for '{card_data['name']} ({card_data['set'].upper()})'. Creating new entry.")
-                printing = CardPrinting(
-                    id=printing_id,
-                    oracle_card_id=oracle_id,
-                    set_code=card_data['set'],
-                    collector_number=card_data['collector_number'],
-                    rarity=card_data['rarity'],
-                    artist=card_data.get('artist'),
-                    image_uri_normal=card_data.get('image_uris', {}).get('normal'),
-                    image_uri_large=card_data.get('image_uris', {}).get('large'),
-                    price_usd=card_data.get('prices', {}).get('usd'),
-                    price_usd_foil=card_data.get('prices', {}).get('usd_foil')
-                )
-                self.session.add(printing)
+            oracle_ids = list(dict.fromkeys(card_data['oracle_id'] for card_data in cards_data))
+            printing_ids = list(dict.fromkeys(card_data['id'] for card_data in cards_data))
+            oracle_cards, printings = {}, {}
+            for start in range(0, len(oracle_ids), IN_QUERY_BATCH_SIZE):
+                chunk = oracle_ids[start:start + IN_QUERY_BATCH_SIZE]
+                for oracle_card in self.session.query(OracleCard).filter(OracleCard.id.in_(chunk)):
+                    oracle_cards[oracle_card.id] = oracle_card
+            for start in range(0, len(printing_ids), IN_QUERY_BATCH_SIZE):
+                chunk = printing_ids[start:start + IN_QUERY_BATCH_SIZE]
+                for printing in self.session.query(CardPrinting).filter(CardPrinting.id.in_(chunk)):
+                    printings[printing.id] = printing
+
+            result = []
+            for card_data in cards_data:
+                # Step 1: Find or create the OracleCard
+                oracle_id = card_data['oracle_id']
+                oracle_card = oracle_cards.get(oracle_id)
+
+                if not oracle_card:
+                    print(f"OracleCard not found for '{card_data['name']}'. Creating new entry.")
+                    oracle_card = OracleCard(
+                        id=oracle_id,
+                        name=card_data['name'],
+                        mana_cost=card_data.get('mana_cost', ''),
+                        cmc=card_data.get('cmc', 0.0),
+                        color_identity="".join(card_data.get('color_identity', [])),
+                        type_line=card_data.get('type_line', ''),
+                        oracle_text=card_data.get('oracle_text', ''),
+                        power=card_data.get('power'),  # .get() handles missing keys gracefully
+                        toughness=card_data.get('toughness'),
+                        loyalty=card_data.get('loyalty'),
+                        keywords=", ".join(card_data.get('keywords', []))  # Store as string
+                    )
+                    self.session.add(oracle_card)
+                    # Several printings of one card may be cached together
+                    oracle_cards[oracle_id] = oracle_card
+                    if self._fuzzy_index is not None:
+                        self._fuzzy_index.add(oracle_id, oracle_card.name)
+
+                # Step 2: Find or create the CardPrinting
+                printing_id = card_data['id']
+                printing = printings.get(printing_id)
+
+                if not printing:
+                    print(f"Printing not found for '{card_data['name']} ({card_data['set'].upper()})'. Creating new entry.")
+                    printing = CardPrinting(
+                        id=printing_id,
+                        oracle_card=oracle_card,
+                        set_code=card_data['set'],
+                        collector_number=card_data['collector_number'],
+                        rarity=card_data['rarity'],
+                        artist=card_data.get('artist'),
+                        image_uri_normal=card_data.get('image_uris', {}).get('normal'),
+                        image_uri_large=card_data.get('image_uris', {}).get('large'),
+                        price_usd=card_data.get('prices', {}).get('usd'),
+                        price_usd_foil=card_data.get('prices', {}).get('usd_foil')
+                    )
+                    self.session.add(printing)
+                    printings[printing_id] = printing
+
+                result.append(printing)
 
         # The service layer is now responsible for the commit.
         # After commit, the 'printing' object is fully attached to the session and its relationships are loaded
-        return printing
\ No newline at end of file
+        return result
+
+
+def _is_not_found(error: requests.exceptions.RequestException) -> bool:
+    """Whether Scryfall definitively answered 'not found', as opposed to a transient failure."""
+    return error.response is not None and error.response.status_code == 404
+
+
+def _printings_filter(keys: List[Tuple[str, str]]):
+    """
+    Matches the printings with the given (set_code, collector_number) keys. The keys
+    are grouped per set, so SQLite searches the unique (set_code, collector_number)
+    index for each of them; a row-value IN (...) would scan the whole table instead.
+    """
+    numbers_by_set: Dict[str, List[str]] = {}
+    for set_code, collector_number in keys:
+        numbers_by_set.setdefault(set_code, []).append(collector_number)
+    return or_(*(
+        and_(CardPrinting.set_code == set_code, CardPrinting.collector_number.in_(numbers))
+        for set_code, numbers in numbers_by_set.items()
+    ))
+
+
+def _name_keys(card_name: str) -> List[str]:
+    """
+    Returns the case-folded names a card can be looked up by: its full name and,
+    for multi-faced cards ('Front // Back'), the name of each face.
+    """
+    faces = fold_name(card_name).split(" // ")
+    return [fold_name(card_name)] + (faces if len(faces) > 1 else [])
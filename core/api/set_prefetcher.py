@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Set
+
+import requests
+from sqlalchemy.exc import SQLAlchemyError
+
+# Seconds without lookups before the prefetcher sends its next request
+PREFETCH_IDLE_SECONDS = 2.0
+
+
+class SetPrefetcher:
+    """
+    Warms the local catalog with every printing of the sets the user is adding
+    cards from, on a background thread: after a list from one set is imported, the
+    next cards almost always come from the same set and then resolve locally.
+
+    The worker uses a ScryfallClient of its own, made by `client_factory` on its
+    own database session, and commits every page of cards it caches. Its requests
+    wait for the same rate limiter as the foreground lookups, and it only sends one
+    once no lookup was noticed for `idle_seconds`, so it never competes with the
+    user. Every set is prefetched at most once per prefetcher.
+
+    `cancel` stops the prefetching as soon as the current request returns; `close`
+    also waits for the worker to finish and closes its session.
+    """
+
+    def __init__(self, client_factory: Callable[[], Any], idle_seconds: float = PREFETCH_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+        self.prefetched_sets: Set[str] = set()
+        self.prefetched_printings = 0
+        self._client_factory = client_factory
+        self._queued: Set[str] = set()
+        self._queue: queue.Queue[str] = queue.Queue()
+        self._last_activity = time.monotonic()
+        self._cancelled = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="set-prefetcher", daemon=True)
+        self._worker.start()
+
+    def notice(self, set_code: str) -> None:
+        """Records a foreground lookup of a printing from `set_code`, and queues the set if it is new."""
+        self._last_activity = time.monotonic()
+        set_code = set_code.lower()
+        if set_code not in self._queued and not self._cancelled.is_set():
+            self._queued.add(set_code)
+            self._queue.put(set_code)
+
+    def wait_until_idle(self, timeout: float | None = None) -> bool:
+        """Waits until every queued set was prefetched. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def close(self) -> None:
+        self.cancel()
+        self._worker.join()
+
+    def _wait_for_idle_time(self) -> bool:
+        """Sleeps until no lookup was noticed for `idle_seconds`. Returns False when cancelled meanwhile."""
+        while not self._cancelled.is_set():
+            remaining = self._last_activity + self.idle_seconds - time.monotonic()
+            if remaining <= 0:
+                return True
+            self._cancelled.wait(remaining)
+        return False
+
+    def _run(self) -> None:
+        client = None
+        try:
+            while not self._cancelled.is_set():
+                try:
+                    set_code = self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                try:
+                    if client is None:
+                        client = self._client_factory()
+                    self._prefetch_set(client, set_code)
+                finally:
+                    self._queue.task_done()
+        finally:
+            # Empty the queue, so nobody waits for sets that will never be prefetched
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._queue.task_done()
+            if client is not None:
+                client.session.close()
+
+    def _prefetch_set(self, client, set_code: str) -> None:
+        pages = client.get_set_printings(set_code)
+        try:
+            while self._wait_for_idle_time():
+                printings = next(pages, None)
+                if printings is None:
+                    self.prefetched_sets.add(set_code)
+                    print(f"Prefetched the printings of set {set_code.upper()}.")
+                    return
+                client.session.commit()
+                self.prefetched_printings += len(printings)
+        except (requests.exceptions.RequestException, SQLAlchemyError) as e:
+            # E.g. a foreground transaction holds the database lock; the set may be noticed again later
+            print(f"Could not prefetch set {set_code.upper()}: {e}")
+            client.session.rollback()
+            self._queued.discard(set_code)
+        finally:
+            pages.close()
@@ -10,9 +10,11 @@ from sqlalchemy import (
     Float,  # NEW: For prices and CMC
     TIMESTAMP,  # NEW: For date_added
     UniqueConstraint,  # NEW: For CardPrinting uniqueness
+    Index,
     Text  # NEW: For long text like oracle_text
 )
 from sqlalchemy.orm import relationship, declarative_base, sessionmaker
+from sqlalchemy.sql import column, table
 from sqlalchemy.sql import func  # NEW: To get the current time for defaults
 
 from core.repo.enums import DeckStatus
@@ -24,6 +26,23 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATABASE_PATH = os.path.join(BASE_DIR, 'collection.db')
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
+# The condition of newly added cards
+DEFAULT_CONDITION = "Near Mint"
+
+
+def fold_name(name: str) -> str:
+    """
+    The case-folded form of a card name, stored in OracleCard.name_folded.
+    Unlike SQLite's lower(), which only folds ASCII letters, this also matches
+    names such as 'Æther Vial' typed in another case.
+    """
+    return name.casefold()
+
+
+def _default_name_folded(context) -> str | None:
+    name = context.get_current_parameters().get('name')
+    return fold_name(name) if name is not None else None
+
 # The engine is the entry point to the database.
 engine = create_engine(DATABASE_URL, echo=False)
 
@@ -42,6 +61,8 @@ class OracleCard(Base):
     # OLD Fields - A few are updated
     id = Column(String, primary_key=True)  # UPDATED: Using Scryfall Oracle ID as primary key is more robust.
     name = Column(String, unique=True, index=True)
+    # Case-insensitive name lookups (name_folded = fold_name(...)) are answered from this index
+    name_folded = Column(String, index=True, default=_default_name_folded)
     color_identity = Column(String)  # Stored as a string, e.g., "WUBRG"
     type_line = Column(String)
 
@@ -54,6 +75,9 @@ class OracleCard(Base):
     loyalty = Column(String, nullable=True)
     keywords = Column(String, default="")  # Stored as a comma-separated string
 
+    # Hash of the imported Scryfall data, used by the bulk importer to skip unchanged rows
+    content_hash = Column(String, nullable=True)
+
     # This card concept has many different printings
     printings = relationship("CardPrinting", back_populates="oracle_card")
 
@@ -80,8 +104,11 @@ class CardPrinting(Base):
     price_usd = Column(Float, nullable=True)
     price_usd_foil = Column(Float, nullable=True)
 
+    # Hash of the imported Scryfall data, used by the bulk importer to skip unchanged rows
+    content_hash = Column(String, nullable=True)
+
     # This printing belongs to one abstract card concept
-    oracle_card_id = Column(String, ForeignKey('oracle_cards.id'))
+    oracle_card_id = Column(String, ForeignKey('oracle_cards.id'), index=True)
     oracle_card = relationship("OracleCard", back_populates="printings")
 
     # You can own multiple physical instances of this specific printing
@@ -102,7 +129,7 @@ class CardInstance(Base):
     is_foil = Column(Boolean, default=False)
 
     # NEW fields from TRS 3.3
-    condition = Column(String, default="Near Mint")
+    condition = Column(String, default=DEFAULT_CONDITION)
     purchase_price = Column(Float, nullable=True)
     date_added = Column(TIMESTAMP, server_default=func.now())
 
@@ -114,9 +141,23 @@ class CardInstance(Base):
     deck_id = Column(Integer, ForeignKey('decks.id'), nullable=True)
     deck = relationship("Deck", back_populates="cards")
 
+    # Number of identical copies this row stands for. Only unallocated, unedited copies are
+    # stacked (see CollectionRepository); allocated and edited copies always have a row of their own.
+    quantity = Column(Integer, nullable=False, default=1, server_default='1')
+
+    __table_args__ = (
+        # Owned and available copies per printing are counted from this index alone
+        Index('ix_card_instances_printing_deck', printing_id, deck_id, quantity),
+        # Finds the cards of a deck. Most copies are not in a deck, so only allocated ones are indexed,
+        # which also keeps 'deck_id IS NULL' queries on the index above.
+        Index('ix_card_instances_deck_id', deck_id, sqlite_where=deck_id.isnot(None)),
+    )
+
     def __repr__(self):
         foil_str = " (Foil)" if self.is_foil else ""
-        return f"<CardInstance(id={self.id}, printing='{self.printing.oracle_card.name} ({self.printing.set_code})'{foil_str})>"
+        quantity_str = f" x{self.quantity}" if self.quantity and self.quantity > 1 else ""
+        return (f"<CardInstance(id={self.id}, printing='{self.printing.oracle_card.name} "
+                f"({self.printing.set_code})'{foil_str}{quantity_str})>")
 
 
 class Deck(Base):
@@ -160,5 +201,243 @@ class BlueprintEntry(Base):
     deck = relationship("Deck", back_populates="blueprint_entries")
     oracle_card = relationship("OracleCard")
 
+    __table_args__ = (Index('ix_blueprint_entries_deck_oracle', deck_id, oracle_card_id),)
+
+    def __repr__(self):
+        return f"<BlueprintEntry(deck='{self.deck.name}', quantity={self.quantity}, card='{self.oracle_card.name}')>"
+
+class FailedLookup(Base):
+    """
+    Remembers an identifier that Scryfall could not find, so that repeating the same
+    lookup (e.g. re-pasting a list with a typo) does not go to the network again
+    until the entry expires. Maintained by the ScryfallClient's NegativeLookupCache.
+    """
+    __tablename__ = 'failed_lookups'
+
+    # Normalized identifier, e.g. 'fuzzy:sol rnig' or 'printing:clb/649'
+    key = Column(String, primary_key=True)
+    failed_at = Column(TIMESTAMP, nullable=False)
+
+    def __repr__(self):
+        return f"<FailedLookup(key='{self.key}', failed_at='{self.failed_at}')>"
+
+
+class CollectionSummary(Base):
+    """
+    The owned and available copies of every Oracle card in the collection, with one
+    representative image. Maintained by the triggers in COLLECTION_SUMMARY_TRIGGERS
+    on every write to card_instances, so the collection view never has to aggregate
+    the instances itself. Never write to it directly.
+    """
+    __tablename__ = 'collection_summary'
+
+    oracle_card_id = Column(String, ForeignKey('oracle_cards.id'), primary_key=True)
+    total_owned = Column(Integer, nullable=False, default=0)
+    available_count = Column(Integer, nullable=False, default=0)
+    # The smallest image URI among the owned printings, like MIN() in the aggregate it replaces
+    image_uri = Column(String, nullable=True)
+
+    oracle_card = relationship("OracleCard")
+
     def __repr__(self):
-        return f"<BlueprintEntry(deck='{self.deck.name}', quantity={self.quantity}, card='{self.oracle_card.name}')>"
\ No newline at end of file
+        return (f"<CollectionSummary(oracle_card_id='{self.oracle_card_id}', "
+                f"total_owned={self.total_owned}, available_count={self.available_count})>")
+
+
+# --- Collection summary triggers ---
+
+def _add_to_summary(row: str) -> str:
+    """SQL adding the copies of the instance row `row` (NEW or OLD) to the summary of its Oracle card."""
+    return f"""
+        INSERT INTO collection_summary (oracle_card_id, total_owned, available_count, image_uri)
+        SELECT oracle_card_id, {row}.quantity,
+               CASE WHEN {row}.deck_id IS NULL THEN {row}.quantity ELSE 0 END, image_uri_normal
+        FROM card_printings WHERE id = {row}.printing_id AND oracle_card_id IS NOT NULL
+        ON CONFLICT (oracle_card_id) DO UPDATE SET
+            total_owned = total_owned + excluded.total_owned,
+            available_count = available_count + excluded.available_count,
+            image_uri = coalesce(min(image_uri, excluded.image_uri), image_uri, excluded.image_uri);
+    """
+
+
+def _remove_from_summary(row: str) -> str:
+    """
+    SQL removing the copies of the instance row `row` from the summary of its Oracle
+    card. The row is dropped when no copies are left, and the image is only looked up
+    again when the last copy of the printing it came from is gone.
+    """
+    oracle_card_id = f"(SELECT oracle_card_id FROM card_printings WHERE id = {row}.printing_id)"
+    return f"""
+        UPDATE collection_summary SET
+            total_owned = total_owned - {row}.quantity,
+            available_count = available_count - CASE WHEN {row}.deck_id IS NULL THEN {row}.quantity ELSE 0 END
+        WHERE oracle_card_id = {oracle_card_id};
+        DELETE FROM collection_summary WHERE oracle_card_id = {oracle_card_id} AND total_owned <= 0;
+        UPDATE collection_summary SET image_uri = (
+            SELECT min(p.image_uri_normal) FROM card_printings AS p
+            WHERE p.oracle_card_id = collection_summary.oracle_card_id
+              AND EXISTS (SELECT 1 FROM card_instances AS i WHERE i.printing_id = p.id)
+        )
+        WHERE oracle_card_id = {oracle_card_id}
+          AND image_uri = (SELECT image_uri_normal FROM card_printings WHERE id = {row}.printing_id)
+          AND NOT EXISTS (SELECT 1 FROM card_instances WHERE printing_id = {row}.printing_id);
+    """
+
+
+# Trigger name -> CREATE TRIGGER statement
+COLLECTION_SUMMARY_TRIGGERS = {
+    'collection_summary_instance_added': f"""
+        CREATE TRIGGER collection_summary_instance_added AFTER INSERT ON card_instances
+        BEGIN {_add_to_summary('NEW')} END
+    """,
+    'collection_summary_instance_deleted': f"""
+        CREATE TRIGGER collection_summary_instance_deleted AFTER DELETE ON card_instances
+        BEGIN {_remove_from_summary('OLD')} END
+    """,
+    # Allocating, returning and (un)stacking copies keeps the printing, so only the counts change
+    'collection_summary_instance_updated': """
+        CREATE TRIGGER collection_summary_instance_updated AFTER UPDATE OF deck_id, quantity ON card_instances
+        WHEN OLD.printing_id IS NEW.printing_id
+        BEGIN
+            UPDATE collection_summary SET
+                total_owned = total_owned - OLD.quantity + NEW.quantity,
+                available_count = available_count
+                    - CASE WHEN OLD.deck_id IS NULL THEN OLD.quantity ELSE 0 END
+                    + CASE WHEN NEW.deck_id IS NULL THEN NEW.quantity ELSE 0 END
+            WHERE oracle_card_id = (SELECT oracle_card_id FROM card_printings WHERE id = NEW.printing_id);
+        END
+    """,
+    'collection_summary_instance_reprinted': f"""
+        CREATE TRIGGER collection_summary_instance_reprinted AFTER UPDATE OF printing_id ON card_instances
+        WHEN OLD.printing_id IS NOT NEW.printing_id
+        BEGIN {_remove_from_summary('OLD')} {_add_to_summary('NEW')} END
+    """,
+}
+
+
+def rebuild_collection_summary(connection) -> None:
+    """
+    Recomputes the whole collection summary from the card instances. Used when the
+    triggers are first installed, and after the card catalog was (re)imported, which
+    can change the printings' images. Does NOT commit.
+    """
+    connection.exec_driver_sql("DELETE FROM collection_summary")
+    connection.exec_driver_sql("""
+        INSERT INTO collection_summary (oracle_card_id, total_owned, available_count, image_uri)
+        SELECT p.oracle_card_id, sum(i.quantity),
+               sum(CASE WHEN i.deck_id IS NULL THEN i.quantity ELSE 0 END), min(p.image_uri_normal)
+        FROM card_instances AS i JOIN card_printings AS p ON p.id = i.printing_id
+        WHERE p.oracle_card_id IS NOT NULL
+        GROUP BY p.oracle_card_id
+    """)
+
+
+def install_collection_summary(connection) -> bool:
+    """
+    Creates the collection summary triggers that are missing from the database and,
+    if any were, fills the summary from the existing card instances. Called by
+    database_setup.upgrade_database once the columns the triggers read exist.
+    Returns True if anything was installed.
+    """
+    existing = {name for name, in connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+    )}
+    if not {'collection_summary', 'card_instances', 'card_printings'} <= existing:
+        # E.g. a catalog-only database built by the bulk importer
+        return False
+
+    missing = [name for name in COLLECTION_SUMMARY_TRIGGERS if name not in existing]
+    for name in missing:
+        connection.exec_driver_sql(COLLECTION_SUMMARY_TRIGGERS[name])
+    if missing:
+        rebuild_collection_summary(connection)
+    return bool(missing)
+
+
+
+# --- Full-text search over the Oracle cards ---
+
+# An FTS5 index of the names, type lines and rules text of the Oracle cards. Every row has the
+# rowid of its oracle_cards row, and is kept in sync by the triggers in CARD_SEARCH_TRIGGERS.
+CARD_SEARCH_TABLE = 'oracle_cards_fts'
+card_search = table(CARD_SEARCH_TABLE, column('rowid'), column('name'), column('type_line'), column('oracle_text'))
+
+# Hyphens and apostrophes separate words ('Lim-Dûl's' is 'lim dul s'), but braces and slashes
+# are part of them, so symbols such as {T} and {W/U} can be searched for like words.
+CARD_SEARCH_TABLE_DDL = f"""
+    CREATE VIRTUAL TABLE {CARD_SEARCH_TABLE} USING fts5(
+        name, type_line, oracle_text, tokenize = "unicode61 remove_diacritics 2 tokenchars '{{}}/'"
+    )
+"""
+
+
+def separate_symbols(text: str) -> str:
+    """Splits adjacent symbols like '{2}{W}', so that each is a word of its own; as done when indexing."""
+    return text.replace('}{', '} {')
+
+
+def _searchable_text(row: str) -> str:
+    """
+    SQL selecting the columns indexed for the Oracle card row `row` (NEW, or the table
+    itself), with the rules text passed through the SQL equivalent of `separate_symbols`.
+    """
+    return f"{row}.rowid, {row}.name, {row}.type_line, replace({row}.oracle_text, '}}{{', '}} {{')"
+
+
+# Trigger name -> CREATE TRIGGER statement
+CARD_SEARCH_TRIGGERS = {
+    'card_search_oracle_card_added': f"""
+        CREATE TRIGGER card_search_oracle_card_added AFTER INSERT ON oracle_cards
+        BEGIN
+            INSERT INTO {CARD_SEARCH_TABLE} (rowid, name, type_line, oracle_text) SELECT {_searchable_text('NEW')};
+        END
+    """,
+    'card_search_oracle_card_deleted': f"""
+        CREATE TRIGGER card_search_oracle_card_deleted AFTER DELETE ON oracle_cards
+        BEGIN
+            DELETE FROM {CARD_SEARCH_TABLE} WHERE rowid = OLD.rowid;
+        END
+    """,
+    'card_search_oracle_card_updated': f"""
+        CREATE TRIGGER card_search_oracle_card_updated AFTER UPDATE OF name, type_line, oracle_text ON oracle_cards
+        BEGIN
+            DELETE FROM {CARD_SEARCH_TABLE} WHERE rowid = OLD.rowid;
+            INSERT INTO {CARD_SEARCH_TABLE} (rowid, name, type_line, oracle_text) SELECT {_searchable_text('NEW')};
+        END
+    """,
+}
+
+
+def rebuild_card_search(connection) -> None:
+    """Re-indexes every Oracle card for full-text search. Does NOT commit."""
+    connection.exec_driver_sql(f"DELETE FROM {CARD_SEARCH_TABLE}")
+    connection.exec_driver_sql(
+        f"INSERT INTO {CARD_SEARCH_TABLE} (rowid, name, type_line, oracle_text) "
+        f"SELECT {_searchable_text('oracle_cards')} FROM oracle_cards"
+    )
+
+
+def install_card_search(connection) -> bool:
+    """
+    Creates the full-text search table and the triggers that are missing from the
+    database and, if any were, indexes the existing Oracle cards. Called by
+    database_setup.upgrade_database.
+    Returns True if anything was installed.
+    """
+    existing = {name for name, in connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+    )}
+    if not {'oracle_cards', 'card_instances'} <= existing:
+        # E.g. a catalog-only database built by the bulk importer, which is never searched
+        return False
+
+    missing = [name for name in CARD_SEARCH_TRIGGERS if name not in existing]
+    if CARD_SEARCH_TABLE not in existing:
+        connection.exec_driver_sql(CARD_SEARCH_TABLE_DDL)
+        missing = list(CARD_SEARCH_TRIGGERS)
+    for name in missing:
+        connection.exec_driver_sql(CARD_SEARCH_TRIGGERS[name])
+    if missing:
+        rebuild_card_search(connection)
+    return bool(missing)
+
@@ -1,16 +1,77 @@
 import re
+from collections import Counter
 from typing import List, Dict
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy import func, case, insert, update, bindparam, literal, literal_column, select
 
 from core.exceptions import InvalidInputFormatError, InstanceAlreadyAllocatedError, CardNotFoundError
 from core.api.scryfall_client import ScryfallClient
-from core.models import OracleCard, Deck, CardInstance, CardPrinting # Add new imports
+from core.models import OracleCard, Deck, CardInstance, CardPrinting, CollectionSummary, DEFAULT_CONDITION, fold_name, \
+    CARD_SEARCH_TABLE, card_search, separate_symbols
+from core.utils.database_setup import IN_QUERY_BATCH_SIZE
+
+# Captures: quantity, name, set code, collector number, and foil flag
+CARD_LINE_PATTERN = re.compile(r"^(?:(\d+)\s+)?\s*(.+?)\s+\((\w+)\)\s+([\w\d]+)(?:\s+\*F\*)?$")
+
+# The text filters answered by the full-text search, with the bm25 weight of their column
+CARD_SEARCH_WEIGHTS = {'name': 10.0, 'type_line': 2.0, 'oracle_text': 1.0}
+
+
+def card_search_expression(filters: dict) -> str | None:
+    """
+    Builds the FTS5 query for the text filters ('name', 'type_line', 'oracle_text'),
+    or returns None if there are none. Every word of a filter must begin a word of
+    its column, so partly typed words match. A word written with hyphens or symbols
+    ('spider-man', '{T}:') matches its parts in that order.
+    """
+    clauses = []
+    for field in CARD_SEARCH_WEIGHTS:
+        words = (filters.get(field) or "").split()
+        if words:
+            phrases = " ".join('"{}"*'.format(separate_symbols(word).replace('"', '""')) for word in words)
+            clauses.append(f"{field} : ({phrases})")
+    return " AND ".join(clauses) or None
+
+
+def split_copies(session: Session, instance: CardInstance, count: int) -> List[CardInstance]:
+    """
+    Takes `count` copies off a CardInstance stack and returns one row per copy,
+    e.g. to allocate them to a deck. Each copy keeps the stack's attributes. When
+    the whole stack is taken, its own row becomes one of the copies.
+    This method does NOT commit.
+    """
+    if count > instance.quantity:
+        raise ValueError(f"Instance {instance.id} has only {instance.quantity} copies, not {count}.")
+
+    copies = []
+    if count == instance.quantity:
+        instance.quantity = 1
+        copies.append(instance)
+        count -= 1
+    else:
+        instance.quantity -= count
+
+    for _ in range(count):
+        copy = CardInstance(
+            printing_id=instance.printing_id,
+            is_foil=instance.is_foil,
+            condition=instance.condition,
+            purchase_price=instance.purchase_price,
+            date_added=instance.date_added,
+            deck_id=instance.deck_id
+        )
+        session.add(copy)
+        copies.append(copy)
+    return copies
+
 
 class CollectionRepository:
-    def __init__(self, db_session: Session, scryfall_client: ScryfallClient):
+    def __init__(self, db_session: Session, scryfall_client: ScryfallClient, stack_copies: bool = False):
         self.session = db_session
         self.scryfall_client = scryfall_client
+        # Store identical, unallocated copies as one row with a quantity instead of one row each
+        self.stack_copies = stack_copies
         # A list of fields that are safe for a user to update on a CardInstance
         self.updatable_instance_fields = ['is_foil', 'condition', 'purchase_price', 'deck_id']
         print("Collection Repository initialized.")
@@ -20,11 +81,7 @@ class CollectionRepository:
         Parses a line in the format: '1 Nalia de'Arnise (CLB) 649 *F*'
         Returns a dictionary with the parsed components or None if parsing fails.
         """
-        # Regex to capture: quantity, name, set code, collector number, and foil flag
-        pattern = re.compile(
-            r"^(?:(\d+)\s+)?\s*(.+?)\s+\((\w+)\)\s+([\w\d]+)(?:\s+\*F\*)?$"
-        )
-        match = pattern.match(line.strip())
+        match = CARD_LINE_PATTERN.match(line.strip())
 
         if not match:
             raise InvalidInputFormatError(line=line)
@@ -71,14 +128,17 @@ class CollectionRepository:
         # --- END OF FIX ---
 
         new_instances = []
-        for _ in range(parsed_data['quantity']):
-            instance = CardInstance(
-                printing_id=printing.id,
-                is_foil=parsed_data['is_foil']
-                # date_added is handled by the DB default
-            )
-            self.session.add(instance)
-            new_instances.append(instance)
+        if self.stack_copies:
+            new_instances.append(self._add_to_stack(printing.id, parsed_data['is_foil'], parsed_data['quantity']))
+        else:
+            for _ in range(parsed_data['quantity']):
+                instance = CardInstance(
+                    printing_id=printing.id,
+                    is_foil=parsed_data['is_foil']
+                    # date_added is handled by the DB default
+                )
+                self.session.add(instance)
+                new_instances.append(instance)
 
         print(f"Successfully added {parsed_data['quantity']}x '{printing.oracle_card.name}' to collection.")
         return new_instances
@@ -88,27 +148,44 @@ class CollectionRepository:
         Processes a list of card strings, preparing them for a single transaction.
         This method does NOT commit the session.
 
-        Returns a dictionary containing a list of successfully created CardInstance objects
-        and a list of lines that failed to process.
+        The work is set-based: every line is parsed first, all distinct printings are
+        resolved in one batch, and the instances of all valid lines are inserted with
+        a single Core executemany instead of one ORM object per copy.
+
+        With `stack_copies`, the copies of each printing are added to its existing
+        stack (one executemany UPDATE) or become a new one.
+
+        Returns a dictionary containing the IDs of the CardInstances the copies were
+        added to, one per copy, and a list of lines that failed to process.
         """
-        successful_instances = []
+        instance_rows = []
         failed_lines = []
 
+        # First pass: parse every line, so all printings can be resolved in one batch
+        parsed_lines = []
         for line in card_lines:
             line = line.strip()
             if not line:
                 continue
 
             try:
-                # We can reuse the single-add logic, but we must catch its exceptions locally
-                # instead of letting them halt the entire process.
-                parsed_data = self._parse_card_string(line)
-                user_provided_name = parsed_data['name']
+                parsed_lines.append((line, self._parse_card_string(line)))
+            except InvalidInputFormatError as e:
+                print(f"Skipping line due to error: '{line}' -> {e.message}")
+                failed_lines.append(line)
 
-                printing = self.scryfall_client.get_printing_by_set_and_number(
-                    set_code=parsed_data['set_code'],
-                    collector_number=parsed_data['collector_number']
-                )
+        printings = self.scryfall_client.get_printings_by_set_and_number(
+            (parsed_data['set_code'], parsed_data['collector_number']) for _, parsed_data in parsed_lines
+        )
+
+        for line, parsed_data in parsed_lines:
+            try:
+                user_provided_name = parsed_data['name']
+                printing = printings.get((parsed_data['set_code'], parsed_data['collector_number']))
+                if printing is None:
+                    raise CardNotFoundError(
+                        identifier=f"{parsed_data['set_code'].upper()} #{parsed_data['collector_number']}"
+                    )
 
                 scryfall_card_name = printing.oracle_card.name.lower()
                 if user_provided_name.lower() not in scryfall_card_name:
@@ -116,22 +193,90 @@ class CollectionRepository:
                         identifier=f"'{user_provided_name}' does not match the card found: '{printing.oracle_card.name}'"
                     )
 
-                for _ in range(parsed_data['quantity']):
-                    instance = CardInstance(
-                        printing_id=printing.id,
-                        is_foil=parsed_data['is_foil']
-                    )
-                    self.session.add(instance)
-                    successful_instances.append(instance)
+                row = {'printing_id': printing.id, 'is_foil': parsed_data['is_foil']}
+                instance_rows.extend(row for _ in range(parsed_data['quantity']))
 
                 print(f"Prepared {parsed_data['quantity']}x '{printing.oracle_card.name}' for addition.")
 
-            except (InvalidInputFormatError, CardNotFoundError) as e:
+            except CardNotFoundError as e:
                 print(f"Skipping line due to error: '{line}' -> {e.message}")
                 failed_lines.append(line)
             # Note: We do NOT catch generic Exception, as that might hide a real database problem.
 
-        return {"successes": successful_instances, "failures": failed_lines}
+        if self.stack_copies:
+            instance_ids = self._add_rows_to_stacks(instance_rows)
+        elif instance_rows:
+            # Column defaults (condition, date_added) are applied as for ORM objects
+            result = self.session.execute(insert(CardInstance.__table__).returning(CardInstance.id), instance_rows)
+            instance_ids = list(result.scalars())
+        else:
+            instance_ids = []
+
+        return {"successes": instance_ids, "failures": failed_lines}
+
+    def _stacks_query(self):
+        """The unallocated CardInstances that new copies may be stacked onto: never edited, never allocated."""
+        return self.session.query(CardInstance).filter(
+            CardInstance.deck_id == None,
+            CardInstance.condition == DEFAULT_CONDITION,
+            CardInstance.purchase_price == None
+        )
+
+    def _add_to_stack(self, printing_id: str, is_foil: bool, quantity: int) -> CardInstance:
+        """Adds copies of a printing to its existing stack, or creates the stack. Does NOT commit."""
+        stack = self._stacks_query().filter(
+            CardInstance.printing_id == printing_id, CardInstance.is_foil == is_foil
+        ).first()
+        if stack is None:
+            stack = CardInstance(printing_id=printing_id, is_foil=is_foil, quantity=quantity)
+            self.session.add(stack)
+        else:
+            stack.quantity += quantity
+        return stack
+
+    def _add_rows_to_stacks(self, instance_rows: List[dict]) -> List[int]:
+        """
+        Set-based `_add_to_stack` for one row per copy: the copies are counted per
+        printing and foil, existing stacks grow with one executemany UPDATE and the
+        new stacks are created with one executemany INSERT.
+        Returns the stack ID of every copy, in the order of `instance_rows`.
+        """
+        if not instance_rows:
+            return []
+        added = Counter((row['printing_id'], row['is_foil']) for row in instance_rows)
+        printing_ids = list({printing_id for printing_id, _ in added})
+        stack_ids = {}
+        for start in range(0, len(printing_ids), IN_QUERY_BATCH_SIZE):
+            chunk = printing_ids[start:start + IN_QUERY_BATCH_SIZE]
+            stacks = self._stacks_query().with_entities(CardInstance.id, CardInstance.printing_id, CardInstance.is_foil)
+            for stack_id, printing_id, is_foil in stacks.filter(CardInstance.printing_id.in_(chunk)):
+                stack_ids.setdefault((printing_id, bool(is_foil)), stack_id)
+
+        table = CardInstance.__table__
+        existing = [key for key in added if key in stack_ids]
+        if existing:
+            self.session.execute(
+                update(table).where(table.c.id == bindparam('stack_id'))
+                .values(quantity=table.c.quantity + bindparam('added')),
+                [{'stack_id': stack_ids[key], 'added': added[key]} for key in existing]
+            )
+            # Stacks already loaded in the session must not keep their old quantity
+            for key in existing:
+                stack = self.session.identity_map.get(identity_key(CardInstance, stack_ids[key]))
+                if stack is not None:
+                    self.session.expire(stack, ['quantity'])
+
+        new = [key for key in added if key not in stack_ids]
+        if new:
+            result = self.session.execute(
+                insert(table).returning(table.c.id, table.c.printing_id, table.c.is_foil, sort_by_parameter_order=True),
+                [{'printing_id': printing_id, 'is_foil': is_foil, 'quantity': added[(printing_id, is_foil)]}
+                 for printing_id, is_foil in new]
+            )
+            for stack_id, printing_id, is_foil in result:
+                stack_ids[(printing_id, bool(is_foil))] = stack_id
+
+        return [stack_ids[(row['printing_id'], row['is_foil'])] for row in instance_rows]
 
     def view_collection_summary(self, filters: dict = None) -> list:
         """
@@ -139,32 +284,35 @@ class CollectionRepository:
         Dynamically applies a dictionary of complex filters.
         Returns a list of tuples:
         (OracleCard object, total_owned, available_count, representative_image_uri)
+
+        The counts are read from the maintained collection_summary table. Only a
+        set code filter, which counts the copies of one set, aggregates the instances.
+        The text filters are answered by the full-text search; with any of them, the
+        best matches (by bm25) come first instead of the alphabetical order.
         """
         if filters is None: filters = {}
 
-        query = (
-            self.session.query(
-                OracleCard,
-                func.count(CardInstance.id).label("total_owned"),
-                func.sum(case((CardInstance.deck_id == None, 1), else_=0)).label("available_count"),
-                # UPDATED: Add an aggregate to get one representative image URI for the group.
-                # MIN() is a simple and effective way to deterministically pick one image.
-                func.min(CardPrinting.image_uri_normal).label("image_uri")
-            )
-            .join(CardPrinting, OracleCard.id == CardPrinting.oracle_card_id)
-            .join(CardInstance, CardPrinting.id == CardInstance.printing_id)
-        )
+        availability = filters.get('availability')
+        if filters.get('set_code'):
+            query = self._instance_summary_query(filters['set_code'], availability)
+        else:
+            query = self._maintained_summary_query(availability)
 
         # --- Dynamic Filter Application ---
-        # (All the filter logic remains exactly the same as before)
-        if filters.get('name'):
-            query = query.filter(OracleCard.name.ilike(f"%{filters['name']}%"))
-
-        if filters.get('type_line'):
-            query = query.filter(OracleCard.type_line.ilike(f"%{filters['type_line']}%"))
-
-        if filters.get('oracle_text'):
-            query = query.filter(OracleCard.oracle_text.ilike(f"%{filters['oracle_text']}%"))
+        order = [OracleCard.name]
+        search = card_search_expression(filters)
+        if search:
+            # Materialized, so SQLite never flattens it into the grouped query of a set
+            # code filter, where bm25() can no longer be evaluated
+            matches = (
+                select(card_search.c.rowid,
+                       func.bm25(literal_column(CARD_SEARCH_TABLE), *CARD_SEARCH_WEIGHTS.values()).label("rank"))
+                .where(literal_column(CARD_SEARCH_TABLE).op('MATCH')(search))
+                .cte("matches")
+                .prefix_with("MATERIALIZED")
+            )
+            query = query.join(matches, matches.c.rowid == literal_column("oracle_cards.rowid"))
+            order.insert(0, matches.c.rank)
 
         cmc_filter = filters.get('cmc')
         if isinstance(cmc_filter, dict) and 'op' in cmc_filter and 'value' in cmc_filter:
@@ -183,28 +331,55 @@ class CollectionRepository:
                 if color not in selected_colors:
                     query = query.filter(OracleCard.color_identity.notlike(f"%{color}%"))
 
-        if filters.get('set_code'):
-            subquery = (
-                self.session.query(CardInstance.id)
-                .join(CardPrinting)
-                .filter(CardPrinting.set_code.ilike(filters['set_code']))
-                .subquery()
+        return query.order_by(*order).all()
+
+    def _maintained_summary_query(self, availability: str = None):
+        """
+        The collection summary read from the collection_summary table. With an
+        availability filter, only the available (or allocated) copies are counted,
+        as if the other copies were not in the collection.
+        """
+        total_owned = CollectionSummary.total_owned
+        available_count = CollectionSummary.available_count
+        if availability == 'Only Available':
+            total_owned = available_count
+        elif availability == 'Only Allocated':
+            total_owned, available_count = total_owned - available_count, literal(0)
+
+        query = (
+            self.session.query(
+                OracleCard,
+                total_owned.label("total_owned"),
+                available_count.label("available_count"),
+                CollectionSummary.image_uri.label("image_uri")
             )
-            query = query.filter(CardInstance.id.in_(subquery))
+            .join(CollectionSummary, OracleCard.id == CollectionSummary.oracle_card_id)
+        )
+        if availability in ('Only Available', 'Only Allocated'):
+            query = query.filter(total_owned > 0)
+        return query
+
+    def _instance_summary_query(self, set_code: str, availability: str = None):
+        """The collection summary aggregated from the instances of the printings of one set."""
+        query = (
+            self.session.query(
+                OracleCard,
+                func.sum(CardInstance.quantity).label("total_owned"),
+                func.sum(case((CardInstance.deck_id == None, CardInstance.quantity), else_=0)).label("available_count"),
+                # MIN() is a simple and effective way to deterministically pick one image.
+                func.min(CardPrinting.image_uri_normal).label("image_uri")
+            )
+            .join(CardPrinting, OracleCard.id == CardPrinting.oracle_card_id)
+            .join(CardInstance, CardPrinting.id == CardInstance.printing_id)
+            .filter(CardPrinting.set_code.ilike(set_code))
+        )
 
-        availability = filters.get('availability')
         if availability == 'Only Available':
             query = query.filter(CardInstance.deck_id == None)
         elif availability == 'Only Allocated':
             query = query.filter(CardInstance.deck_id != None)
 
-        summary = (
-            query
-            .group_by(OracleCard.id)
-            .order_by(OracleCard.name)
-            .all()
-        )
-        return summary
+        return query.group_by(OracleCard.id)
     
     def get_instances_by_oracle_name(self, name: str) -> list:
         """
@@ -218,7 +393,7 @@ class CollectionRepository:
             .join(CardPrinting, CardInstance.printing_id == CardPrinting.id)
             .join(OracleCard, CardPrinting.oracle_card_id == OracleCard.id)
             .outerjoin(Deck, CardInstance.deck_id == Deck.id)
-            .filter(OracleCard.name.ilike(name))
+            .filter(OracleCard.name_folded == fold_name(name))
             .all()
         )
         return query_result
@@ -230,7 +405,7 @@ class CollectionRepository:
         return (
             self.session.query(
                 OracleCard.name,
-                func.count(CardInstance.id).label("quantity")
+                func.sum(CardInstance.quantity).label("quantity")
             )
             .join(CardPrinting, OracleCard.id == CardPrinting.oracle_card_id)
             .join(CardInstance, CardPrinting.id == CardInstance.printing_id)
@@ -241,7 +416,7 @@ class CollectionRepository:
         )
 
     def delete_card_instance(self, instance_id: int) -> bool:
-        """Deletes a single physical card instance from the database."""
+        """Deletes a single physical card instance from the database; for a stack, one of its copies."""
         instance = self.session.get(CardInstance, instance_id)
         if instance:
             # Important check: Do not delete if it's part of an assembled deck.
@@ -251,7 +426,10 @@ class CollectionRepository:
                     deck_name=instance.deck.name
                 )
             
-            self.session.delete(instance)
+            if instance.quantity > 1:
+                instance.quantity -= 1
+            else:
+                self.session.delete(instance)
             print(f"Successfully deleted card instance {instance_id}.")
             return True
         
@@ -259,7 +437,8 @@ class CollectionRepository:
 
     def update_card_instance(self, instance_id: int, update_data: dict) -> CardInstance:
         """
-        Updates attributes of a specific CardInstance.
+        Updates attributes of a specific CardInstance. Editing a stack takes one copy
+        off it first; only that copy is updated and returned.
 
         Args:
             instance_id: The primary key of the CardInstance to update.
@@ -277,6 +456,10 @@ class CollectionRepository:
         if not instance:
             raise CardNotFoundError(identifier=f"Instance ID {instance_id}")
 
+        if instance.quantity > 1:
+            instance = split_copies(self.session, instance, 1)[-1]
+            self.session.flush()
+
         for field, value in update_data.items():
             if field in self.updatable_instance_fields:
                 setattr(instance, field, value)
@@ -284,6 +467,7 @@ class CollectionRepository:
                 # Raise an error to prevent updating protected fields like 'id' or 'printing_id'
                 raise ValueError(f"'{field}' is not an updatable field on CardInstance.")
 
+        self.session.flush()  # The session does not autoflush; refreshing would discard the changes
         self.session.refresh(instance)  # Refresh the object with the latest data from the DB
-        print(f"Successfully updated card instance {instance_id}.")
+        print(f"Successfully updated card instance {instance.id}.")
         return instance
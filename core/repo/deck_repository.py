@@ -3,9 +3,10 @@ from typing import List, Dict
 
 from sqlalchemy.orm import Session, joinedload
 
-from core.exceptions import DeckAssemblyError, CardNotFoundError
+from core.exceptions import DeckAssemblyError
 from core.models import Deck, BlueprintEntry, OracleCard, CardInstance, CardPrinting
 from core.api.scryfall_client import ScryfallClient
+from core.repo.collection_repository import split_copies
 from core.repo.dtos import BlueprintAnalysisItem
 from core.repo.enums import BlueprintCardStatus, DeckStatus
 
@@ -93,39 +94,34 @@ class DeckRepository:
             normalized_name = card_name.title()
             card_quantities[normalized_name] = card_quantities.get(normalized_name, 0) + quantity
 
-        # Step 2: Fetch all relevant data in as few queries as possible
+        # Step 2: Resolve all names at once. Names missing from our DB are looked up
+        # on Scryfall concurrently, within the global rate limit.
         all_card_names = list(card_quantities.keys())
+        oracle_card_map = self.scryfall_client.get_oracle_cards_by_name(all_card_names, fuzzy=True)
 
-        # Find which of these oracle cards and blueprint entries already exist
-        oracle_cards_found = self.session.query(OracleCard).filter(OracleCard.name.in_(all_card_names)).all()
-        oracle_card_map = {card.name: card for card in oracle_cards_found}
-
+        # Entries are keyed by Oracle ID, as a fuzzy lookup may resolve a name to a card with a different name
         existing_entries = self.session.query(BlueprintEntry).filter(
             BlueprintEntry.deck_id == deck_id,
-            BlueprintEntry.oracle_card_id.in_([c.id for c in oracle_cards_found])
+            BlueprintEntry.oracle_card_id.in_([card.id for card in oracle_card_map.values()])
         ).all()
-        existing_entry_map = {entry.oracle_card.name: entry for entry in existing_entries}
+        entry_map = {entry.oracle_card_id: entry for entry in existing_entries}
 
         # Step 3: Process the aggregated list
         for name, quantity in card_quantities.items():
-            # Find the OracleCard, fetching from Scryfall if not in our DB yet
             oracle_card = oracle_card_map.get(name)
             if not oracle_card:
-                try:
-                    oracle_card = self.scryfall_client.get_oracle_card_by_name(name)
-                    if not oracle_card: raise CardNotFoundError(name)
-                except CardNotFoundError:
-                    print(f"Skipping line due to error: Card not found for '{name}'")
-                    failed_lines.append(name)
-                    continue
+                print(f"Skipping line due to error: Card not found for '{name}'")
+                failed_lines.append(name)
+                continue
 
             # Check if an entry for this card already exists in the deck
-            if name in existing_entry_map:
-                existing_entry_map[name].quantity += quantity
-                print(f"Prepared update for '{name}' to total quantity {existing_entry_map[name].quantity}.")
+            if oracle_card.id in entry_map:
+                entry_map[oracle_card.id].quantity += quantity
+                print(f"Prepared update for '{name}' to total quantity {entry_map[oracle_card.id].quantity}.")
             else:
                 new_entry = BlueprintEntry(deck_id=deck_id, oracle_card_id=oracle_card.id, quantity=quantity)
                 self.session.add(new_entry)
+                entry_map[oracle_card.id] = new_entry
                 print(f"Prepared addition of {quantity}x '{name}'.")
 
         return {"failures": failed_lines}
@@ -153,6 +149,7 @@ class DeckRepository:
     def validate_assembly_choices(self, deck_id: int, chosen_instance_ids: List[int]) -> bool:
         """
         Validates if the user's chosen CardInstances are sufficient and valid for a blueprint.
+        The ID of a stack may be chosen once per copy it holds.
 
         Raises:
             DeckAssemblyError: If validation fails for any reason.
@@ -171,22 +168,26 @@ class DeckRepository:
         blueprint_needs = {entry.oracle_card_id: entry.quantity for entry in deck.blueprint_entries}
 
         # 2. Get the chosen physical cards (what we have)
+        copies_chosen = Counter(chosen_instance_ids)
         chosen_instances = self.session.query(CardInstance).options(joinedload(CardInstance.printing)).filter(
-            CardInstance.id.in_(chosen_instance_ids)
+            CardInstance.id.in_(copies_chosen)
         ).all()
 
         # 3. Check for invalid or already-allocated instances
-        if len(chosen_instances) != len(chosen_instance_ids):
+        if len(chosen_instances) != len(copies_chosen):
             raise DeckAssemblyError("One or more selected card instance IDs are invalid.")
 
         for inst in chosen_instances:
             if inst.deck_id is not None:
                 raise DeckAssemblyError(
                     f"Card '{inst.printing.oracle_card.name}' (ID: {inst.id}) is already in another deck.")
+            if copies_chosen[inst.id] > inst.quantity:
+                raise DeckAssemblyError("One or more selected card instance IDs are invalid.")
 
         # 4. Count the Oracle IDs of the chosen cards and compare with the blueprint
-        chosen_oracle_ids = [inst.printing.oracle_card_id for inst in chosen_instances]
-        chosen_counts = Counter(chosen_oracle_ids)
+        chosen_counts = Counter()
+        for inst in chosen_instances:
+            chosen_counts[inst.printing.oracle_card_id] += copies_chosen[inst.id]
 
         for oracle_id, needed_qty in blueprint_needs.items():
             if chosen_counts.get(oracle_id, 0) < needed_qty:
@@ -214,10 +215,11 @@ class DeckRepository:
                 # Raise an error instead of returning False to ensure transaction rollback
                 raise DeckAssemblyError(f"Deck {deck_id} is not a valid blueprint.")
 
-            # Assign instances...
-            self.session.query(CardInstance).filter(
-                CardInstance.id.in_(chosen_instance_ids)
-            ).update({"deck_id": deck_id}, synchronize_session=False)
+            # Assign instances... Copies taken from a stack get a row of their own.
+            copies_chosen = Counter(chosen_instance_ids)
+            for instance in self.session.query(CardInstance).filter(CardInstance.id.in_(copies_chosen)):
+                for copy in split_copies(self.session, instance, copies_chosen[instance.id]):
+                    copy.deck_id = deck_id
 
             # Delete blueprint...
             self.session.query(BlueprintEntry).filter_by(deck_id=deck_id).delete(synchronize_session=False)
@@ -241,7 +243,7 @@ class DeckRepository:
         card_counts = {}
         for instance in deck.cards:
             oracle_id = instance.printing.oracle_card_id
-            card_counts[oracle_id] = card_counts.get(oracle_id, 0) + 1
+            card_counts[oracle_id] = card_counts.get(oracle_id, 0) + instance.quantity
             instance.deck_id = None # Free the card instance
 
         for oracle_id, quantity in card_counts.items():
@@ -301,7 +303,8 @@ class DeckRepository:
             self.session.query(
                 CardPrinting.oracle_card_id,
                 CardInstance.deck_id,
-                Deck.name.label("deck_name")  # Get the deck name if it exists
+                Deck.name.label("deck_name"),  # Get the deck name if it exists
+                CardInstance.quantity
             )
             .join(CardInstance, CardPrinting.id == CardInstance.printing_id)
             .outerjoin(Deck, CardInstance.deck_id == Deck.id)
@@ -316,10 +319,10 @@ class DeckRepository:
             for oracle_id in all_required_oracle_ids
         }
 
-        for oracle_id, deck_id, deck_name in owned_instances:
-            collection_state[oracle_id]["total"] += 1
+        for oracle_id, deck_id, deck_name, quantity in owned_instances:
+            collection_state[oracle_id]["total"] += quantity
             if deck_id is None:
-                collection_state[oracle_id]["available"] += 1
+                collection_state[oracle_id]["available"] += quantity
             else:
                 # Add deck name to the list if it's not already there
                 if deck_name not in collection_state[oracle_id]["allocations"]:
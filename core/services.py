@@ -3,11 +3,13 @@ from typing import List, Dict, Optional
 
 import pyperclip
 from sqlalchemy import func
+from sqlalchemy.orm import Session
 
 from .exceptions import InvalidInputFormatError, CardNotFoundError, CoreLogicError, DeckAssemblyError
 from .models import SessionLocal
 from .models import CardPrinting, CardInstance, Deck  # Add missing imports
 from .repo.enums import DeckStatus, BlueprintCardStatus
+from core.api.response_cache import ResponseCache
 from core.api.scryfall_client import ScryfallClient
 from core.repo.collection_repository import CollectionRepository
 from core.repo.deck_repository import DeckRepository
@@ -16,14 +18,36 @@ from .repo.dtos import BlueprintAnalysisItem, AssemblyChoiceDTO, AssemblyOptionD
 
 
 class MagicCardService:
-    def __init__(self):
+    def __init__(self, offline: bool = False, db_session: Session | None = None,
+                 scryfall_client: ScryfallClient | None = None, stack_copies: bool = False,
+                 prefetch: bool = False):
         """
         Initializes the service and all its underlying components.
         This class is the single entry point for the UI.
+
+        With `offline`, cards are only ever looked up in the local catalog (see the
+        bulk importer); Scryfall is never contacted and unknown cards fail immediately.
+
+        A session and a client can be passed in to run the service against another
+        database or API, e.g. a temporary database and a local stand-in in tests.
+
+        With `stack_copies`, identical unallocated copies of a card are stored as one
+        row with a quantity (useful for large bulk collections); every method behaves
+        the same either way.
+
+        With `prefetch`, the rest of a set the user adds cards from is fetched in the
+        background (never offline). It only applies to the client the service creates.
         """
-        self.db_session = SessionLocal()
-        self.scryfall_client = ScryfallClient(db_session=self.db_session)
-        self.collection_repo = CollectionRepository(db_session=self.db_session, scryfall_client=self.scryfall_client)
+        self.db_session = db_session or SessionLocal()
+        self.scryfall_client = scryfall_client or ScryfallClient(
+            db_session=self.db_session,
+            offline=offline,
+            # Repeated single-card lookups are answered from disk instead of the network
+            response_cache=None if offline else ResponseCache(),
+            prefetch=prefetch
+        )
+        self.collection_repo = CollectionRepository(db_session=self.db_session, scryfall_client=self.scryfall_client,
+                                                    stack_copies=stack_copies)
         self.deck_repo = DeckRepository(db_session=self.db_session, scryfall_client=self.scryfall_client)
         print("MagicCardService initialized.")
 
@@ -134,7 +158,9 @@ class MagicCardService:
         return results
 
     def close_session(self):
-        """Closes the database session. Should be called on application exit."""
+        """Stops the background prefetching and closes the database session. Should be called on application exit."""
+        print(f"Card lookup cache: {self.scryfall_client.lookup_cache}")
+        self.scryfall_client.close()
         self.db_session.close()
 
     def get_instances_for_oracle_card(self, name: str) -> List[CardInstanceDetailDTO]:
@@ -150,7 +176,8 @@ class MagicCardService:
             if deck:
                 status = f"⚠️ In '{deck.name}'"
 
-            instances_data.append(CardInstanceDetailDTO(
+            # A stack stands for several identical copies; each is listed under the stack's ID
+            instances_data.extend(CardInstanceDetailDTO(
                 instance_id=instance.id,
                 oracle_id=oracle.id,
                 card_name=oracle.name,
@@ -161,7 +188,7 @@ class MagicCardService:
                 purchase_price=instance.purchase_price,
                 date_added=instance.date_added.isoformat(),
                 status=status
-            ))
+            ) for _ in range(instance.quantity))
 
         return instances_data
     
@@ -260,21 +287,25 @@ class MagicCardService:
             self.db_session.rollback()
             return False
 
-    def export_buy_list(self, deck_id: int):
-        """Generates a buy list for a deck and copies it to the clipboard."""
+    def export_buy_list(self, deck_id: int) -> str:
+        """Generates a buy list for a deck, copies it to the clipboard and returns it."""
         analysis = self.get_deck_blueprint_analysis(deck_id)
         buy_list = []
         for card in analysis:
-            if card['status'] in ['MISSING', 'PARTIAL']:
-                to_buy = card['quantity'] - card['owned']
-                buy_list.append(f"{to_buy} {card['card_name']}")
+            if card.status in [BlueprintCardStatus.MISSING, BlueprintCardStatus.PARTIALLY_OWNED]:
+                to_buy = card.quantity_needed - card.total_owned
+                buy_list.append(f"{to_buy} {card.card_name}")
         
+        buy_list_str = "\n".join(buy_list)
         if buy_list:
-            buy_list_str = "\n".join(buy_list)
-            pyperclip.copy(buy_list_str)
-            print("Buy list copied to clipboard.")
+            try:
+                pyperclip.copy(buy_list_str)
+                print("Buy list copied to clipboard.")
+            except pyperclip.PyperclipException as e:
+                print(f"Error: Could not copy to clipboard. Is a clipboard tool installed? Error: {e}")
         else:
             print("No cards to buy for this deck.")    
+        return buy_list_str
 
     def get_assembly_options(self, deck_id: int) -> list:
         """
@@ -302,10 +333,11 @@ class MagicCardService:
                 foil_str = ' (Foil)' if inst.is_foil else ''
                 display = (f"{inst.printing.set_code.upper()} #{inst.printing.collector_number}{foil_str}"
                            f" - {inst.condition}")
-                instance_choices.append(AssemblyChoiceDTO(
+                # Every copy of a stack can be chosen, under the stack's ID
+                instance_choices.extend(AssemblyChoiceDTO(
                     instance_id=inst.id,
                     display_text=display
-                ))
+                ) for _ in range(inst.quantity))
 
             options.append(AssemblyOptionDTO(
                 oracle_card_id=card.oracle_card_id,
@@ -381,7 +413,7 @@ class MagicCardService:
     def get_assembled_deck_contents(self, deck_id: int) -> List[AssembledDeckCardDTO]:
         """Returns a UI-friendly list of cards in an assembled deck."""
         results = self.collection_repo.get_assembled_deck_contents(deck_id)
-        return [AssembledDeckCardDTO(name=name, quantity=qty) for name, qty in results]
+        return [AssembledDeckCardDTO(card_name=name, quantity=qty) for name, qty in results]
 
     def add_cards_to_blueprint_from_list(self, deck_id: int, card_list_string: str) -> dict:
         """
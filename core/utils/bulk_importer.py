@@ -1,11 +1,27 @@
+import argparse
 import requests
+import gzip
+import hashlib
 import json
 import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Iterator, TextIO
 
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Index, bindparam, create_engine, insert, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
 from tqdm import tqdm  # A library for progress bars. Install with: pip install tqdm
 
 # We need to configure the path to import from the parent `core` directory
@@ -14,7 +30,9 @@ import sys
 # This adds the project root to the Python path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from core.models import engine, OracleCard, CardPrinting
+from core.api.lookup_cache import invalidate_lookup_caches
+from core.models import engine, Base, OracleCard, CardPrinting, fold_name, rebuild_collection_summary
+from core.utils.database_setup import IN_QUERY_BATCH_SIZE, existing_index_names, upgrade_database
 
 # --- Configuration ---
 
@@ -23,17 +41,51 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Scryfall API endpoint for bulk data information
 BULK_DATA_API_URL = "https://api.scryfall.com/bulk-data"
 
-# Directory to store the downloaded JSON files temporarily
-DOWNLOAD_DIR = Path(__file__).parent / "temp_bulk_data"
+# Directory where downloaded bulk files are cached (gzip-compressed) between imports,
+# together with a manifest describing which version of each file is on disk.
+DOWNLOAD_DIR = Path(__file__).parent / "bulk_data_cache"
 
-# Create a sessionmaker for database operations
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Size of the blocks written to disk while downloading a bulk file
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 
+# How many times an interrupted download is resumed before giving up
+DOWNLOAD_ATTEMPTS = 3
 
-def _get_bulk_data_url(data_type: str) -> str:
+# Number of characters read from a bulk file per step when streaming it
+STREAM_READ_SIZE = 1024 * 1024  # 1MB
+
+# Number of cards mapped and inserted per batch. This bounds the memory used by
+# the importer, independently of the size of the bulk file.
+IMPORT_BATCH_SIZE = 5000
+
+# Number of mapped batches buffered between the stages of the pipelined importer
+PIPELINE_QUEUE_SIZE = 8
+
+# SQLite settings applied only while an import runs. They trade crash safety for
+# speed, which is acceptable because an interrupted import can simply be re-run.
+IMPORT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'OFF',
+    'cache_size': -256 * 1024,  # Negative values are in KiB, i.e. 256MB
+    'temp_store': 'MEMORY',
+}
+
+# Settings for building a shadow catalog. The shadow file is thrown away if the
+# build fails, so it needs no journal and no durability guarantees at all.
+SHADOW_BUILD_PRAGMAS = {
+    'journal_mode': 'OFF',
+    'synchronous': 'OFF',
+    'locking_mode': 'EXCLUSIVE',
+    'cache_size': -256 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def _get_bulk_data_entry(data_type: str) -> Dict[str, Any]:
     """
-    Fetches the Scryfall bulk data manifest and returns the download URL
-    for the specified data type (e.g., 'oracle_cards', 'default_cards').
+    Fetches the Scryfall bulk data manifest and returns the entry for the
+    specified data type (e.g., 'oracle_cards', 'default_cards'). The entry
+    contains the 'download_uri' as well as 'updated_at' and 'size'.
     """
     logging.info(f"Fetching bulk data manifest to find '{data_type}'...")
     try:
@@ -43,9 +95,8 @@ def _get_bulk_data_url(data_type: str) -> str:
 
         for item in all_bulk_data:
             if item.get("type") == data_type:
-                url = item["download_uri"]
                 logging.info(f"Found download URL for '{data_type}'.")
-                return url
+                return item
 
         raise RuntimeError(f"Could not find bulk data of type '{data_type}' in the manifest.")
     except requests.RequestException as e:
@@ -53,45 +104,240 @@ def _get_bulk_data_url(data_type: str) -> str:
         raise
 
 
-def _download_file(url: str, dest_path: Path) -> None:
+def _load_manifest() -> Dict[str, Any]:
+    """Reads the manifest of cached bulk files. A missing or corrupt manifest is treated as empty."""
+    manifest_path = DOWNLOAD_DIR / "manifest.json"
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest: Dict[str, Any]) -> None:
+    """Atomically writes the manifest of cached bulk files."""
+    DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    manifest_path = DOWNLOAD_DIR / "manifest.json"
+    temp_path = manifest_path.with_suffix('.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, manifest_path)
+
+
+def _download_file(url: str, dest_path: Path, etag: str | None = None) -> str | None:
     """
     Downloads a large file from a URL to a destination path with a progress bar.
+
+    If `dest_path` already holds the beginning of the file from an interrupted
+    download, the transfer resumes from there with an HTTP Range request. The
+    `etag` of the partial file is sent as If-Range, so the server restarts the
+    transfer from scratch if the file changed in the meantime.
+
+    Returns the ETag of the downloaded file, if the server provided one.
     """
     logging.info(f"Downloading data from {url} to {dest_path}...")
     dest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Ask for the uncompressed representation so byte offsets stay valid for Range requests
+    headers = {'Accept-Encoding': 'identity'}
+    offset = dest_path.stat().st_size if dest_path.exists() else 0
+    if offset and etag:
+        headers['Range'] = f"bytes={offset}-"
+        headers['If-Range'] = etag
+
     try:
-        with requests.get(url, stream=True) as r:
+        with requests.get(url, headers=headers, stream=True) as r:
             r.raise_for_status()
-            total_size_in_bytes = int(r.headers.get('content-length', 0))
-            block_size = 8192  # 8KB
+            if r.status_code == 206:
+                logging.info(f"Resuming download of {dest_path.name} at byte {offset}.")
+                mode = 'ab'
+            else:
+                offset = 0
+                mode = 'wb'
+            total_size_in_bytes = offset + int(r.headers.get('content-length', 0))
 
-            progress_bar = tqdm(total=total_size_in_bytes, unit='iB', unit_scale=True, desc=dest_path.name)
-            with open(dest_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=block_size):
+            progress_bar = tqdm(total=total_size_in_bytes, initial=offset, unit='iB', unit_scale=True,
+                                desc=dest_path.name)
+            with open(dest_path, mode) as f:
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                     progress_bar.update(len(chunk))
                     f.write(chunk)
             progress_bar.close()
 
-            if total_size_in_bytes != 0 and progress_bar.n != total_size_in_bytes:
+            if total_size_in_bytes != offset and progress_bar.n != total_size_in_bytes:
                 raise RuntimeError("Download failed: Incomplete file.")
         logging.info(f"Successfully downloaded {dest_path.name}.")
+        return r.headers.get('ETag')
     except requests.RequestException as e:
         logging.error(f"Failed to download file: {e}")
         raise
 
-def _prepare_data_for_bulk_insert(card_data: List[Dict[str, Any]], model_type: str) -> List[Dict[str, Any]]:
+
+def _compress_file(source_path: Path, dest_path: Path) -> None:
+    """Gzip-compresses a downloaded file into place and deletes the original."""
+    logging.info(f"Compressing {source_path.name} for reuse by later imports...")
+    temp_path = dest_path.with_suffix('.tmp')
+    with open(source_path, 'rb') as source, gzip.open(temp_path, 'wb', compresslevel=6) as dest:
+        shutil.copyfileobj(source, dest, DOWNLOAD_CHUNK_SIZE)
+    os.replace(temp_path, dest_path)
+    source_path.unlink()
+
+
+def _head_etag(url: str) -> str | None:
+    """Returns the current ETag of a remote file, or None if it cannot be determined."""
+    try:
+        response = requests.head(url, headers={'Accept-Encoding': 'identity'}, allow_redirects=True)
+        response.raise_for_status()
+        return response.headers.get('ETag')
+    except requests.RequestException:
+        return None
+
+
+def _fetch_bulk_file(data_type: str) -> Path:
+    """
+    Returns the path of a gzip-compressed, up-to-date copy of a Scryfall bulk file.
+
+    The manifest in DOWNLOAD_DIR records the 'updated_at', 'size' and ETag of each
+    cached file. The download is skipped entirely when the bulk data endpoint still
+    reports the same version (or the file still has the same ETag), and interrupted
+    downloads are resumed instead of restarted, both within a run and across runs.
+    """
+    entry = _get_bulk_data_entry(data_type)
+    download_uri = entry['download_uri']
+    manifest = _load_manifest()
+    cached = manifest.get(data_type, {})
+    cached_path = DOWNLOAD_DIR / f"{data_type}.json.gz"
+    partial_path = DOWNLOAD_DIR / f"{data_type}.json.part"
+
+    version = {'download_uri': download_uri, 'updated_at': entry.get('updated_at'), 'size': entry.get('size')}
+    if cached_path.exists() and all(cached.get(key) == value for key, value in version.items()):
+        logging.info(f"Cached '{data_type}' file is up to date; skipping download.")
+        return cached_path
+
+    remote_etag = _head_etag(download_uri)
+    if cached_path.exists() and remote_etag and cached.get('etag') == remote_etag:
+        logging.info(f"Cached '{data_type}' file has the same ETag; skipping download.")
+        manifest[data_type] = {**version, 'etag': remote_etag}
+        _save_manifest(manifest)
+        return cached_path
+
+    # A partial file can only be resumed if it is known to belong to the same remote file
+    partial = cached.get('partial', {})
+    resumable = remote_etag and partial == {'download_uri': download_uri, 'etag': remote_etag}
+    if partial_path.exists() and not resumable:
+        partial_path.unlink()
+
+    # Record the partial download before starting, so a later run can resume it
+    manifest[data_type] = {**cached, 'partial': {'download_uri': download_uri, 'etag': remote_etag}}
+    _save_manifest(manifest)
+
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        try:
+            etag = _download_file(download_uri, partial_path, etag=remote_etag) or remote_etag
+            break
+        except (requests.RequestException, RuntimeError) as e:
+            if attempt == DOWNLOAD_ATTEMPTS:
+                raise
+            logging.warning(f"Download attempt {attempt} of '{data_type}' failed ({e}); resuming...")
+
+    _compress_file(partial_path, cached_path)
+    manifest[data_type] = {**version, 'etag': etag}
+    _save_manifest(manifest)
+    return cached_path
+
+
+def _open_bulk_file(file_path: Path) -> TextIO:
+    """Opens a bulk file for reading as text, transparently decompressing cached copies."""
+    if file_path.suffix == '.gz':
+        return gzip.open(file_path, 'rt', encoding='utf-8')
+    return open(file_path, 'r', encoding='utf-8')
+
+
+def _iter_json_array(file_path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yields the elements of a file containing a single top-level JSON array.
+
+    Only a small window of the file is held in memory at any time, so peak memory
+    stays flat no matter how large the bulk file is.
+    """
+    decoder = json.JSONDecoder()
+    with _open_bulk_file(file_path) as f:
+        buffer = f.read(STREAM_READ_SIZE)
+        position = 0
+        at_eof = not buffer
+        started = False
+
+        while True:
+            # Skip whitespace and element separators between two array elements
+            while position < len(buffer) and (buffer[position].isspace() or (started and buffer[position] == ',')):
+                position += 1
+
+            if position >= len(buffer):
+                if at_eof:
+                    raise ValueError(f"Unexpected end of file while reading '{file_path.name}'.")
+                buffer = f.read(STREAM_READ_SIZE)
+                position = 0
+                at_eof = not buffer
+                continue
+
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError(f"'{file_path.name}' does not contain a JSON array.")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == ']':
+                return
+
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element is cut off at the end of the window; read more and retry.
+                if at_eof:
+                    raise
+                chunk = f.read(STREAM_READ_SIZE)
+                at_eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            yield element
+            position = end
+
+            # Drop the consumed part of the window so it does not grow without bound
+            if position > STREAM_READ_SIZE:
+                buffer = buffer[position:]
+                position = 0
+
+
+def _iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Groups an iterable into lists of at most `batch_size` items."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _prepare_data_for_bulk_insert(card_data: Iterable[Dict[str, Any]], model_type: str,
+                                  seen_names: set | None = None) -> List[Dict[str, Any]]:
     """
     Transforms the raw Scryfall JSON data for a list of cards into a list of
     dictionaries that match our database model schemas.
 
     UPDATED: This function now de-duplicates data to prevent UNIQUE constraint errors.
+    When the data is processed in chunks, pass the same `seen_names` set for every
+    chunk so that Oracle cards are de-duplicated across the whole file.
     """
     mappings = []
 
     if model_type == 'oracle':
         # Use a set for highly efficient tracking of names we've already processed
-        seen_names = set()
-        for card in tqdm(card_data, desc="Deduplicating Oracle Cards"):
+        if seen_names is None:
+            seen_names = set()
+        for card in card_data:
             name = card.get('name')
             # Skip non-game cards, cards without names, or names we've already added
             if 'oracle_id' not in card or not name or name in seen_names:
@@ -100,6 +346,7 @@ def _prepare_data_for_bulk_insert(card_data: List[Dict[str, Any]], model_type: s
             mappings.append({
                 'id': card['oracle_id'],
                 'name': name,
+                'name_folded': fold_name(name),
                 'mana_cost': card.get('mana_cost'),
                 'cmc': card.get('cmc', 0.0),
                 'color_identity': "".join(card.get('color_identity', [])),
@@ -133,100 +380,788 @@ def _prepare_data_for_bulk_insert(card_data: List[Dict[str, Any]], model_type: s
     return mappings
 
 
-def run_bulk_import():
+@dataclass
+class StageStats:
+    """The amount of work done by one stage of the pipelined importer, and how long it took."""
+    stage: str
+    unit: str = 'rows'
+    amount: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.amount / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.stage}: {self.amount} {self.unit} in {self.seconds:.2f}s "
+                f"({self.throughput:,.0f} {self.unit}/s)")
+
+
+def _strip_array_punctuation(line: str) -> str:
+    """Strips the whitespace, array brackets and separators around a record line."""
+    return line.strip().lstrip('[').strip().rstrip(',]').strip()
+
+
+def _is_single_record(line: str) -> bool:
+    try:
+        return isinstance(json.loads(line), dict)
+    except json.JSONDecodeError:
+        return False
+
+
+def _iter_record_batches(file_path: Path, batch_size: int) -> Iterator[List[str | Dict[str, Any]]]:
     """
-    Orchestrates the entire bulk import process:
-    1. Clears existing card data.
-    2. Downloads Oracle and Default card files from Scryfall.
-    3. Processes and inserts the data into the database.
-    4. Cleans up downloaded files.
+    Splits a bulk file into batches of records without decoding them, so that
+    decoding can be spread over several processes.
+
+    Scryfall writes its bulk files with one card per line, which makes finding the
+    record boundaries almost free; the first record is decoded to confirm the file
+    uses that layout. Files in any other layout fall back to
+    `_iter_json_array`, in which case the batches hold already decoded cards.
+    """
+    with _open_bulk_file(file_path) as f:
+        first_record = None
+        for line in f:
+            first_record = _strip_array_punctuation(line)
+            if first_record:
+                break
+
+        if not first_record:
+            return
+
+        if _is_single_record(first_record):
+            def records():
+                yield first_record
+                for next_line in f:
+                    record = _strip_array_punctuation(next_line)
+                    if record:
+                        yield record
+
+            yield from _iter_batches(records(), batch_size)
+            return
+
+    yield from _iter_batches(_iter_json_array(file_path), batch_size)
+
+
+def _decode_records(records: List[str | Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Decodes the raw records produced by `_iter_record_batches`."""
+    cards = []
+    for record in records:
+        if not isinstance(record, str):
+            cards.append(record)
+            continue
+        try:
+            cards.append(json.loads(record))
+        except json.JSONDecodeError:
+            # Several records on one line, e.g. '{...}, {...}'
+            cards.extend(json.loads(f"[{record}]"))
+    return cards
+
+
+def _map_batch(records: List[str | Dict[str, Any]], model_type: str) -> tuple[List[Dict[str, Any]], float]:
+    """Process pool task: decodes and maps one batch of records and reports the CPU time it took."""
+    started = time.perf_counter()
+    mappings = _prepare_data_for_bulk_insert(_decode_records(records), model_type)
+    return mappings, time.perf_counter() - started
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # 'spawn' avoids forking a process whose other threads (tqdm, the pipeline) may hold locks
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _iter_mapping_batches(file_path: Path, model_type: str, workers: int = 1,
+                          parse_stats: StageStats | None = None, map_stats: StageStats | None = None,
+                          pool: ProcessPoolExecutor | None = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yields the mappings of a bulk file batch by batch, in file order.
+
+    With more than one worker, the file is split into record batches which are
+    decoded and mapped on a process pool, and the results are merged back in file
+    order. Oracle cards are then de-duplicated by name across batches, so the
+    output is identical to a sequential run. Optional StageStats collect the time
+    spent splitting the file (parse) and decoding and mapping it (map).
+    """
+    parse_stats = parse_stats or StageStats('parse')
+    map_stats = map_stats or StageStats('map')
+    seen_names = set()
+
+    if workers <= 1:
+        batches = _iter_batches(_iter_json_array(file_path), IMPORT_BATCH_SIZE)
+        while True:
+            started = time.perf_counter()
+            batch = next(batches, None)
+            parse_stats.seconds += time.perf_counter() - started
+            if batch is None:
+                return
+            parse_stats.amount += len(batch)
+
+            started = time.perf_counter()
+            mappings = _prepare_data_for_bulk_insert(batch, model_type, seen_names=seen_names)
+            map_stats.seconds += time.perf_counter() - started
+            map_stats.amount += len(mappings)
+            yield mappings
+
+    def merge(future) -> List[Dict[str, Any]]:
+        mappings, cpu_seconds = future.result()
+        map_stats.seconds += cpu_seconds / workers
+        map_stats.amount += len(mappings)
+        if model_type == 'oracle':
+            mappings = [mapping for mapping in mappings if mapping['name'] not in seen_names]
+            seen_names.update(mapping['name'] for mapping in mappings)
+        return mappings
+
+    owns_pool = pool is None
+    pool = pool or _process_pool(workers)
+    in_flight = deque()
+    try:
+        batches = _iter_record_batches(file_path, IMPORT_BATCH_SIZE)
+        while True:
+            started = time.perf_counter()
+            batch = next(batches, None)
+            parse_stats.seconds += time.perf_counter() - started
+            if batch is None:
+                break
+            parse_stats.amount += len(batch)
+
+            in_flight.append(pool.submit(_map_batch, batch, model_type))
+            # Bound the number of batches in memory at once
+            if len(in_flight) > workers * 2:
+                yield merge(in_flight.popleft())
+
+        while in_flight:
+            yield merge(in_flight.popleft())
+    finally:
+        for future in in_flight:
+            future.cancel()
+        if owns_pool:
+            pool.shutdown()
+
+
+@dataclass
+class ImportReport:
+    """Summarizes how the rows of one catalog table were affected by an import."""
+    table: str
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def __str__(self):
+        return (f"{self.table}: {self.inserted} inserted, {self.updated} updated, "
+                f"{self.unchanged} unchanged")
+
+
+def _content_hash(mapping: Dict[str, Any]) -> str:
+    """Returns a stable hash of a prepared mapping, used to detect changed rows."""
+    payload = json.dumps(mapping, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _upsert_mappings(db_session: Session, model, mappings: List[Dict[str, Any]], report: ImportReport) -> None:
+    """
+    Writes a batch of prepared mappings with INSERT ... ON CONFLICT DO UPDATE.
+    Rows whose stored content hash matches the incoming data are skipped entirely.
+    This method does NOT commit.
+    """
+    if not mappings:
+        return
+
+    for mapping in mappings:
+        mapping['content_hash'] = _content_hash(mapping)
+
+    # Fetch the stored hashes for this batch only, so memory stays bounded
+    ids = [mapping['id'] for mapping in mappings]
+    stored_hashes = {}
+    for start in range(0, len(ids), IN_QUERY_BATCH_SIZE):
+        stored_hashes.update(
+            db_session.query(model.id, model.content_hash)
+            .filter(model.id.in_(ids[start:start + IN_QUERY_BATCH_SIZE]))
+            .all()
+        )
+
+    changed = []
+    for mapping in mappings:
+        if mapping['id'] not in stored_hashes:
+            report.inserted += 1
+            changed.append(mapping)
+        elif stored_hashes[mapping['id']] != mapping['content_hash']:
+            report.updated += 1
+            changed.append(mapping)
+        else:
+            report.unchanged += 1
+
+    if not changed:
+        return
+
+    table = model.__table__
+    statement = sqlite_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={column: statement.excluded[column] for column in changed[0] if column != 'id'}
+    )
+    db_session.execute(statement, changed)
+
+
+def _insert_mappings(db_session: Session, model, mappings: List[Dict[str, Any]], report: ImportReport) -> None:
+    """
+    Fast path for loading an empty table: a plain Core INSERT executed with
+    executemany, without hash lookups, conflict handling or the ORM unit of work.
+    This method does NOT commit.
+    """
+    if not mappings:
+        return
+
+    for mapping in mappings:
+        mapping['content_hash'] = _content_hash(mapping)
+    db_session.execute(insert(model.__table__), mappings)
+    report.inserted += len(mappings)
+
+
+def _apply_pragmas(connection: Connection, pragmas: Dict[str, Any]) -> None:
+    # Settings such as journal_mode cannot be changed inside a transaction
+    connection.commit()
+    for name, value in pragmas.items():
+        connection.exec_driver_sql(f"PRAGMA {name} = {value}")
+    connection.commit()
+
+
+@contextmanager
+def _import_pragmas(connection: Connection) -> Iterator[None]:
+    """Applies IMPORT_PRAGMAS to a connection and restores the previous settings afterwards."""
+    previous = {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in IMPORT_PRAGMAS}
+    _apply_pragmas(connection, IMPORT_PRAGMAS)
+    try:
+        yield
+    finally:
+        _apply_pragmas(connection, previous)
+
+
+def _drop_secondary_indexes(connection: Connection, models) -> List[Index]:
+    """
+    Drops the non-unique indexes of the given tables, so a bulk load does not have
+    to maintain them row by row. Returns the dropped indexes for `_rebuild_indexes`.
+    Unique indexes are kept, as they still guard the data while it is loaded.
+    """
+    dropped = []
+    for model in models:
+        existing = existing_index_names(connection, model.__tablename__)
+        for index in model.__table__.indexes:
+            if not index.unique and index.name in existing:
+                index.drop(bind=connection)
+                dropped.append(index)
+    connection.commit()
+    return dropped
+
+
+def _rebuild_indexes(connection: Connection, indexes: List[Index]) -> None:
+    """Re-creates indexes dropped by `_drop_secondary_indexes`, in a single pass per index."""
+    for index in indexes:
+        logging.info(f"Rebuilding index '{index.name}'...")
+        index.create(bind=connection)
+    connection.commit()
+
+
+def _catalog_is_empty(db_session: Session) -> bool:
+    return db_session.query(OracleCard.id).first() is None and db_session.query(CardPrinting.id).first() is None
+
+
+@contextmanager
+def _catalog_writer(full_refresh: bool = False) -> Iterator[tuple[Session, Callable]]:
+    """
+    Opens a session for writing the card catalog, with IMPORT_PRAGMAS applied for
+    as long as the session is in use. Yields the session and the function to write
+    batches of mappings with.
+
+    When the catalog is empty (always the case after a full refresh), the batches
+    are bulk loaded with `_insert_mappings`, and the secondary indexes are dropped
+    for the duration of the load and rebuilt at the end. Otherwise the batches are
+    upserted incrementally with `_upsert_mappings`.
+    """
+    with engine.connect() as connection, _import_pragmas(connection):
+        db_session = Session(bind=connection, autoflush=False)
+        dropped_indexes = []
+        try:
+            if full_refresh:
+                _clear_catalog(db_session)
+
+            if _catalog_is_empty(db_session):
+                db_session.commit()
+                logging.info("The catalog is empty; bulk loading it with secondary indexes dropped.")
+                dropped_indexes = _drop_secondary_indexes(connection, (OracleCard, CardPrinting))
+                yield db_session, _insert_mappings
+            else:
+                yield db_session, _upsert_mappings
+        finally:
+            db_session.close()
+            _rebuild_indexes(connection, dropped_indexes)
+            # The owned printings' images may have changed
+            rebuild_collection_summary(connection)
+            connection.commit()
+            # Cached lookups may point at rows that were just deleted or replaced
+            invalidate_lookup_caches()
+
+
+def _import_file_in_batches(db_session: Session, file_path: Path, model_type: str,
+                            write: Callable = _upsert_mappings, workers: int = 1) -> ImportReport:
+    """
+    Streams a bulk file and writes its cards in batches of IMPORT_BATCH_SIZE.
+    By default only new or changed cards are upserted, and the cards are mapped
+    in this process; see `_iter_mapping_batches` for `workers`.
+    This method does NOT commit.
+    """
+    model = OracleCard if model_type == 'oracle' else CardPrinting
+    report = ImportReport(table=model.__tablename__)
+
+    logging.info(f"Streaming '{file_path.name}' into the database in batches of {IMPORT_BATCH_SIZE}...")
+    progress_bar = tqdm(desc=file_path.name, unit=' rows')
+    for mappings in _iter_mapping_batches(file_path, model_type, workers):
+        write(db_session, model, mappings, report)
+        progress_bar.update(len(mappings))
+    progress_bar.close()
+    return report
+
+
+def _clear_catalog(db_session: Session) -> None:
+    """Deletes all OracleCards and CardPrintings and commits."""
+    logging.info("Clearing existing static card data (OracleCards and CardPrintings)...")
+    # The order is important due to foreign key constraints.
+    # CardPrinting must be deleted before OracleCard.
+    db_session.query(CardPrinting).delete(synchronize_session=False)
+    db_session.query(OracleCard).delete(synchronize_session=False)
+    db_session.commit()
+    logging.info("Existing data cleared.")
+
+
+def _parse_price(value: str | None) -> float | None:
+    """Converts a Scryfall price string (e.g. '0.25') to a float."""
+    return float(value) if value is not None else None
+
+
+def _prepare_price_updates(card_data: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Extracts only the printing ID and its prices from raw Scryfall card data."""
+    updates = []
+    for card in card_data:
+        prices = card.get('prices') or {}
+        updates.append({
+            'b_id': card['id'],
+            'b_price_usd': _parse_price(prices.get('usd')),
+            'b_price_usd_foil': _parse_price(prices.get('usd_foil'))
+        })
+    return updates
+
+
+def _refresh_prices_from_file(db_engine, file_path: Path) -> int:
+    """
+    Streams a bulk file and applies its prices to existing CardPrintings with
+    batched executemany UPDATEs. Each batch is committed in its own short
+    transaction, so the database stays readable while the refresh runs. The
+    content hash of every repriced printing is cleared, so the next incremental
+    import writes the prices of its file even if they equal the imported ones.
+    Returns the number of printings whose prices changed.
+    """
+    table = CardPrinting.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam('b_id'))
+        # Skip rows whose prices did not change, to avoid needless writes
+        .where(or_(
+            table.c.price_usd.is_not(bindparam('b_price_usd')),
+            table.c.price_usd_foil.is_not(bindparam('b_price_usd_foil'))
+        ))
+        # The stored hash no longer describes the row, so the next incremental import rewrites it
+        .values(price_usd=bindparam('b_price_usd'), price_usd_foil=bindparam('b_price_usd_foil'), content_hash=None)
+    )
+
+    updated = 0
+    logging.info(f"Streaming prices from '{file_path.name}' in batches of {IMPORT_BATCH_SIZE}...")
+    cards = tqdm(_iter_json_array(file_path), desc=file_path.name, unit=' cards')
+    for batch in _iter_batches(cards, IMPORT_BATCH_SIZE):
+        with db_engine.begin() as connection:
+            result = connection.execute(statement, _prepare_price_updates(batch))
+            updated += result.rowcount
+    cards.close()
+    return updated
+
+
+def run_price_refresh() -> int:
+    """
+    Refreshes only the USD prices of existing CardPrintings from the Scryfall
+    default cards file. Oracle text, images and all other columns are left
+    untouched. Returns the number of printings whose prices changed.
     """
-    db_session = SessionLocal()
     start_time = time.time()
+    updated = 0
 
     try:
-        # --- 1. Clear existing static card data ---
-        # The order is important due to foreign key constraints.
-        # CardPrinting must be deleted before OracleCard.
-        logging.info("Clearing existing static card data (OracleCards and CardPrintings)...")
-        db_session.query(CardPrinting).delete(synchronize_session=False)
-        db_session.query(OracleCard).delete(synchronize_session=False)
-        db_session.commit()
-        logging.info("Existing data cleared.")
-
-        # --- 2. Download files ---
-        oracle_url = _get_bulk_data_url("oracle_cards")
-        default_cards_url = _get_bulk_data_url("default_cards")
-
-        oracle_file_path = DOWNLOAD_DIR / "oracle_cards.json"
-        default_cards_file_path = DOWNLOAD_DIR / "default_cards.json"
-
-        _download_file(oracle_url, oracle_file_path)
-        _download_file(default_cards_url, default_cards_file_path)
-
-        # --- 3. Process and Insert Oracle Cards ---
-        logging.info("Loading Oracle Cards JSON file into memory...")
-        with open(oracle_file_path, 'r', encoding='utf-8') as f:
-            oracle_json_data = json.load(f)
-
-        logging.info("Preparing Oracle Card data for insertion...")
-        oracle_mappings = _prepare_data_for_bulk_insert(oracle_json_data, 'oracle')
-
-        logging.info(f"Starting bulk insert of {len(oracle_mappings)} Oracle Cards...")
-        db_session.bulk_insert_mappings(OracleCard, oracle_mappings)
-        db_session.commit()
-        logging.info("Oracle Cards successfully inserted.")
-
-        # --- 4. Process and Insert Default Cards (Printings) ---
-        logging.info("Loading Default Cards JSON file into memory...")
-        # NOTE: This file is large (~500MB). For memory-constrained systems,
-        # a streaming JSON parser like `ijson` would be a better choice.
-        with open(default_cards_file_path, 'r', encoding='utf-8') as f:
-            default_cards_json_data = json.load(f)
-
-        logging.info("Preparing Card Printing data for insertion...")
-        printing_mappings = _prepare_data_for_bulk_insert(default_cards_json_data, 'printing')
-
-        logging.info(f"Starting bulk insert of {len(printing_mappings)} Card Printings...")
-        db_session.bulk_insert_mappings(CardPrinting, printing_mappings)
-        db_session.commit()
-        logging.info("Card Printings successfully inserted.")
+        default_cards_file_path = _fetch_bulk_file("default_cards")
 
+        updated = _refresh_prices_from_file(engine, default_cards_file_path)
+        logging.info(f"Prices updated for {updated} Card Printings.")
     except Exception as e:
-        logging.error(f"A critical error occurred during the bulk import process: {e}")
-        logging.info("Rolling back any partial changes to the database.")
-        db_session.rollback()
+        logging.error(f"A critical error occurred during the price refresh: {e}")
     finally:
-        # --- 5. Clean up ---
-        logging.info("Cleaning up downloaded files...")
-        if oracle_file_path.exists():
-            oracle_file_path.unlink()
-        if default_cards_file_path.exists():
-            default_cards_file_path.unlink()
-        if DOWNLOAD_DIR.exists():
-            DOWNLOAD_DIR.rmdir()
-
-        db_session.close()
         end_time = time.time()
-        logging.info(f"Bulk import process finished in {end_time - start_time:.2f} seconds.")
+        logging.info(f"Price refresh finished in {end_time - start_time:.2f} seconds.")
+
+    return updated
+
+
+def run_bulk_import(full_refresh: bool = False, workers: int = 1) -> List[ImportReport]:
+    """
+    Orchestrates the entire bulk import process:
+    1. Optionally clears existing card data (only for a full refresh).
+    2. Downloads Oracle and Default card files from Scryfall, unless the cached
+       copies are still current.
+    3. Streams the files and upserts new or changed cards in batches.
+
+    By default the import is incremental: every card is hashed and only rows whose
+    hash differs from the stored one are written, so existing printings never
+    disappear while the import runs. With more than one `workers`, the cards are
+    decoded and mapped on a process pool. Returns one ImportReport per catalog table.
+    """
+    # Databases created before content hashes were introduced need the new columns
+    upgrade_database(engine)
+
+    start_time = time.time()
+    reports = []
+
+    # --- 1. Clear existing static card data (only for a full refresh) ---
+    with _catalog_writer(full_refresh=full_refresh) as (db_session, write):
+        try:
+            # --- 2. Download files (or reuse the cached copies) ---
+            oracle_file_path = _fetch_bulk_file("oracle_cards")
+            default_cards_file_path = _fetch_bulk_file("default_cards")
+
+            # --- 3. Process and Insert Oracle Cards ---
+            oracle_report = _import_file_in_batches(db_session, oracle_file_path, 'oracle', write, workers)
+            db_session.commit()
+            reports.append(oracle_report)
+            logging.info(f"Oracle Cards successfully imported ({oracle_report}).")
+
+            # --- 4. Process and Insert Default Cards (Printings) ---
+            printing_report = _import_file_in_batches(db_session, default_cards_file_path, 'printing', write,
+                                                     workers)
+            db_session.commit()
+            reports.append(printing_report)
+            logging.info(f"Card Printings successfully imported ({printing_report}).")
+
+        except Exception as e:
+            logging.error(f"A critical error occurred during the bulk import process: {e}")
+            logging.info("Rolling back any partial changes to the database.")
+            db_session.rollback()
+
+    end_time = time.time()
+    logging.info(f"Bulk import process finished in {end_time - start_time:.2f} seconds.")
+
+    return reports
+
+
+def _shadow_database_path() -> Path:
+    """Returns the path of the side file the shadow catalog is built in, next to the live database."""
+    database = engine.url.database
+    if not database or database == ':memory:':
+        raise ValueError("A shadow import needs a file-based database.")
+    live_path = Path(database)
+    return live_path.with_name(f"{live_path.stem}.catalog-build{live_path.suffix}")
+
+
+def _build_shadow_catalog(shadow_path: Path, oracle_file_path: Path, default_cards_file_path: Path,
+                          workers: int = 1) -> None:
+    """
+    Bulk loads the full catalog into a fresh side database, using SHADOW_BUILD_PRAGMAS,
+    builds its indexes in one pass and runs ANALYZE on it. The live database is not
+    touched at all.
+    """
+    if shadow_path.exists():
+        shadow_path.unlink()
+
+    shadow_engine = create_engine(f"sqlite:///{shadow_path}")
+    try:
+        Base.metadata.create_all(bind=shadow_engine, tables=[OracleCard.__table__, CardPrinting.__table__])
+        with shadow_engine.connect() as connection:
+            _apply_pragmas(connection, SHADOW_BUILD_PRAGMAS)
+            dropped_indexes = _drop_secondary_indexes(connection, (OracleCard, CardPrinting))
+            with Session(bind=connection, autoflush=False) as db_session:
+                for file_path, model_type in ((oracle_file_path, 'oracle'), (default_cards_file_path, 'printing')):
+                    report = _import_file_in_batches(db_session, file_path, model_type, _insert_mappings, workers)
+                    db_session.commit()
+                    logging.info(f"Shadow catalog loaded ({report}).")
+            _rebuild_indexes(connection, dropped_indexes)
+            connection.exec_driver_sql("ANALYZE")
+            connection.commit()
+    finally:
+        shadow_engine.dispose()
+
+
+def _merge_shadow_table(connection: Connection, model) -> ImportReport:
+    """
+    Copies one catalog table from the attached shadow database into the live one.
+    Rows are upserted and only rewritten when their content hash changed.
+    """
+    table = model.__tablename__
+    columns = [column.name for column in model.__table__.columns]
+    column_list = ", ".join(columns)
+    assignments = ", ".join(f"{column} = excluded.{column}" for column in columns if column != 'id')
+
+    total = connection.exec_driver_sql(f"SELECT count(*) FROM catalog_build.{table}").scalar()
+    inserted = connection.exec_driver_sql(
+        f"SELECT count(*) FROM catalog_build.{table} AS shadow "
+        f"WHERE NOT EXISTS (SELECT 1 FROM main.{table} AS live WHERE live.id = shadow.id)"
+    ).scalar()
+    updated = connection.exec_driver_sql(
+        f"SELECT count(*) FROM catalog_build.{table} AS shadow JOIN main.{table} AS live ON live.id = shadow.id "
+        f"WHERE live.content_hash IS NOT shadow.content_hash"
+    ).scalar()
+
+    # 'WHERE true' is required by SQLite to tell the upsert clause apart from a join
+    connection.exec_driver_sql(
+        f"INSERT INTO main.{table} ({column_list}) SELECT {column_list} FROM catalog_build.{table} WHERE true "
+        f"ON CONFLICT(id) DO UPDATE SET {assignments} WHERE {table}.content_hash IS NOT excluded.content_hash"
+    )
+    return ImportReport(table=table, inserted=inserted, updated=updated, unchanged=total - inserted - updated)
+
+
+def _swap_in_shadow_catalog(shadow_path: Path, full_refresh: bool = False) -> List[ImportReport]:
+    """
+    Attaches the shadow database to the live one and merges the catalog in a single
+    transaction, together with the query planner statistics computed by ANALYZE.
+    Readers see either the old or the new catalog, never a partial one.
+    """
+    catalog_tables = (OracleCard.__tablename__, CardPrinting.__tablename__)
+    with engine.connect() as connection, _import_pragmas(connection):
+        connection.exec_driver_sql("ATTACH DATABASE ? AS catalog_build", (str(shadow_path),))
+        try:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            if full_refresh:
+                connection.exec_driver_sql(f"DELETE FROM main.{CardPrinting.__tablename__}")
+                connection.exec_driver_sql(f"DELETE FROM main.{OracleCard.__tablename__}")
+            reports = [_merge_shadow_table(connection, model) for model in (OracleCard, CardPrinting)]
+
+            has_statistics = connection.exec_driver_sql(
+                "SELECT 1 FROM main.sqlite_master WHERE name = 'sqlite_stat1'"
+            ).first()
+            if has_statistics:
+                placeholders = ", ".join("?" for _ in catalog_tables)
+                connection.exec_driver_sql(f"DELETE FROM main.sqlite_stat1 WHERE tbl IN ({placeholders})",
+                                           catalog_tables)
+                connection.exec_driver_sql(f"INSERT INTO main.sqlite_stat1 SELECT * FROM catalog_build.sqlite_stat1 "
+                                           f"WHERE tbl IN ({placeholders})", catalog_tables)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.exec_driver_sql("DETACH DATABASE catalog_build")
+
+        if has_statistics:
+            # Makes the query planner reload the copied statistics
+            connection.exec_driver_sql("ANALYZE sqlite_master")
+        else:
+            for table in catalog_tables:
+                connection.exec_driver_sql(f"ANALYZE main.{table}")
+        rebuild_collection_summary(connection)
+        connection.commit()
+    invalidate_lookup_caches()
+    return reports
+
+
+def run_shadow_import(full_refresh: bool = False, workers: int = 1) -> List[ImportReport]:
+    """
+    Runs the bulk import without ever exposing a half-imported catalog. The whole
+    catalog is first built into a side database file next to the live one (with
+    unsafe but fast settings, followed by ANALYZE), and only then merged into the
+    live database in one atomic transaction. The side file is deleted afterwards.
+    """
+    upgrade_database(engine)
+    start_time = time.time()
+    reports = []
+    shadow_path = _shadow_database_path()
+
+    try:
+        oracle_file_path = _fetch_bulk_file("oracle_cards")
+        default_cards_file_path = _fetch_bulk_file("default_cards")
+
+        logging.info(f"Building the shadow catalog in '{shadow_path.name}'...")
+        _build_shadow_catalog(shadow_path, oracle_file_path, default_cards_file_path, workers)
+
+        logging.info("Swapping the shadow catalog into the live database...")
+        reports = _swap_in_shadow_catalog(shadow_path, full_refresh=full_refresh)
+        for report in reports:
+            logging.info(f"Catalog swapped in ({report}).")
+    except Exception as e:
+        logging.error(f"A critical error occurred during the shadow import; the live catalog is unchanged: {e}")
+    finally:
+        if shadow_path.exists():
+            shadow_path.unlink()
+        logging.info(f"Shadow import finished in {time.time() - start_time:.2f} seconds.")
+
+    return reports
+
+
+@dataclass
+class PipelineReport:
+    """The outcome of a pipelined import: row counts per table and throughput per stage."""
+    tables: List[ImportReport] = field(default_factory=list)
+    stages: List[StageStats] = field(default_factory=list)
+
+
+def run_pipelined_import(full_refresh: bool = False, workers: int | None = None) -> PipelineReport:
+    """
+    Runs the same incremental import as `run_bulk_import`, but as a pipeline whose
+    stages overlap, so network, CPU and disk are busy at the same time:
+
+    - download: one thread fetches the bulk files (oracle first) and hands each
+      one over as soon as it is on disk;
+    - parse: the calling thread splits each file into batches of raw records;
+    - map: a process pool decodes the batches and turns them into row mappings;
+    - write: a single writer thread drains a bounded queue into SQLite.
+
+    The bounded queue applies back-pressure, so memory stays flat when the writer
+    is the bottleneck. Each stage reports its throughput, the slowest stage being
+    the one with the lowest rows/s.
+    """
+    upgrade_database(engine)
+    start_time = time.time()
+    workers = workers or os.cpu_count() or 1
+
+    download_stats = StageStats('download', unit='bytes')
+    parse_stats = StageStats('parse')
+    map_stats = StageStats('map')
+    write_stats = StageStats('write')
+    report = PipelineReport(stages=[download_stats, parse_stats, map_stats, write_stats])
+
+    file_queue = queue.Queue()
+    write_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    failed = threading.Event()
+    errors = []
+
+    def download_stage():
+        try:
+            for model_type, data_type in (('oracle', 'oracle_cards'), ('printing', 'default_cards')):
+                started = time.perf_counter()
+                file_path = _fetch_bulk_file(data_type)
+                download_stats.seconds += time.perf_counter() - started
+                download_stats.amount += file_path.stat().st_size
+                file_queue.put((model_type, file_path))
+        except Exception as e:
+            errors.append(e)
+            failed.set()
+        finally:
+            file_queue.put(None)
+
+    def write_stage():
+        drained = False
+        try:
+            with _catalog_writer(full_refresh=full_refresh) as (db_session, write):
+                table_reports = {}
+                while (item := write_queue.get()) is not None:
+                    if failed.is_set():
+                        continue  # Keep draining, so the producer never blocks on a full queue
+                    model, mappings = item
+                    started = time.perf_counter()
+                    try:
+                        table_report = table_reports.get(model)
+                        if table_report is None:
+                            table_report = table_reports[model] = ImportReport(table=model.__tablename__)
+                            report.tables.append(table_report)
+                        write(db_session, model, mappings, table_report)
+                        # Short transactions keep the database readable during the import
+                        db_session.commit()
+                    except Exception as e:
+                        errors.append(e)
+                        failed.set()
+                        db_session.rollback()
+                    write_stats.seconds += time.perf_counter() - started
+                    write_stats.amount += len(mappings)
+                drained = True
+        except Exception as e:
+            errors.append(e)
+            failed.set()
+            while not drained and write_queue.get() is not None:
+                pass
+
+    downloader = threading.Thread(target=download_stage, name="bulk-download", daemon=True)
+    writer = threading.Thread(target=write_stage, name="bulk-writer", daemon=True)
+    downloader.start()
+    writer.start()
+
+    try:
+        with _process_pool(workers) as pool:
+            while not failed.is_set() and (item := file_queue.get()) is not None:
+                model_type, file_path = item
+                model = OracleCard if model_type == 'oracle' else CardPrinting
+                batches = _iter_mapping_batches(file_path, model_type, workers, parse_stats, map_stats, pool)
+                for mappings in batches:
+                    if failed.is_set():
+                        break
+                    write_queue.put((model, mappings))
+                batches.close()
+    except Exception as e:
+        errors.append(e)
+        failed.set()
+    finally:
+        write_queue.put(None)
+        writer.join()
+        downloader.join()
+
+    for error in errors:
+        logging.error(f"A critical error occurred during the pipelined import: {error}")
+    for table_report in report.tables:
+        logging.info(f"Imported {table_report}.")
+    for stage in report.stages:
+        logging.info(f"Stage {stage}")
+    logging.info(f"Pipelined import finished in {time.time() - start_time:.2f} seconds.")
+    return report
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Imports the Scryfall bulk card data into the local database.")
+    parser.add_argument('--full-refresh', action='store_true',
+                        help="Erase all Oracle cards and printings before importing instead of updating them in place.")
+    parser.add_argument('--prices-only', action='store_true',
+                        help="Only refresh the prices of existing printings.")
+    parser.add_argument('--pipelined', action='store_true',
+                        help="Overlap downloading, parsing and writing, and report the throughput of each stage.")
+    parser.add_argument('--shadow', action='store_true',
+                        help="Build the catalog in a side database and swap it into place atomically.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of processes used to decode and map cards "
+                             "(default: 1, or all cores in pipelined mode).")
+    args = parser.parse_args()
+
+    if args.prices_only:
+        print("Refreshing card prices from Scryfall...")
+        print(f"Prices updated for {run_price_refresh()} printings.")
+        sys.exit(0)
+
     print("====================================================================")
     print(" Magic: The Gathering Collection Manager - Bulk Data Importer")
     print("====================================================================")
     print("\nThis script will download the latest card data from Scryfall and")
     print("populate your local database. This may take several minutes.")
-    print("\nWARNING: This is a destructive operation. It will completely")
-    print("         erase and replace all existing canonical card data")
-    print("         (Oracle cards and Printings). Your personal collection")
-    print("         and decks will NOT be affected.")
+    if args.full_refresh:
+        print("\nWARNING: This is a destructive operation. It will completely")
+        print("         erase and replace all existing canonical card data")
+        print("         (Oracle cards and Printings). Your personal collection")
+        print("         and decks will NOT be affected.")
+    else:
+        print("\nOnly new or changed Oracle cards and Printings will be written.")
+        print("Your personal collection and decks will NOT be affected.")
     print("--------------------------------------------------------------------")
 
     # Prompt the user to confirm
     answer = input("Do you want to proceed? (yes/no): ").lower()
 
     if answer in ['yes', 'y']:
-        run_bulk_import()
+        if args.shadow:
+            for report in run_shadow_import(full_refresh=args.full_refresh, workers=args.workers or 1):
+                print(report)
+        elif args.pipelined:
+            pipeline_report = run_pipelined_import(full_refresh=args.full_refresh, workers=args.workers)
+            for report in pipeline_report.tables + pipeline_report.stages:
+                print(report)
+        else:
+            for report in run_bulk_import(full_refresh=args.full_refresh, workers=args.workers or 1):
+                print(report)
     else:
-        print("Operation cancelled by user.")
\ No newline at end of file
+        print("Operation cancelled by user.")
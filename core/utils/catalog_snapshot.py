@@ -0,0 +1,260 @@
+import argparse
+import json
+import logging
+import math
+import struct
+import sys
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Float, String, delete, insert, select
+from sqlalchemy.engine import Engine
+
+# This adds the project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from core.api.lookup_cache import invalidate_lookup_caches
+from core.models import engine, OracleCard, CardPrinting, rebuild_collection_summary
+from core.utils.bulk_importer import IMPORT_BATCH_SIZE, ImportReport, _drop_secondary_indexes, _import_pragmas, \
+    _iter_batches, _rebuild_indexes
+from core.utils.database_setup import upgrade_database
+
+# --- Configuration ---
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# A snapshot file starts with these bytes, followed by the format version
+SNAPSHOT_MAGIC = b"MTGCSNAP"
+SNAPSHOT_VERSION = 1
+
+# The catalog tables in the order they are written and loaded (foreign keys first)
+SNAPSHOT_MODELS = (OracleCard, CardPrinting)
+
+# A string column is dictionary encoded (interned) when at most this fraction of its values is distinct,
+# which is the case for set codes, rarities, artists, type lines and the like
+DICTIONARY_MAX_DISTINCT_RATIO = 0.25
+
+# Marks a missing value in the length array of a plain string column
+_NULL_LENGTH = 0xFFFFFFFF
+
+# --- Snapshot Format ---
+#
+# SNAPSHOT_MAGIC | version (u16) | header length (u32) | header (JSON) | column blocks
+#
+# The header lists the tables, their row counts and, per column, its encoding and
+# the size of its zlib-compressed block. The blocks follow in the same order. All
+# numbers are little-endian. The encodings are:
+#   'float64' - one double per row, NaN for NULL.
+#   'text'    - one u32 byte length per row (0xFFFFFFFF for NULL), then the UTF-8 bytes.
+#   'dict'    - one code per row ('width' bytes wide, 0 for NULL), then the 'distinct'
+#               values in 'text' encoding. Code n refers to the n-th distinct value.
+
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _pack_strings(values: List[str | None]) -> bytes:
+    encoded = [value.encode('utf-8') if value is not None else None for value in values]
+    lengths = array('I', (len(value) if value is not None else _NULL_LENGTH for value in encoded))
+    return _to_little_endian(lengths) + b"".join(value for value in encoded if value is not None)
+
+
+def _unpack_strings(data: bytes, count: int) -> List[str | None]:
+    lengths = _from_little_endian('I', data[:4 * count])
+    values = []
+    offset = 4 * count
+    for length in lengths:
+        if length == _NULL_LENGTH:
+            values.append(None)
+        else:
+            values.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+    return values
+
+
+def _code_typecode(distinct: int) -> str:
+    """Returns the smallest unsigned array type that can hold the codes 0..distinct."""
+    for typecode in ('B', 'H', 'I'):
+        if distinct < 2 ** (8 * array(typecode).itemsize):
+            return typecode
+    raise ValueError(f"Too many distinct values for a dictionary column: {distinct}")
+
+
+def _encode_column(column, values: List[Any]) -> Tuple[Dict[str, Any], bytes]:
+    """Encodes the values of one column. Returns the column's header entry and its uncompressed block."""
+    if isinstance(column.type, Float):
+        floats = array('d', (math.nan if value is None else value for value in values))
+        return {'name': column.name, 'encoding': 'float64'}, _to_little_endian(floats)
+
+    if not isinstance(column.type, String):
+        raise ValueError(f"Column '{column.table.name}.{column.name}' has a type the snapshot format "
+                         f"does not support: {column.type}")
+
+    distinct = list(dict.fromkeys(value for value in values if value is not None))
+    if len(distinct) > len(values) * DICTIONARY_MAX_DISTINCT_RATIO:
+        return {'name': column.name, 'encoding': 'text'}, _pack_strings(values)
+
+    codes_by_value = {value: code for code, value in enumerate(distinct, start=1)}
+    typecode = _code_typecode(len(distinct))
+    codes = array(typecode, (0 if value is None else codes_by_value[value] for value in values))
+    entry = {'name': column.name, 'encoding': 'dict', 'distinct': len(distinct), 'width': codes.itemsize}
+    return entry, _to_little_endian(codes) + _pack_strings(distinct)
+
+
+def _decode_column(entry: Dict[str, Any], data: bytes, rows: int) -> List[Any]:
+    """Decodes a block written by `_encode_column` back into a list of values."""
+    encoding = entry['encoding']
+    if encoding == 'float64':
+        return [None if math.isnan(value) else value for value in _from_little_endian('d', data)]
+    if encoding == 'text':
+        return _unpack_strings(data, rows)
+    if encoding == 'dict':
+        codes_size = entry['width'] * rows
+        typecode = {1: 'B', 2: 'H', 4: 'I'}[entry['width']]
+        lookup = [None] + _unpack_strings(data[codes_size:], entry['distinct'])
+        return [lookup[code] for code in _from_little_endian(typecode, data[:codes_size])]
+    raise ValueError(f"Unknown column encoding in snapshot: '{encoding}'")
+
+
+# --- Export and Load ---
+
+def export_snapshot(db_engine: Engine, snapshot_path: Path) -> Dict[str, int]:
+    """
+    Writes the Oracle cards and printings of the database to a compact columnar
+    snapshot file. Returns the number of rows written per table.
+    """
+    header = {'tables': []}
+    blocks = []
+
+    with db_engine.connect() as connection:
+        for model in SNAPSHOT_MODELS:
+            table = model.__table__
+            rows = connection.execute(select(table).order_by(table.c.id)).all()
+            columns = []
+            for position, column in enumerate(table.columns):
+                entry, block = _encode_column(column, [row[position] for row in rows])
+                block = zlib.compress(block, 6)
+                entry['size'] = len(block)
+                columns.append(entry)
+                blocks.append(block)
+            header['tables'].append({'name': table.name, 'rows': len(rows), 'columns': columns})
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    with open(snapshot_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack('<HI', SNAPSHOT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for block in blocks:
+            f.write(block)
+
+    return {table['name']: table['rows'] for table in header['tables']}
+
+
+def _read_snapshot(snapshot_path: Path) -> Dict[str, Tuple[List[str], List[List[Any]]]]:
+    """Reads a snapshot file. Returns the column names and the decoded columns of each table."""
+    with open(snapshot_path, 'rb') as f:
+        data = f.read()
+
+    if not data.startswith(SNAPSHOT_MAGIC):
+        raise ValueError(f"'{snapshot_path}' is not a card catalog snapshot.")
+    offset = len(SNAPSHOT_MAGIC)
+    version, header_size = struct.unpack_from('<HI', data, offset)
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION}).")
+    offset += struct.calcsize('<HI')
+    header = json.loads(data[offset:offset + header_size])
+    offset += header_size
+
+    tables = {}
+    for table in header['tables']:
+        names, columns = [], []
+        for entry in table['columns']:
+            block = zlib.decompress(data[offset:offset + entry['size']])
+            offset += entry['size']
+            names.append(entry['name'])
+            columns.append(_decode_column(entry, block, table['rows']))
+        tables[table['name']] = (names, columns)
+    return tables
+
+
+def load_snapshot(db_engine: Engine, snapshot_path: Path) -> List[ImportReport]:
+    """
+    Replaces the Oracle cards and printings of the database with the contents of a
+    snapshot file written by `export_snapshot`. The tables are created if needed, so
+    this also provisions a brand new database. The rows are bulk loaded with the
+    importer's fast path: IMPORT_PRAGMAS, secondary indexes rebuilt at the end, and
+    the stored content hashes kept so later incremental imports skip unchanged cards.
+    The old catalog is replaced in a single transaction, so it survives a failed load.
+    """
+    tables = _read_snapshot(snapshot_path)
+    for model in SNAPSHOT_MODELS:
+        if model.__tablename__ not in tables:
+            raise ValueError(f"The snapshot has no '{model.__tablename__}' table.")
+        unknown = set(tables[model.__tablename__][0]) - set(model.__table__.columns.keys())
+        if unknown:
+            raise ValueError(f"The snapshot has columns unknown to '{model.__tablename__}': {sorted(unknown)}")
+
+    upgrade_database(db_engine)
+
+    reports = []
+    with db_engine.connect() as connection, _import_pragmas(connection):
+        dropped_indexes = _drop_secondary_indexes(connection, SNAPSHOT_MODELS)
+        try:
+            logging.info("Replacing the card catalog with the snapshot...")
+            # Printings first, as they reference the Oracle cards
+            for model in reversed(SNAPSHOT_MODELS):
+                connection.execute(delete(model.__table__))
+            for model in SNAPSHOT_MODELS:
+                names, columns = tables[model.__tablename__]
+                report = ImportReport(table=model.__tablename__)
+                for rows in _iter_batches(zip(*columns), IMPORT_BATCH_SIZE):
+                    connection.execute(insert(model.__table__), [dict(zip(names, row)) for row in rows])
+                    report.inserted += len(rows)
+                reports.append(report)
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            _rebuild_indexes(connection, dropped_indexes)
+        rebuild_collection_summary(connection)
+        connection.commit()
+    invalidate_lookup_caches()
+    return reports
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Exports the card catalog to a snapshot file, or loads one into the local database."
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help="Write the catalog to a snapshot file.")
+    export_parser.add_argument('path', type=Path)
+    load_parser = subparsers.add_parser('load', help="Replace the catalog with the contents of a snapshot file.")
+    load_parser.add_argument('path', type=Path)
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if args.command == 'export':
+        for table, rows in export_snapshot(engine, args.path).items():
+            print(f"{table}: {rows} rows exported")
+        print(f"Snapshot written to '{args.path}' ({args.path.stat().st_size / 1024 / 1024:.1f} MB).")
+    else:
+        for report in load_snapshot(engine, args.path):
+            print(report)
+    print(f"Finished in {time.time() - start_time:.2f} seconds.")
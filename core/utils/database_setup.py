@@ -1,6 +1,158 @@
 # This script is responsible for creating the database and its tables.
 # It should be run once before the main application or tests are run for the first time.
-from core.models import Base, engine
+from typing import Callable, List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from core.models import Base, engine, fold_name, install_card_search, install_collection_summary, CARD_SEARCH_TABLE
+
+# Upper bound for the number of values in one IN (...) query. SQLite builds before
+# 3.32 allow only 999 bound variables per statement, and the queries chunked by
+# it bind a few more of their own.
+IN_QUERY_BATCH_SIZE = 500
+
+
+def add_missing_columns(bind: Engine) -> list[str]:
+    """
+    Adds columns that exist on the models but not yet in the database.
+    'create_all' never alters existing tables, so databases created by an older
+    version of the application are upgraded here. Only nullable columns or columns
+    with a server default can be added this way (an SQLite restriction).
+
+    Returns a list of the added columns as 'table.column' strings.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                column_type = column.type.compile(dialect=bind.dialect)
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                connection.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+
+    return added
+
+
+def existing_index_names(bind: Engine | Connection, table_name: str) -> set[str]:
+    """
+    Returns the names of the indexes of a table. Read from sqlite_master, as the
+    SQLAlchemy inspector skips expression-based indexes.
+    """
+    statement = text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table")
+    if isinstance(bind, Connection):
+        return set(bind.execute(statement, {'table': table_name}).scalars())
+    with bind.connect() as connection:
+        return set(connection.execute(statement, {'table': table_name}).scalars())
+
+
+def add_missing_indexes(bind: Engine) -> list[str]:
+    """
+    Creates indexes that exist on the models but not yet in the database, as
+    'create_all' only creates the indexes of tables it creates itself.
+
+    Returns a list of the names of the created indexes.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_indexes = existing_index_names(bind, table.name)
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=bind)
+                created.append(index.name)
+
+    return created
+
+
+def _fold_oracle_card_names(connection: Connection) -> None:
+    """Fills oracle_cards.name_folded, which case-insensitive name lookups compare, for the existing cards."""
+    rows = connection.execute(
+        text("SELECT id, name FROM oracle_cards WHERE name_folded IS NULL AND name IS NOT NULL")
+    ).all()
+    if rows:
+        connection.execute(text("UPDATE oracle_cards SET name_folded = :folded WHERE id = :id"),
+                           [{'id': row.id, 'folded': fold_name(row.name)} for row in rows])
+
+
+# Data changes that 'add_missing_columns' and 'add_missing_indexes' cannot make, in the
+# order they were made to the schema of the first release. Never reorder or remove
+# entries: a database stores the number of migrations applied to it in its
+# user_version, and only later entries are run on it.
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    _fold_oracle_card_names,
+]
+
+
+def run_migrations(bind: Engine) -> list[str]:
+    """
+    Applies the MIGRATIONS a database has not had yet, each in its own transaction
+    together with the new user_version. Run after 'add_missing_columns', as
+    migrations may fill the columns it adds.
+
+    Returns a list of the names of the applied migrations.
+    """
+    with bind.connect() as connection:
+        version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+    applied = []
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with bind.begin() as connection:
+            migration(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {number}")
+        applied.append(migration.__name__.lstrip('_'))
+    return applied
+
+
+def install_derived_tables(bind: Engine) -> list[str]:
+    """
+    Installs the tables maintained by triggers (the collection summary and the card
+    search index) where they are missing, and fills them. Run after
+    'add_missing_columns', as the triggers and the filling read the added columns.
+
+    Returns a list of the names of the installed tables.
+    """
+    installed = []
+    with bind.begin() as connection:
+        if install_collection_summary(connection):
+            installed.append('collection_summary')
+        if install_card_search(connection):
+            installed.append(CARD_SEARCH_TABLE)
+    return installed
+
+
+def upgrade_database(bind: Engine) -> None:
+    """
+    Creates missing tables and brings the schema of an existing database up to date.
+    Every step relies on the ones before it, so use this rather than 'create_all'
+    for any database the application works on.
+    """
+    Base.metadata.create_all(bind=bind)
+    for column in add_missing_columns(bind):
+        print(f"Added missing column '{column}'.")
+    for table in install_derived_tables(bind):
+        print(f"Installed derived table '{table}'.")
+    for migration in run_migrations(bind):
+        print(f"Applied migration '{migration}'.")
+    for index in add_missing_indexes(bind):
+        print(f"Created missing index '{index}'.")
 
 
 def create_database_schema():
@@ -11,8 +163,8 @@ def create_database_schema():
     print("Attempting to create database tables...")
     try:
         # The 'create_all' method inspects all classes that inherit from Base
-        # and issues CREATE TABLE statements for them.
-        Base.metadata.create_all(bind=engine)
+        # and issues CREATE TABLE statements for them; existing tables are upgraded.
+        upgrade_database(engine)
         print("Tables created successfully (if they didn't already exist).")
     except Exception as e:
         print(f"An error occurred during table creation: {e}")
@@ -20,4 +172,4 @@ def create_database_schema():
 if __name__ == '__main__':
     # This allows the script to be run directly from the command line
     # e.g., python -m your_package_name.database_setup
-    create_database_schema()
\ No newline at end of file
+    create_database_schema()
@@ -1,17 +1,19 @@
-from core.models import Base, engine
+from core.models import engine
 from core.services import MagicCardService
+from core.utils.database_setup import upgrade_database
 from ui.main_window import App
 
 def create_database():
     """Creates the database and all tables if they don't exist."""
-    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine)
     print("Database is ready.")
 
 if __name__ == "__main__":
     create_database()
 
     # 1. Initialize the service layer
-    service = MagicCardService()
+    # The rest of a set the user adds cards from is fetched in the background
+    service = MagicCardService(prefetch=True)
 
     # 2. Create the UI, injecting the service into it
     app = App(service=service)
@@ -0,0 +1,65 @@
+-- The schema of collection.db files created by the first release, before any upgrade.
+CREATE TABLE oracle_cards (
+	id VARCHAR NOT NULL, 
+	name VARCHAR, 
+	color_identity VARCHAR, 
+	type_line VARCHAR, 
+	mana_cost VARCHAR, 
+	cmc FLOAT NOT NULL, 
+	oracle_text TEXT, 
+	power VARCHAR, 
+	toughness VARCHAR, 
+	loyalty VARCHAR, 
+	keywords VARCHAR, 
+	PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_oracle_cards_name ON oracle_cards (name);
+CREATE TABLE card_printings (
+	id VARCHAR NOT NULL, 
+	set_code VARCHAR, 
+	collector_number VARCHAR, 
+	rarity VARCHAR, 
+	artist VARCHAR, 
+	image_uri_normal VARCHAR, 
+	image_uri_large VARCHAR, 
+	price_usd FLOAT, 
+	price_usd_foil FLOAT, 
+	oracle_card_id VARCHAR, 
+	PRIMARY KEY (id), 
+	CONSTRAINT _set_collector_uc UNIQUE (set_code, collector_number), 
+	FOREIGN KEY(oracle_card_id) REFERENCES oracle_cards (id)
+);
+CREATE INDEX ix_card_printings_set_code ON card_printings (set_code);
+CREATE TABLE decks (
+	id INTEGER NOT NULL, 
+	name VARCHAR, 
+	format VARCHAR, 
+	status VARCHAR(9), 
+	commander_id VARCHAR, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(commander_id) REFERENCES card_printings (id)
+);
+CREATE INDEX ix_decks_id ON decks (id);
+CREATE INDEX ix_decks_name ON decks (name);
+CREATE TABLE card_instances (
+	id INTEGER NOT NULL, 
+	is_foil BOOLEAN, 
+	condition VARCHAR, 
+	purchase_price FLOAT, 
+	date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP, 
+	printing_id VARCHAR, 
+	deck_id INTEGER, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(printing_id) REFERENCES card_printings (id), 
+	FOREIGN KEY(deck_id) REFERENCES decks (id)
+);
+CREATE INDEX ix_card_instances_id ON card_instances (id);
+CREATE TABLE blueprint_entries (
+	id INTEGER NOT NULL, 
+	quantity INTEGER NOT NULL, 
+	deck_id INTEGER NOT NULL, 
+	oracle_card_id VARCHAR NOT NULL, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(deck_id) REFERENCES decks (id), 
+	FOREIGN KEY(oracle_card_id) REFERENCES oracle_cards (id)
+);
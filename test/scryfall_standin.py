@@ -0,0 +1,303 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List
+from urllib.parse import parse_qs, urlsplit
+
+# Recorded Scryfall responses the stand-in can serve
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class ScryfallStandIn:
+    """
+    A local HTTP stand-in for the parts of the Scryfall API used by the application.
+    Use it as a context manager; `url` is the base URL to point the code at.
+
+    Every request is recorded in `requests` as a (method, path, headers) tuple so
+    tests can assert on what was (or was not) fetched.
+
+    Cards are published with `add_cards`, or loaded from a recorded fixture file
+    with `load_fixture`. For load tests, every card lookup can be slowed down by
+    `latency` seconds, and errors can be injected either one by one
+    (`error_statuses`) or at random with `error_rate`. The random errors come from
+    a generator seeded with `seed`, so a run can be repeated exactly.
+    """
+
+    # Scryfall rejects /cards/collection requests with more identifiers than this
+    COLLECTION_LIMIT = 75
+
+    # Cards per page of /cards/search results
+    SEARCH_PAGE_SIZE = 175
+
+    def __init__(self, seed: int = 0):
+        self.bulk_files: Dict[str, dict] = {}
+        self.cards: List[dict] = []
+        self.requests: List[tuple] = []
+        # Number of bytes after which the next bulk file response is cut off
+        self.fail_after_bytes: int | None = None
+        # HTTP statuses returned, one per request, before requests are served normally again
+        self.error_statuses: List[int] = []
+        # Seconds every card lookup takes, to simulate the round trip to the real API
+        self.latency = 0.0
+        # Fraction of the requests (0..1) answered with `error_status` instead
+        self.error_rate = 0.0
+        self.error_status = 503
+        self.injected_errors = 0
+        self._random = random.Random(seed)
+        self._cards_by_printing: Dict[tuple, dict] = {}
+        self._cards_by_name: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_bulk_file(self, data_type: str, content: bytes | Path,
+                      updated_at: str = "2025-01-01T09:00:00.000+00:00"):
+        """
+        Publishes (or replaces) a bulk data file of the given type. `content` is either
+        the file's bytes or the path of a file on disk, which is streamed from disk so
+        large benchmark files never have to fit in memory.
+        """
+        if isinstance(content, Path):
+            stat = content.stat()
+            size, fingerprint = stat.st_size, f"{content}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8')
+        else:
+            size, fingerprint = len(content), content
+        self.bulk_files[data_type] = {
+            'content': content,
+            'size': size,
+            'updated_at': updated_at,
+            'etag': f'"{hashlib.sha1(fingerprint).hexdigest()[:16]}"'
+        }
+
+    def add_cards(self, cards: List[dict]):
+        """Publishes cards to the card endpoints (/cards/named, /cards/search, /cards/{set}/{number} and /cards/collection)."""
+        self.cards.extend(cards)
+        for card in cards:
+            self._cards_by_printing.setdefault((card['set'], card['collector_number']), card)
+            faces = card['name'].lower().split(" // ")
+            for name in [card['name'].lower()] + (faces if len(faces) > 1 else []):
+                self._cards_by_name.setdefault(name, card)
+
+    def load_fixture(self, name: str, directory: Path = FIXTURES_DIR):
+        """Publishes the cards of a recorded fixture file: a JSON list of Scryfall card objects."""
+        with open(directory / name, encoding='utf-8') as f:
+            self.add_cards(json.load(f))
+
+    def requests_for(self, path: str) -> List[tuple]:
+        """Returns the recorded requests whose path starts with `path`."""
+        return [request for request in self.requests if request[1].startswith(path)]
+
+    def _make_handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_HEAD(self):
+                self._dispatch(send_body=False)
+
+            def do_GET(self):
+                self._dispatch(send_body=True)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                standin.requests.append((self.command, self.path, dict(self.headers)))
+                if self._send_injected_error():
+                    return
+                if self.path == '/cards/collection':
+                    time.sleep(standin.latency)
+                    identifiers = json.loads(body)['identifiers']
+                    if len(identifiers) > standin.COLLECTION_LIMIT:
+                        self._send_json({'object': 'error', 'status': 422, 'details': 'Too many identifiers'},
+                                        status=422)
+                    else:
+                        self._send_json(standin._card_collection(identifiers))
+                else:
+                    self._send_json({'object': 'error', 'status': 404, 'details': 'Not found'}, status=404)
+
+            def _dispatch(self, send_body: bool):
+                standin.requests.append((self.command, self.path, dict(self.headers)))
+                if self._send_injected_error():
+                    return
+                url = urlsplit(self.path)
+                if url.path == '/cards/named':
+                    time.sleep(standin.latency)
+                    query = parse_qs(url.query)
+                    self._send_card(standin._fuzzy_find_card(query.get('fuzzy', query.get('exact', ['']))[0]))
+                elif url.path == '/cards/search':
+                    time.sleep(standin.latency)
+                    query = parse_qs(url.query)
+                    page = standin._search_page(query.get('q', [''])[0], int(query.get('page', ['1'])[0]))
+                    if page is None:
+                        self._send_json({'object': 'error', 'status': 404, 'details': 'No cards found'}, status=404)
+                    else:
+                        self._send_json(page)
+                elif url.path.startswith('/cards/') and url.path.count('/') == 3:
+                    time.sleep(standin.latency)
+                    _, _, set_code, collector_number = url.path.split('/')
+                    self._send_card(standin._find_card({'set': set_code, 'collector_number': collector_number}))
+                elif self.path == '/bulk-data':
+                    self._send_json(standin._bulk_data_manifest())
+                elif self.path.startswith('/bulk/'):
+                    self._send_bulk_file(self.path[len('/bulk/'):].removesuffix('.json'), send_body)
+                else:
+                    self._send_json({'object': 'error', 'status': 404, 'details': 'Not found'}, status=404)
+
+            def _send_injected_error(self) -> bool:
+                with standin._lock:
+                    if standin.error_statuses:
+                        status = standin.error_statuses.pop(0)
+                    elif standin.error_rate and standin._random.random() < standin.error_rate:
+                        status = standin.error_status
+                    else:
+                        return False
+                    standin.injected_errors += 1
+                self._send_json({'object': 'error', 'status': status, 'details': 'Injected error'}, status=status)
+                return True
+
+            def _send_card(self, card: dict | None):
+                """Sends a card with an ETag, or '304 Not Modified' if the client already has it."""
+                if card is None:
+                    self._send_json({'object': 'error', 'status': 404, 'details': 'No card found'}, status=404)
+                    return
+                etag = f'"{hashlib.sha1(json.dumps(card, sort_keys=True).encode("utf-8")).hexdigest()[:16]}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self._send_json(card, headers={'ETag': etag})
+
+            def _send_json(self, payload: dict, status: int = 200, headers: dict | None = None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_bulk_file(self, data_type: str, send_body: bool):
+                bulk_file = standin.bulk_files.get(data_type)
+                if bulk_file is None:
+                    self._send_json({'object': 'error', 'status': 404}, status=404)
+                    return
+
+                size, etag = bulk_file['size'], bulk_file['etag']
+                offset = 0
+                range_header = self.headers.get('Range')
+                if range_header and self.headers.get('If-Range', etag) == etag:
+                    offset = int(range_header.removeprefix('bytes=').split('-')[0])
+
+                self.send_response(206 if offset else 200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(size - offset))
+                self.send_header('ETag', etag)
+                if offset:
+                    self.send_header('Content-Range', f"bytes {offset}-{size - 1}/{size}")
+                self.end_headers()
+                if not send_body:
+                    return
+
+                limit = size - offset
+                if standin.fail_after_bytes is not None:
+                    # Simulate a dropped connection in the middle of the transfer
+                    limit = min(limit, standin.fail_after_bytes)
+                    standin.fail_after_bytes = None
+                    self.close_connection = True
+                for chunk in _iter_content(bulk_file['content'], offset, limit):
+                    self.wfile.write(chunk)
+
+        return Handler
+
+    def _find_card(self, identifier: dict) -> dict | None:
+        if 'name' in identifier:
+            return self._cards_by_name.get(identifier['name'].lower())
+        return self._cards_by_printing.get((identifier.get('set', '').lower(), identifier.get('collector_number')))
+
+    def _fuzzy_find_card(self, name: str) -> dict | None:
+        """Like Scryfall's fuzzy search: an exact (face) name match first, then a partial one."""
+        exact = self._find_card({'name': name})
+        if exact is not None:
+            return exact
+        return next((card for card in self.cards if name.lower() in card['name'].lower()), None)
+
+    def _search_page(self, query: str, page: int) -> dict | None:
+        """Answers a set search ('e:<set code>'), SEARCH_PAGE_SIZE cards per page; None if nothing matches."""
+        set_code = query.removeprefix('e:').lower()
+        matches = [card for card in self.cards if card['set'] == set_code]
+        if not matches:
+            return None
+        start = (page - 1) * self.SEARCH_PAGE_SIZE
+        result = {
+            'object': 'list',
+            'total_cards': len(matches),
+            'has_more': start + self.SEARCH_PAGE_SIZE < len(matches),
+            'data': matches[start:start + self.SEARCH_PAGE_SIZE]
+        }
+        if result['has_more']:
+            result['next_page'] = f"{self.url}/cards/search?q=e%3A{set_code}&unique=prints&order=set&page={page + 1}"
+        return result
+
+    def _card_collection(self, identifiers: List[dict]) -> dict:
+        data, not_found = [], []
+        for identifier in identifiers:
+            card = self._find_card(identifier)
+            if card is None:
+                not_found.append(identifier)
+            else:
+                data.append(card)
+        return {'object': 'list', 'not_found': not_found, 'data': data}
+
+    def _bulk_data_manifest(self) -> dict:
+        return {
+            'object': 'list',
+            'data': [
+                {
+                    'object': 'bulk_data',
+                    'type': data_type,
+                    'updated_at': bulk_file['updated_at'],
+                    'size': bulk_file['size'],
+                    'download_uri': f"{self.url}/bulk/{data_type}.json",
+                    'content_type': 'application/json'
+                }
+                for data_type, bulk_file in self.bulk_files.items()
+            ]
+        }
+
+
+def _iter_content(content: bytes | Path, offset: int, limit: int, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Yields `limit` bytes of a bulk file's content, starting at `offset`."""
+    if isinstance(content, bytes):
+        yield content[offset:offset + limit]
+        return
+
+    with open(content, 'rb') as f:
+        f.seek(offset)
+        while limit > 0:
+            chunk = f.read(min(chunk_size, limit))
+            if not chunk:
+                return
+            limit -= len(chunk)
+            yield chunk
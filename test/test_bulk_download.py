@@ -0,0 +1,98 @@
+import gzip
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from core.models import Base, OracleCard, CardPrinting
+from core.utils import bulk_importer
+from core.utils.bulk_importer import _fetch_bulk_file, _iter_json_array, run_pipelined_import
+from scryfall_standin import ScryfallStandIn
+
+CARDS = [{'id': f"printing-{i}", 'name': f"Card {i}", 'prices': {'usd': '0.10'}} for i in range(300)]
+CONTENT = json.dumps(CARDS).encode('utf-8')
+
+
+@pytest.fixture
+def standin(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_importer, 'DOWNLOAD_DIR', tmp_path / "cache")
+    with ScryfallStandIn() as server:
+        monkeypatch.setattr(bulk_importer, 'BULK_DATA_API_URL', f"{server.url}/bulk-data")
+        server.add_bulk_file('default_cards', CONTENT)
+        yield server
+
+
+def test_download_is_cached_compressed_and_skipped_when_unchanged(standin):
+    path = _fetch_bulk_file('default_cards')
+
+    assert path.suffix == '.gz'
+    assert gzip.decompress(path.read_bytes()) == CONTENT
+    assert list(_iter_json_array(path)) == CARDS
+    assert len(standin.requests_for('/bulk/')) == 2  # HEAD + GET
+
+    assert _fetch_bulk_file('default_cards') == path
+    assert len(standin.requests_for('/bulk/')) == 2  # Nothing fetched the second time
+
+
+def test_new_version_is_downloaded_again(standin):
+    _fetch_bulk_file('default_cards')
+    updated = CARDS[:10]
+    standin.add_bulk_file('default_cards', json.dumps(updated).encode('utf-8'), updated_at="2025-01-02T09:00:00.000+00:00")
+
+    assert list(_iter_json_array(_fetch_bulk_file('default_cards'))) == updated
+
+
+def test_interrupted_download_is_resumed_with_a_range_request(standin, monkeypatch):
+    monkeypatch.setattr(bulk_importer, 'DOWNLOAD_CHUNK_SIZE', 256)
+    standin.fail_after_bytes = 4096
+
+    path = _fetch_bulk_file('default_cards')
+
+    assert gzip.decompress(path.read_bytes()) == CONTENT
+    downloads = [headers for method, _, headers in standin.requests_for('/bulk/') if method == 'GET']
+    assert len(downloads) == 2
+    assert downloads[1]['Range'] == "bytes=4096-"
+
+
+def test_partial_file_from_a_previous_run_is_resumed(standin):
+    etag = standin.bulk_files['default_cards']['etag']
+    cache_dir = bulk_importer.DOWNLOAD_DIR
+    cache_dir.mkdir()
+    (cache_dir / "default_cards.json.part").write_bytes(CONTENT[:1000])
+    (cache_dir / "manifest.json").write_text(json.dumps({
+        'default_cards': {'partial': {'download_uri': f"{standin.url}/bulk/default_cards.json", 'etag': etag}}
+    }))
+
+    path = _fetch_bulk_file('default_cards')
+
+    assert gzip.decompress(path.read_bytes()) == CONTENT
+    get_headers = [headers for method, _, headers in standin.requests_for('/bulk/') if method == 'GET']
+    assert get_headers[0]['Range'] == "bytes=1000-"
+
+
+def test_pipelined_import_overlaps_stages_and_reports_throughput(standin, tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pipeline.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(bulk_importer, 'engine', engine)
+    monkeypatch.setattr(bulk_importer, 'IMPORT_BATCH_SIZE', 7)
+
+    cards = [
+        {'id': f"printing-{i}", 'oracle_id': f"oracle-{i % 20}", 'name': f"Card {i % 20}", 'set': 'tst',
+         'collector_number': str(i), 'rarity': 'common', 'cmc': 1.0, 'prices': {'usd': '0.10'}}
+        for i in range(100)
+    ]
+    # Scryfall's layout: one card per line
+    content = ("[\n" + ",\n".join(json.dumps(card) for card in cards) + "\n]").encode('utf-8')
+    standin.add_bulk_file('oracle_cards', content)
+    standin.add_bulk_file('default_cards', content)
+
+    report = run_pipelined_import(workers=2)
+
+    assert [(t.table, t.inserted) for t in report.tables] == [('oracle_cards', 20), ('card_printings', 100)]
+    assert [stage.stage for stage in report.stages] == ['download', 'parse', 'map', 'write']
+    assert report.stages[1].amount == 200
+    assert all(stage.seconds > 0 for stage in report.stages)
+    with Session(engine) as session:
+        assert session.query(OracleCard).count() == 20
+        assert session.query(CardPrinting).count() == 100
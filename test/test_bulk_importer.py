@@ -0,0 +1,201 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from core.models import Base, CardPrinting, CardInstance
+from core.utils import bulk_importer
+from core.utils.database_setup import add_missing_indexes
+from core.utils.bulk_importer import _iter_json_array, _iter_batches, _prepare_data_for_bulk_insert, \
+    _import_file_in_batches, _refresh_prices_from_file, _build_shadow_catalog, _swap_in_shadow_catalog, \
+    _shadow_database_path, _iter_mapping_batches
+
+
+def _card(index: int, name: str = None) -> dict:
+    return {
+        'id': f"printing-{index}",
+        'oracle_id': f"oracle-{index}",
+        'name': name or f"Card {index}",
+        'set': 'tst',
+        'collector_number': str(index),
+        'rarity': 'common',
+        'cmc': 1.0,
+        'oracle_text': "{T}: Add {G}. \"Quoted\" text with ] and } inside.",
+        'prices': {'usd': '0.10', 'usd_foil': None},
+    }
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_iter_json_array_streams_elements_across_read_windows(tmp_path, monkeypatch):
+    cards = [_card(i) for i in range(200)]
+    path = tmp_path / "cards.json"
+    path.write_text(json.dumps(cards, indent=2), encoding='utf-8')
+
+    # A tiny read window forces elements to be split across several reads
+    monkeypatch.setattr(bulk_importer, 'STREAM_READ_SIZE', 64)
+
+    assert list(_iter_json_array(path)) == cards
+
+
+def test_iter_json_array_handles_empty_array(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text(" [ ] ", encoding='utf-8')
+    assert list(_iter_json_array(path)) == []
+
+
+def test_oracle_deduplication_holds_across_batches():
+    cards = [_card(1, "Island"), _card(2, "Forest"), _card(3, "Island"), _card(4, "Forest"), _card(5, "Swamp")]
+    seen_names = set()
+
+    mappings = []
+    for batch in _iter_batches(cards, 2):
+        mappings.extend(_prepare_data_for_bulk_insert(batch, 'oracle', seen_names=seen_names))
+
+    assert [m['name'] for m in mappings] == ["Island", "Forest", "Swamp"]
+
+
+def test_incremental_import_only_writes_new_or_changed_rows(tmp_path, db_session):
+    path = tmp_path / "default_cards.json"
+    cards = [_card(i) for i in range(10)]
+    path.write_text(json.dumps(cards), encoding='utf-8')
+
+    assert _import_file_in_batches(db_session, path, 'oracle').inserted == 10
+    first = _import_file_in_batches(db_session, path, 'printing')
+    db_session.commit()
+    assert (first.inserted, first.updated, first.unchanged) == (10, 0, 0)
+
+    cards[3]['prices']['usd'] = '0.25'
+    cards.append(_card(10))
+    path.write_text(json.dumps(cards), encoding='utf-8')
+
+    _import_file_in_batches(db_session, path, 'oracle')
+    second = _import_file_in_batches(db_session, path, 'printing')
+    db_session.commit()
+    assert (second.inserted, second.updated, second.unchanged) == (1, 1, 9)
+    assert db_session.get(CardPrinting, 'printing-3').price_usd == 0.25
+    assert db_session.query(CardPrinting).count() == 11
+
+
+def test_price_refresh_only_touches_prices(tmp_path, db_session):
+    path = tmp_path / "default_cards.json"
+    cards = [_card(i) for i in range(5)]
+    path.write_text(json.dumps(cards), encoding='utf-8')
+    _import_file_in_batches(db_session, path, 'oracle')
+    _import_file_in_batches(db_session, path, 'printing')
+    db_session.commit()
+
+    cards[1]['prices'] = {'usd': '1.50', 'usd_foil': '3.00'}
+    cards[2]['rarity'] = 'mythic'  # Non-price changes must be ignored
+    path.write_text(json.dumps(cards), encoding='utf-8')
+
+    assert _refresh_prices_from_file(db_session.get_bind(), path) == 1
+
+    db_session.expire_all()
+    printing = db_session.get(CardPrinting, 'printing-1')
+    assert (printing.price_usd, printing.price_usd_foil) == (1.5, 3.0)
+    assert db_session.get(CardPrinting, 'printing-2').rarity == 'common'
+
+
+def test_incremental_import_overrides_refreshed_prices(tmp_path, db_session):
+    path = tmp_path / "default_cards.json"
+    cards = [_card(i) for i in range(3)]
+    cards[1]['prices'] = {'usd': '1.00', 'usd_foil': None}
+    path.write_text(json.dumps(cards), encoding='utf-8')
+    _import_file_in_batches(db_session, path, 'oracle')
+    _import_file_in_batches(db_session, path, 'printing')
+    db_session.commit()
+
+    refreshed_path = tmp_path / "refreshed_cards.json"
+    refreshed = json.loads(path.read_text(encoding='utf-8'))
+    refreshed[1]['prices']['usd'] = '5.00'
+    refreshed_path.write_text(json.dumps(refreshed), encoding='utf-8')
+    assert _refresh_prices_from_file(db_session.get_bind(), refreshed_path) == 1
+
+    # The dump still has the prices of the first import; they win over the refreshed ones
+    report = _import_file_in_batches(db_session, path, 'printing')
+    db_session.commit()
+    assert (report.updated, report.unchanged) == (1, 2)
+    db_session.expire_all()
+    assert db_session.get(CardPrinting, 'printing-1').price_usd == 1.0
+
+
+def test_shadow_catalog_is_merged_into_the_live_database(tmp_path, monkeypatch):
+    live_engine = create_engine(f"sqlite:///{tmp_path / 'collection.db'}")
+    Base.metadata.create_all(bind=live_engine)
+    monkeypatch.setattr(bulk_importer, 'engine', live_engine)
+
+    path = tmp_path / "default_cards.json"
+    cards = [_card(i) for i in range(10)]
+    path.write_text(json.dumps(cards[:5]), encoding='utf-8')
+    with Session(live_engine) as session:
+        _import_file_in_batches(session, path, 'oracle')
+        _import_file_in_batches(session, path, 'printing')
+        session.add(CardInstance(printing_id='printing-0'))
+        session.commit()
+
+    cards[1]['prices']['usd'] = '9.99'
+    path.write_text(json.dumps(cards), encoding='utf-8')
+    shadow_path = _shadow_database_path()
+    assert shadow_path.name == "collection.catalog-build.db"
+
+    _build_shadow_catalog(shadow_path, path, path)
+    reports = _swap_in_shadow_catalog(shadow_path)
+
+    assert [(r.table, r.inserted, r.updated, r.unchanged) for r in reports] == [
+        ('oracle_cards', 5, 0, 5), ('card_printings', 5, 1, 4)
+    ]
+    with Session(live_engine) as session:
+        assert session.query(CardPrinting).count() == 10
+        assert session.get(CardPrinting, 'printing-1').price_usd == 9.99
+        assert session.query(CardInstance).one().printing.id == 'printing-0'
+    with live_engine.connect() as connection:
+        analyzed = connection.exec_driver_sql("SELECT DISTINCT tbl FROM sqlite_stat1").scalars().all()
+        assert set(analyzed) >= {'oracle_cards', 'card_printings'}
+
+    # A second swap of the same data copies the statistics and changes nothing
+    _build_shadow_catalog(shadow_path, path, path)
+    assert [r.unchanged for r in _swap_in_shadow_catalog(shadow_path)] == [10, 10]
+
+
+@pytest.mark.parametrize('layout', ['one_per_line', 'pretty_printed'])
+def test_parallel_mapping_matches_sequential_mapping(tmp_path, monkeypatch, layout):
+    monkeypatch.setattr(bulk_importer, 'IMPORT_BATCH_SIZE', 9)
+    cards = [_card(i, name=f"Card {i % 13}") for i in range(100)]
+    path = tmp_path / "cards.json"
+    if layout == 'one_per_line':
+        path.write_text("[\n" + ",\n".join(json.dumps(card) for card in cards) + "\n]", encoding='utf-8')
+    else:
+        path.write_text(json.dumps(cards, indent=2), encoding='utf-8')
+
+    for model_type in ('oracle', 'printing'):
+        sequential = [m for batch in _iter_mapping_batches(path, model_type, workers=1) for m in batch]
+        parallel = [m for batch in _iter_mapping_batches(path, model_type, workers=3) for m in batch]
+        assert parallel == sequential
+
+    assert len(sequential) == 100
+    assert [m['name'] for batch in _iter_mapping_batches(path, 'oracle', workers=3) for m in batch] == \
+        [f"Card {i}" for i in range(13)]
+
+
+def test_missing_indexes_are_added_to_existing_databases():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_card_printings_set_code")
+
+    assert add_missing_indexes(engine) == ['ix_card_printings_set_code']
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT id FROM card_printings WHERE set_code = 'tst'"
+        ).all()
+    assert 'ix_card_printings_set_code' in plan[0][-1]
+    # Running it again on an up-to-date database is a no-op
+    assert add_missing_indexes(engine) == []
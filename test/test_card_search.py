@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from core.api.scryfall_client import ScryfallClient
+from core.models import OracleCard, CardPrinting, CardInstance, CARD_SEARCH_TABLE, CARD_SEARCH_TRIGGERS
+from core.repo.collection_repository import CollectionRepository, card_search_expression
+from core.utils.bulk_importer import _import_file_in_batches
+from core.utils.database_setup import upgrade_database
+
+CARDS = [
+    ("Sol Ring", "Artifact", "{T}: Add {C}{C}."),
+    ("Ring of Three Wishes", "Artifact", "{5}, {T}, Remove a wish counter from Ring of Three Wishes: "
+                                         "Search your library for a card, put that card into your hand, "
+                                         "then shuffle."),
+    ("Spider-Man 2099", "Legendary Creature — Spider Human Hero", "Double strike. {2}{R}: Deal 2 damage."),
+    ("Lim-Dûl's Vault", "Instant", "Look at the top five cards of your library."),
+    ("Fire // Ice", "Instant // Instant", "Fire deals 2 damage divided as you choose. Costs {W/U} less."),
+]
+
+
+def _scryfall_card(index: int, name: str, type_line: str, oracle_text: str) -> dict:
+    return {
+        'id': f"printing-{index}", 'oracle_id': f"oracle-{index}", 'name': name, 'set': 'tst',
+        'collector_number': str(index), 'rarity': 'common', 'cmc': 1.0, 'type_line': type_line,
+        'oracle_text': oracle_text, 'prices': {'usd': None, 'usd_foil': None},
+    }
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    upgrade_database(engine)
+    with Session(engine) as session:
+        for index, (name, type_line, oracle_text) in enumerate(CARDS):
+            session.add_all([
+                OracleCard(id=f"oracle-{index}", name=name, type_line=type_line, oracle_text=oracle_text, cmc=1.0),
+                CardPrinting(id=f"printing-{index}", oracle_card_id=f"oracle-{index}", set_code="tst",
+                             collector_number=str(index)),
+                CardInstance(printing_id=f"printing-{index}"),
+            ])
+        session.commit()
+        yield session
+
+
+def _search(session: Session, **filters) -> list:
+    repository = CollectionRepository(session, ScryfallClient(session, offline=True))
+    return [card.name for card, *_ in repository.view_collection_summary(filters)]
+
+
+def test_search_expression_matches_every_word_as_a_prefix():
+    assert card_search_expression({'name': " sol  ri ", 'colors': ['G']}) == 'name : ("sol"* "ri"*)'
+    assert card_search_expression({'name': 'say "hi"', 'oracle_text': "{T}:"}) == \
+        'name : ("say"* """hi"""*) AND oracle_text : ("{T}:"*)'
+    assert card_search_expression({'name': "  ", 'type_line': ""}) is None
+
+
+def test_card_text_is_tokenized_for_symbols_hyphens_and_accents(db_session):
+    assert _search(db_session, oracle_text="{T}") == ["Sol Ring", "Ring of Three Wishes"]
+    assert _search(db_session, oracle_text="{R}:") == ["Spider-Man 2099"]
+    assert _search(db_session, oracle_text="{w/u}") == ["Fire // Ice"]
+    assert _search(db_session, name="spider-man") == ["Spider-Man 2099"]
+    assert _search(db_session, name="lim-dul's") == ["Lim-Dûl's Vault"]
+    assert _search(db_session, name="fire // ice") == ["Fire // Ice"]
+    assert _search(db_session, name="spi", type_line="legendary creature") == ["Spider-Man 2099"]
+    assert _search(db_session, name="vault", type_line="creature") == []
+
+
+def test_matches_are_ranked_by_relevance(db_session):
+    # Alphabetically 'Ring of Three Wishes' would come first, but 'Sol Ring' is the closer match
+    assert _search(db_session, name="ring") == ["Sol Ring", "Ring of Three Wishes"]
+    assert _search(db_session, oracle_text="damage") == ["Spider-Man 2099", "Fire // Ice"]
+    # Also when a set code filter aggregates the copies of that set
+    assert _search(db_session, name="ring", set_code="tst") == ["Sol Ring", "Ring of Three Wishes"]
+    assert _search(db_session, type_line="instant", oracle_text="damage", set_code="TST") == ["Fire // Ice"]
+    assert _search(db_session, name="ring", set_code="alt") == []
+    # Without a text filter, the summary stays in alphabetical order
+    assert _search(db_session)[:2] == ["Fire // Ice", "Lim-Dûl's Vault"]
+
+
+def test_search_index_follows_changes_to_the_catalog(db_session, tmp_path):
+    db_session.get(OracleCard, "oracle-0").oracle_text = "{T}: Add {C}{C}{C}."
+    db_session.delete(db_session.get(OracleCard, "oracle-4"))
+    db_session.flush()
+    assert _search(db_session, oracle_text="{c}{c}{c}") == ["Sol Ring"]
+    assert _search(db_session, name="fire") == []
+
+    # The bulk importer's upserts are indexed as well
+    path = tmp_path / "oracle_cards.json"
+    path.write_text(json.dumps([_scryfall_card(1, "Ring of Four Wishes", "Artifact", "Draw a card.")]),
+                    encoding='utf-8')
+    _import_file_in_batches(db_session, path, 'oracle')
+    assert _search(db_session, name="four") == ["Ring of Four Wishes"]
+    assert _search(db_session, name="three") == []
+
+
+def test_search_index_is_built_when_installed_on_an_existing_catalog(db_session):
+    connection = db_session.connection()
+    for name in CARD_SEARCH_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER {name}")
+    connection.exec_driver_sql(f"DROP TABLE {CARD_SEARCH_TABLE}")
+    db_session.commit()
+
+    upgrade_database(db_session.get_bind())
+
+    assert _search(db_session, name="sol") == ["Sol Ring"]
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from core.models import Base, OracleCard, CardPrinting
+from core.utils import catalog_snapshot
+from core.utils.bulk_importer import _iter_batches
+from core.utils.catalog_snapshot import export_snapshot, load_snapshot
+from core.utils.database_setup import existing_index_names
+
+
+def _catalog_rows(db_engine):
+    with db_engine.connect() as connection:
+        return {
+            model.__tablename__: connection.execute(select(model.__table__).order_by(model.__table__.c.id)).all()
+            for model in (OracleCard, CardPrinting)
+        }
+
+
+def _write_catalog(db_engine, count: int) -> None:
+    Base.metadata.create_all(bind=db_engine)
+    with Session(db_engine) as session:
+        for i in range(count):
+            session.add(OracleCard(id=f"oracle-{i}", name=f"Card {i} — Æther", cmc=float(i % 7),
+                                   type_line="Creature — Elf", color_identity="G" if i % 2 else "",
+                                   oracle_text=None if i % 3 else "{T}: Add {G}.", content_hash=f"hash-{i}"))
+            session.add(CardPrinting(id=f"printing-{i}", oracle_card_id=f"oracle-{i}", set_code=f"s{i % 3}",
+                                     collector_number=str(i), rarity='common', artist=None if i % 5 else "Artist",
+                                     price_usd=None if i % 4 else i / 10, price_usd_foil=1.5))
+        session.commit()
+
+
+def test_snapshot_round_trip_restores_the_catalog(tmp_path):
+    source = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    _write_catalog(source, 40)
+
+    snapshot_path = tmp_path / "catalog.snapshot"
+    assert export_snapshot(source, snapshot_path) == {'oracle_cards': 40, 'card_printings': 40}
+
+    # A brand new database file gets its tables created by the load
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    reports = load_snapshot(target, snapshot_path)
+
+    assert [(report.table, report.inserted) for report in reports] == [('oracle_cards', 40), ('card_printings', 40)]
+    assert _catalog_rows(target) == _catalog_rows(source)
+
+
+def test_load_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-snapshot.json"
+    path.write_text("[]", encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_snapshot(create_engine("sqlite://"), path)
+
+
+def test_failed_load_keeps_the_previous_catalog(tmp_path, monkeypatch):
+    source = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    _write_catalog(source, 5)
+    snapshot_path = tmp_path / "catalog.snapshot"
+    export_snapshot(source, snapshot_path)
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    _write_catalog(target, 3)
+    previous = _catalog_rows(target)
+    indexes = existing_index_names(target, 'card_printings')
+
+    # The load fails after all Oracle cards and some of the printings were inserted
+    batches_read = 0
+
+    def failing_batches(rows, size):
+        nonlocal batches_read
+        for batch in _iter_batches(rows, size):
+            batches_read += 1
+            if batches_read == 5:
+                raise OSError("Snapshot truncated")
+            yield batch
+
+    monkeypatch.setattr(catalog_snapshot, 'IMPORT_BATCH_SIZE', 2)
+    monkeypatch.setattr(catalog_snapshot, '_iter_batches', failing_batches)
+    with pytest.raises(OSError):
+        load_snapshot(target, snapshot_path)
+
+    assert _catalog_rows(target) == previous
+    assert existing_index_names(target, 'card_printings') == indexes
@@ -0,0 +1,124 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from core.api.scryfall_client import ScryfallClient
+from core.models import OracleCard, CardPrinting, CardInstance, CollectionSummary, \
+    COLLECTION_SUMMARY_TRIGGERS, rebuild_collection_summary
+from core.repo.collection_repository import CollectionRepository
+from core.repo.deck_repository import DeckRepository
+from core.utils.database_setup import upgrade_database
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    upgrade_database(engine)
+    with Session(engine) as session:
+        # Two printings of 'Card 1', whose second printing has the smaller image URI
+        session.add_all([
+            OracleCard(id="oracle-1", name="Card 1", cmc=1.0, type_line="Instant", color_identity="U"),
+            OracleCard(id="oracle-2", name="Card 2", cmc=2.0, type_line="Creature", color_identity="G"),
+            CardPrinting(id="printing-1", oracle_card_id="oracle-1", set_code="tst", collector_number="1",
+                         image_uri_normal="https://img/b.jpg"),
+            CardPrinting(id="printing-2", oracle_card_id="oracle-1", set_code="alt", collector_number="2",
+                         image_uri_normal="https://img/a.jpg"),
+            CardPrinting(id="printing-3", oracle_card_id="oracle-2", set_code="tst", collector_number="3",
+                         image_uri_normal="https://img/c.jpg"),
+        ])
+        session.commit()
+        yield session
+
+
+def _summary(session: Session) -> dict:
+    session.flush()
+    return {
+        row.oracle_card_id: (row.total_owned, row.available_count, row.image_uri)
+        for row in session.query(CollectionSummary.oracle_card_id, CollectionSummary.total_owned,
+                                 CollectionSummary.available_count, CollectionSummary.image_uri)
+    }
+
+
+def _assert_summary_is_current(session: Session) -> None:
+    """The incrementally maintained summary must match one recomputed from scratch."""
+    maintained = _summary(session)
+    rebuild_collection_summary(session.connection())
+    assert _summary(session) == maintained
+
+
+@pytest.mark.parametrize("stack_copies", [False, True], ids=["one-row-per-copy", "stacked-copies"])
+def test_summary_follows_every_write_to_the_collection(db_session, stack_copies):
+    collection = CollectionRepository(db_session, ScryfallClient(db_session, offline=True), stack_copies=stack_copies)
+    decks = DeckRepository(db_session, collection.scryfall_client)
+
+    added = collection.add_cards_from_list_transactional([
+        "3 Card 1 (TST) 1", "Card 1 (ALT) 2", "2 Card 2 (TST) 3 *F*"
+    ])["successes"]
+    assert _summary(db_session) == {
+        "oracle-1": (4, 4, "https://img/a.jpg"),
+        "oracle-2": (2, 2, "https://img/c.jpg"),
+    }
+    _assert_summary_is_current(db_session)
+
+    deck = decks.create_deck("Test Deck")
+    db_session.flush()
+    decks.assemble_deck(deck.id, added[:2] + added[4:5])
+    assert _summary(db_session) == {
+        "oracle-1": (4, 2, "https://img/a.jpg"),
+        "oracle-2": (2, 1, "https://img/c.jpg"),
+    }
+    _assert_summary_is_current(db_session)
+
+    # The last copy of the printing with the representative image goes
+    collection.delete_card_instance(added[3])
+    collection.update_card_instance(added[2], {'condition': "Played"})
+    assert _summary(db_session)["oracle-1"] == (3, 1, "https://img/b.jpg")
+    _assert_summary_is_current(db_session)
+
+    decks.disassemble_deck(deck.id)
+    db_session.flush()
+    for instance in db_session.query(CardInstance).filter_by(printing_id="printing-3").all():
+        for _ in range(instance.quantity):
+            collection.delete_card_instance(instance.id)
+    assert _summary(db_session) == {"oracle-1": (3, 3, "https://img/b.jpg")}
+    _assert_summary_is_current(db_session)
+
+
+def test_summary_view_applies_the_filters(db_session):
+    collection = CollectionRepository(db_session, ScryfallClient(db_session, offline=True))
+    decks = DeckRepository(db_session, collection.scryfall_client)
+    added = collection.add_cards_from_list_transactional(["3 Card 1 (TST) 1", "Card 1 (ALT) 2", "Card 2 (TST) 3"])
+    deck = decks.create_deck("Test Deck")
+    db_session.flush()
+    decks.assemble_deck(deck.id, added["successes"][:1])
+
+    def view(**filters):
+        return [(card.name, total, available, image)
+                for card, total, available, image in collection.view_collection_summary(filters)]
+
+    assert view() == [("Card 1", 4, 3, "https://img/a.jpg"), ("Card 2", 1, 1, "https://img/c.jpg")]
+    assert view(colors=['G']) == [("Card 2", 1, 1, "https://img/c.jpg")]
+    assert view(availability='Only Available') == [("Card 1", 3, 3, "https://img/a.jpg"),
+                                                   ("Card 2", 1, 1, "https://img/c.jpg")]
+    assert view(availability='Only Allocated') == [("Card 1", 1, 0, "https://img/a.jpg")]
+    # A set code only counts the copies of that set
+    assert view(set_code='tst') == [("Card 1", 3, 2, "https://img/b.jpg"), ("Card 2", 1, 1, "https://img/c.jpg")]
+    assert view(set_code='alt', availability='Only Allocated') == []
+
+
+def test_summary_is_filled_when_installed_on_an_existing_collection(db_session):
+    db_session.add_all([CardInstance(printing_id="printing-1", quantity=2), CardInstance(printing_id="printing-3")])
+    db_session.commit()
+    # As in a database created before the summary existed
+    connection = db_session.connection()
+    for name in COLLECTION_SUMMARY_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER {name}")
+    connection.exec_driver_sql("DELETE FROM collection_summary")
+    db_session.commit()
+
+    upgrade_database(db_session.get_bind())
+
+    assert _summary(db_session) == {
+        "oracle-1": (2, 2, "https://img/b.jpg"),
+        "oracle-2": (1, 1, "https://img/c.jpg"),
+    }
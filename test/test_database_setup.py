@@ -0,0 +1,175 @@
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import Session
+
+from core.models import OracleCard, CardPrinting, CardInstance, CollectionSummary, Deck, BlueprintEntry
+from core.repo.enums import DeckStatus
+from core.services import MagicCardService
+from core.utils.database_setup import MIGRATIONS, existing_index_names, run_migrations, upgrade_database
+
+BASELINE_SCHEMA = Path(__file__).parent / "fixtures" / "baseline_schema.sql"
+
+
+@pytest.fixture
+def service():
+    engine = create_engine("sqlite://")
+    upgrade_database(engine)
+    with Session(engine) as session:
+        session.add_all([
+            OracleCard(id="oracle-1", name="Æther Vial", cmc=1.0, type_line="Artifact", color_identity=""),
+            OracleCard(id="oracle-2", name="Sol Ring", cmc=1.0, type_line="Artifact", color_identity=""),
+            CardPrinting(id="printing-1", oracle_card_id="oracle-1", set_code="dst", collector_number="91"),
+            CardPrinting(id="printing-2", oracle_card_id="oracle-2", set_code="c21", collector_number="263"),
+            Deck(id=1, name="Blueprint", status=DeckStatus.BLUEPRINT),
+            Deck(id=2, name="Assembled", status=DeckStatus.ASSEMBLED),
+            BlueprintEntry(deck_id=1, oracle_card_id="oracle-1", quantity=1),
+            BlueprintEntry(deck_id=1, oracle_card_id="oracle-2", quantity=2),
+            CardInstance(printing_id="printing-1"),
+            CardInstance(printing_id="printing-2", quantity=2),
+            CardInstance(printing_id="printing-2", deck_id=2),
+        ])
+        session.commit()
+        yield MagicCardService(offline=True, db_session=session)
+
+
+def _query_plans(session: Session, call: Callable) -> List[str]:
+    """Runs `call` and returns the EXPLAIN QUERY PLAN of every query it sent, one string per statement."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    engine = session.get_bind()
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        call()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    connection = session.connection()
+    return [
+        " | ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+        for statement, parameters in statements
+    ]
+
+
+def _assert_no_full_scans(plans: List[str]) -> None:
+    for table in ('card_instances', 'card_printings', 'blueprint_entries'):
+        assert not any(f"SCAN {table}" in plan for plan in plans), plans
+
+
+def test_collection_summary_does_not_touch_the_instances(service):
+    plans = _query_plans(service.db_session, lambda: service.get_collection_summary({'name': "Ring"}))
+
+    _assert_no_full_scans(plans)
+    assert not any("card_instances" in plan for plan in plans)
+
+
+def test_blueprint_analysis_counts_copies_from_the_covering_index(service):
+    plans = _query_plans(service.db_session, lambda: service.get_deck_blueprint_analysis(1))
+
+    _assert_no_full_scans(plans)
+    assert any("ix_card_printings_oracle_card_id" in plan
+               and "COVERING INDEX ix_card_instances_printing_deck" in plan for plan in plans)
+
+
+def test_assembly_options_search_the_available_copies_by_printing(service):
+    plans = _query_plans(service.db_session, lambda: service.get_assembly_options(1))
+
+    _assert_no_full_scans(plans)
+    assert any("ix_card_instances_printing_deck (printing_id=? AND deck_id=?)" in plan for plan in plans)
+
+
+def test_deck_lookups_use_the_deck_indexes(service):
+    plans = _query_plans(service.db_session, lambda: (
+        service.deck_repo.update_blueprint_entry_quantity(1, "oracle-2", 3),
+        service.get_assembled_deck_contents(2),
+    ))
+
+    _assert_no_full_scans(plans)
+    assert any("ix_blueprint_entries_deck_oracle (deck_id=? AND oracle_card_id=?)" in plan for plan in plans)
+    assert any("ix_card_instances_deck_id (deck_id=?)" in plan for plan in plans)
+
+
+def test_names_are_looked_up_case_insensitively_through_the_folded_name(service):
+    client = service.scryfall_client
+    plans = _query_plans(service.db_session, lambda: client.get_oracle_card_by_name("æTHER VIAL"))
+
+    assert any("ix_oracle_cards_name_folded (name_folded=?)" in plan for plan in plans)
+    assert client.get_oracle_card_by_name("æTHER VIAL").id == "oracle-1"
+    assert set(client.get_oracle_cards_by_name(["SOL RING", "æther vial"])) == {"SOL RING", "æther vial"}
+
+
+def test_databases_of_older_versions_are_migrated():
+    engine = create_engine("sqlite://")
+    upgrade_database(engine)
+    # The schema of the first release, without name_folded and the new indexes, at user_version 0
+    with engine.begin() as connection:
+        for index in ('ix_oracle_cards_name_folded', 'ix_card_instances_printing_deck', 'ix_card_instances_deck_id',
+                      'ix_card_printings_oracle_card_id', 'ix_blueprint_entries_deck_oracle'):
+            connection.exec_driver_sql(f"DROP INDEX {index}")
+        connection.exec_driver_sql("ALTER TABLE oracle_cards DROP COLUMN name_folded")
+        connection.exec_driver_sql("INSERT INTO oracle_cards (id, name, cmc) VALUES ('oracle-1', 'Æther Vial', 1)")
+        connection.exec_driver_sql("PRAGMA user_version = 0")
+
+    upgrade_database(engine)
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA user_version").scalar() == len(MIGRATIONS)
+        assert connection.exec_driver_sql("SELECT name_folded FROM oracle_cards").scalar() == "æther vial"
+    assert existing_index_names(engine, 'oracle_cards') >= {'ix_oracle_cards_name_folded'}
+    assert existing_index_names(engine, 'card_instances') == {
+        'ix_card_instances_id', 'ix_card_instances_deck_id', 'ix_card_instances_printing_deck'
+    }
+    assert 'name_folded' in {column['name'] for column in inspect(engine).get_columns('oracle_cards')}
+    # An up-to-date database is left alone
+    assert run_migrations(engine) == []
+
+
+def test_collections_of_the_first_release_are_upgraded():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.connection.executescript(BASELINE_SCHEMA.read_text(encoding='utf-8'))
+        connection.exec_driver_sql(
+            "INSERT INTO oracle_cards (id, name, cmc, type_line, oracle_text, color_identity) VALUES "
+            "('oracle-1', 'Sol Ring', 1, 'Artifact', '{T}: Add {C}{C}.', ''), "
+            "('oracle-2', 'Llanowar Elves', 1, 'Creature — Elf Druid', '{T}: Add {G}.', 'G')"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO card_printings (id, oracle_card_id, set_code, collector_number) VALUES "
+            "('printing-1', 'oracle-1', 'c21', '263'), ('printing-2', 'oracle-2', 'm19', '314')"
+        )
+        connection.exec_driver_sql("INSERT INTO decks (id, name, status) VALUES (1, 'Elves', 'ASSEMBLED')")
+        connection.exec_driver_sql(
+            "INSERT INTO card_instances (printing_id, deck_id) VALUES "
+            "('printing-1', NULL), ('printing-1', NULL), ('printing-2', NULL), ('printing-2', 1)"
+        )
+
+    upgrade_database(engine)
+
+    with Session(engine) as session:
+        assert {row.oracle_card_id: (row.total_owned, row.available_count)
+                for row in session.query(CollectionSummary)} == {"oracle-1": (2, 2), "oracle-2": (2, 1)}
+        # The summary keeps following the collection
+        session.add(CardInstance(printing_id="printing-2"))
+        session.commit()
+        assert session.get(CollectionSummary, "oracle-2").total_owned == 3
+
+        collection = MagicCardService(offline=True, db_session=session).collection_repo
+        assert [card.name for card, *_ in collection.view_collection_summary({'oracle_text': "{G}"})] == \
+            ["Llanowar Elves"]
+
+
+def test_text_filters_are_answered_by_the_full_text_index(service):
+    plans = _query_plans(service.db_session, lambda: service.get_collection_summary(
+        {'name': "Vial", 'oracle_text': "{T}"}
+    ))
+
+    assert len(plans) == 1
+    # The index finds the matches; only their Oracle cards are read, by rowid
+    assert plans[0].startswith("MATERIALIZE matches | SCAN oracle_cards_fts VIRTUAL TABLE INDEX 0:M")
+    assert "SCAN matches | SEARCH oracle_cards USING INTEGER PRIMARY KEY (rowid=?)" in plans[0]
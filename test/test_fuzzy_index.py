@@ -0,0 +1,48 @@
+import pytest
+
+from core.api.fuzzy_index import FuzzyNameIndex, normalize_name
+
+CARDS = [
+    ("sol-ring", "Sol Ring"),
+    ("sol-talisman", "Sol Talisman"),
+    ("delver", "Delver of Secrets // Insectile Aberration"),
+    ("fire-ice", "Fire // Ice"),
+    ("jace", "Jace, Vryn's Prodigy // Jace, Telepath Unbound"),
+    ("vault", "Lim-Dûl's Vault"),
+    ("vial", "Æther Vial"),
+    ("nalia", "Nalia de'Arnise"),
+    ("fish", "Island Fish Jasconius"),
+    ("sanctuary", "Island Sanctuary"),
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return FuzzyNameIndex(CARDS)
+
+
+def test_normalize_name_folds_case_accents_and_punctuation():
+    assert normalize_name("  Lim-Dûl's   VAULT ") == "lim duls vault"
+    assert normalize_name("Æther Vial") == "aether vial"
+
+
+@pytest.mark.parametrize("query, oracle_id", [
+    ("sol ring", "sol-ring"),             # Exact, ignoring case
+    ("Sol Rnig", "sol-ring"),             # Typo
+    ("sol talsman", "sol-talisman"),
+    ("Insectile Aberation", "delver"),    # Back face with a typo
+    ("Delver", "delver"),                 # Word prefix of one card's names
+    ("island fish", "fish"),
+    ("ice", "fire-ice"),                  # Split card half
+    ("Jace Vryns Prodigy", "jace"),       # Punctuation
+    ("Lim-Dul's Vault", "vault"),         # Accents
+    ("aether vial", "vial"),
+    ("Nalia de Arnise", "nalia"),
+])
+def test_match_finds_plausible_candidates(index, query, oracle_id):
+    assert index.match(query) == oracle_id
+
+
+@pytest.mark.parametrize("query", ["Sol", "Island", "Lightning Bolt", "", "xyzzy"])
+def test_match_returns_none_without_a_plausible_candidate(index, query):
+    assert index.match(query) is None
@@ -0,0 +1,43 @@
+import pytest
+
+from core.api.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def test_token_bucket_only_throttles_when_the_rate_is_exceeded():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=2, clock=clock, sleep=clock.sleep)
+
+    # A burst up to the capacity goes through immediately...
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    # ...after which requests are spaced at the configured rate
+    assert bucket.acquire() == 0.1
+    assert bucket.acquire() == 0.1
+    assert clock.now == 0.2
+
+    # After an idle period there is nothing to wait for
+    clock.now += 5
+    assert bucket.acquire() == 0.0
+
+
+def test_token_bucket_does_not_burst_by_default():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, clock=clock, sleep=clock.sleep)
+
+    # Even a fresh bucket spaces the requests at the rate
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.1, 0.1]
+    clock.now += 5
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.1]
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=10, capacity=0.5)
@@ -0,0 +1,409 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from core.api.lookup_cache import LookupCache, invalidate_lookup_caches
+from core.api.rate_limiter import TokenBucket
+from core.api.response_cache import ResponseCache
+from core.api import negative_cache, scryfall_client
+from core.api.scryfall_client import ScryfallClient
+from core.exceptions import CardNotFoundError
+from core.models import OracleCard, CardPrinting, CardInstance, Deck, BlueprintEntry, FailedLookup
+from core.repo.collection_repository import CollectionRepository
+from core.repo.deck_repository import DeckRepository
+from core.repo.enums import DeckStatus
+from core.utils.database_setup import upgrade_database
+from scryfall_standin import ScryfallStandIn
+
+
+def _card(index: int, name: str = None, oracle_index: int = None) -> dict:
+    oracle_index = index if oracle_index is None else oracle_index
+    return {
+        'id': f"printing-{index}",
+        'oracle_id': f"oracle-{oracle_index}",
+        'name': name or f"Card {oracle_index}",
+        'set': 'tst',
+        'collector_number': str(index),
+        'rarity': 'common',
+        'cmc': 1.0,
+        'type_line': 'Instant',
+        'prices': {'usd': '0.10', 'usd_foil': None},
+    }
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    upgrade_database(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def standin():
+    with ScryfallStandIn() as server:
+        yield server
+
+
+def test_batch_printing_lookup_only_sends_local_misses_in_chunks(db_session, standin, monkeypatch):
+    standin.add_cards([_card(i) for i in range(1, 100)])
+    # Two printings of the same card, so the Oracle card must be created once
+    standin.add_cards([_card(100, oracle_index=1)])
+    db_session.add(OracleCard(id="oracle-0", name="Card 0", cmc=1.0))
+    db_session.add(CardPrinting(id="printing-0", oracle_card_id="oracle-0", set_code="tst", collector_number="0"))
+    db_session.commit()
+
+    client = ScryfallClient(db_session, base_url=standin.url)
+    for module in (scryfall_client, negative_cache):
+        monkeypatch.setattr(module, 'IN_QUERY_BATCH_SIZE', 40)
+    parameter_counts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT"):
+            parameter_counts.append(len(parameters))
+
+    event.listen(db_session.get_bind(), 'before_cursor_execute', record)
+    identifiers = [("TST", str(i)) for i in range(101)] + [("tst", "999")]
+    printings = client.get_printings_by_set_and_number(identifiers)
+    db_session.commit()
+
+    assert len(printings) == 101
+    assert ("tst", "999") not in printings
+    assert printings[("tst", "100")].oracle_card is printings[("tst", "1")].oracle_card
+    # 101 misses are sent as 75 + 26 identifiers; the local printing is never requested
+    assert [method for method, _, _ in standin.requests_for('/cards/collection')] == ['POST', 'POST']
+    assert db_session.query(CardPrinting).count() == 101
+    assert db_session.query(OracleCard).count() == 100
+    # Every local IN (...) query was split into chunks (the set code adds one parameter)
+    assert max(parameter_counts) <= 41
+
+
+def test_batch_name_lookup_matches_local_cards_and_card_faces(db_session, standin):
+    standin.add_cards([_card(1, name="Delver of Secrets // Insectile Aberration"), _card(2, name="Opt")])
+    db_session.add(OracleCard(id="oracle-0", name="Sol Ring", cmc=1.0))
+    db_session.commit()
+
+    client = ScryfallClient(db_session, base_url=standin.url)
+    oracle_cards = client.get_oracle_cards_by_name(["sol ring", "Delver of Secrets", "Opt", "Nonexistent"])
+
+    assert {name: card.id for name, card in oracle_cards.items()} == {
+        "sol ring": "oracle-0", "Delver of Secrets": "oracle-1", "Opt": "oracle-2"
+    }
+    assert len(standin.requests_for('/cards/collection')) == 1
+
+
+def test_list_import_resolves_all_lines_in_one_batch(db_session, standin):
+    standin.add_cards([_card(i) for i in range(1, 4)])
+    repository = CollectionRepository(db_session, ScryfallClient(db_session, base_url=standin.url))
+
+    result = repository.add_cards_from_list_transactional([
+        "2 Card 1 (TST) 1", "Card 2 (TST) 2 *F*", "Wrong Name (TST) 3", "1 Missing (TST) 42", "not a card line"
+    ])
+    db_session.commit()
+
+    assert len(result['successes']) == 3
+    assert sorted(result['failures']) == ["1 Missing (TST) 42", "Wrong Name (TST) 3", "not a card line"]
+    instances = db_session.query(CardInstance).filter(CardInstance.id.in_(result['successes'])).all()
+    assert sorted((instance.printing_id, instance.is_foil) for instance in instances) == [
+        ("printing-1", False), ("printing-1", False), ("printing-2", True)
+    ]
+    assert all(instance.condition == "Near Mint" and instance.date_added for instance in instances)
+    assert len(standin.requests_for('/cards/collection')) == 1
+
+
+def test_transient_errors_are_retried_on_the_pooled_session(db_session, standin):
+    standin.add_cards([_card(1)])
+    standin.error_statuses = [503, 429]
+    client = ScryfallClient(db_session, base_url=standin.url)
+
+    printings = client.get_printings_by_set_and_number([("tst", "1")])
+
+    assert list(printings) == [("tst", "1")]
+    assert (client.stats.requests, client.stats.retries) == (1, 2)
+
+
+def test_random_errors_are_injected_reproducibly_and_retried():
+    def run(seed: int) -> int:
+        engine = create_engine("sqlite://")
+        upgrade_database(engine)
+        with ScryfallStandIn(seed=seed) as standin, Session(engine) as db_session:
+            standin.load_fixture("cards.json")
+            standin.error_rate = 0.2
+            client = ScryfallClient(db_session, base_url=standin.url, limiter=TokenBucket(1000))
+            for card in standin.cards:
+                assert client.get_printing_by_set_and_number(card['set'], card['collector_number']).id == card['id']
+            assert client.stats.retries == standin.injected_errors
+            return standin.injected_errors
+
+    injected_errors = run(seed=3)
+    assert injected_errors > 0
+    assert run(seed=3) == injected_errors
+
+
+def test_blueprint_names_are_resolved_concurrently_within_the_rate_limit(db_session, standin, monkeypatch):
+    standin.add_cards([_card(i, name=f"Unknown Card {i}") for i in range(20)])
+    standin.latency = 0.2
+    db_session.add(Deck(name="Test Deck", status=DeckStatus.BLUEPRINT))
+    db_session.commit()
+    limiter = TokenBucket(rate=50, capacity=1)
+    repository = DeckRepository(db_session, ScryfallClient(db_session, base_url=standin.url, limiter=limiter))
+
+    started = time.perf_counter()
+    result = repository.add_cards_to_blueprint_transactional(
+        1, [f"2 unknown card {i}" for i in range(20)] + ["1 Unknown Card 3", "1 Not A Real Card"]
+    )
+    elapsed = time.perf_counter() - started
+    db_session.commit()
+
+    assert result == {'failures': ["Not A Real Card"]}
+    assert {entry.oracle_card_id: entry.quantity for entry in db_session.query(BlueprintEntry)}[
+        "oracle-3"] == 3
+    assert db_session.query(BlueprintEntry).count() == 20
+    # Serially, 21 lookups of 0.2s would take over 4s; the rate limit alone allows ~0.4s
+    assert len(standin.requests_for('/cards/named')) == 21
+    assert elapsed < 2.0
+
+
+def test_failed_lookups_are_remembered_across_rollbacks_until_they_expire(db_session, standin):
+    standin.add_cards([_card(1)])
+    client = ScryfallClient(db_session, base_url=standin.url)
+
+    with pytest.raises(CardNotFoundError):
+        client.get_printing_by_set_and_number("TST", "404")
+    # The service rolls back after a failed lookup; the failure must still be remembered
+    db_session.rollback()
+    assert db_session.query(FailedLookup.key).all() == [("printing:tst/404",)]
+
+    with pytest.raises(CardNotFoundError):
+        client.get_printing_by_set_and_number("tst", " 404 ")
+    assert client.get_printings_by_set_and_number([("tst", "1"), ("tst", "404"), ("tst", "405")]).keys() == \
+        {("tst", "1")}
+    db_session.commit()
+    assert len(standin.requests_for('/cards/tst/404')) == 1
+    assert len(standin.requests_for('/cards/collection')) == 1
+    assert (client.negative_cache.hits, client.negative_cache.misses) == (2, 3)
+
+    # Once expired, the lookup goes to the network again
+    db_session.query(FailedLookup).update({FailedLookup.failed_at: datetime.now() - timedelta(days=2)})
+    db_session.commit()
+    with pytest.raises(CardNotFoundError):
+        client.get_printing_by_set_and_number("tst", "404")
+    assert len(standin.requests_for('/cards/tst/404')) == 2
+
+
+def test_misspelled_names_are_matched_against_the_local_catalog(db_session, standin):
+    standin.add_cards([_card(2, name="Lightning Bolt")])
+    # As imported from Scryfall's bulk data
+    db_session.add(OracleCard(id="oracle-1", name="Delver of Secrets // Insectile Aberration", cmc=1.0,
+                              content_hash="hash-1"))
+    db_session.commit()
+    client = ScryfallClient(db_session, base_url=standin.url)
+
+    assert client.get_oracle_card_by_name("delver of secrest").id == "oracle-1"
+    assert client.get_oracle_cards_by_name(["Insectile Aberation", "Lightning Bolt"], fuzzy=True) == {
+        "Insectile Aberation": db_session.get(OracleCard, "oracle-1"),
+        "Lightning Bolt": db_session.get(OracleCard, "oracle-2"),
+    }
+    # Only the card missing from the catalog went to the network; it is now in the index too
+    assert len(standin.requests_for('/cards/named')) == 1
+    assert client.get_oracle_card_by_name("Lightning Blot").id == "oracle-2"
+    assert len(standin.requests_for('/cards/named')) == 1
+
+
+def test_names_missing_from_a_partial_catalog_are_left_to_scryfall(db_session, standin):
+    # Only cards looked up before are cached, each a near neighbour of a card that is not
+    neighbours = {"Shock": "Shock Troops", "Island": "Island Fish Jasconius",
+                  "Llanowar Elite": "Llanowar Elves", "Lightning Blast": "Lightning Bolt"}
+    standin.add_cards([_card(index, name=name) for index, name in enumerate(neighbours, start=1)])
+    db_session.add_all([OracleCard(id=f"cached-{index}", name=name, cmc=1.0)
+                        for index, name in enumerate(neighbours.values(), start=1)])
+    db_session.commit()
+    client = ScryfallClient(db_session, base_url=standin.url)
+
+    assert client.get_oracle_card_by_name("Shock").id == "oracle-1"
+    assert client.get_oracle_card_by_name("Island").id == "oracle-2"
+    found = client.get_oracle_cards_by_name(["Llanowar Elite", "Lightning Blast", "Lightning Bolt"], fuzzy=True)
+    assert {name: card.id for name, card in found.items()} == {
+        "Llanowar Elite": "oracle-3", "Lightning Blast": "oracle-4", "Lightning Bolt": "cached-4"
+    }
+    assert len(standin.requests_for('/cards/named')) == 4
+
+
+def test_offline_mode_never_touches_the_network(db_session, standin):
+    standin.add_cards([_card(i) for i in range(1, 10)])
+    db_session.add(OracleCard(id="oracle-0", name="Sol Ring", cmc=1.0))
+    db_session.add(CardPrinting(id="printing-0", oracle_card_id="oracle-0", set_code="tst", collector_number="0"))
+    db_session.commit()
+    client = ScryfallClient(db_session, base_url=standin.url, offline=True)
+
+    assert client.get_oracle_card_by_name("SOL RING").id == "oracle-0"
+    assert client.get_oracle_card_by_name("sol rnig").id == "oracle-0"
+    with pytest.raises(CardNotFoundError):
+        client.get_oracle_card_by_name("Card 1")
+    with pytest.raises(CardNotFoundError):
+        client.get_printing_by_set_and_number("tst", "1")
+    assert list(client.get_printings_by_set_and_number([("tst", "0"), ("tst", "1")])) == [("tst", "0")]
+    assert list(client.get_oracle_cards_by_name(["Card 1", "Sol Ring"], fuzzy=True)) == ["Sol Ring"]
+
+    assert standin.requests == []
+    assert client.stats.requests == 0
+    # Offline misses say nothing about Scryfall, so they are not remembered as failures
+    db_session.commit()
+    assert db_session.query(FailedLookup).count() == 0
+
+
+def test_sets_are_prefetched_in_the_background_when_idle(standin, tmp_path):
+    standin.SEARCH_PAGE_SIZE = 10
+    standin.add_cards([_card(i) for i in range(1, 26)])
+    engine = create_engine(f"sqlite:///{tmp_path / 'collection.db'}")
+    upgrade_database(engine)
+
+    with Session(engine) as db_session:
+        client = ScryfallClient(db_session, base_url=standin.url, limiter=TokenBucket(1000), prefetch=True)
+        client.prefetcher.idle_seconds = 0.5
+        client.get_printing_by_set_and_number("TST", "1")
+        db_session.commit()
+
+        assert client.prefetcher.wait_until_idle(timeout=10)
+        assert client.prefetcher.prefetched_sets == {"tst"}
+        assert len(standin.requests_for('/cards/search')) == 3
+        # The rest of the set now resolves locally
+        assert client.get_printing_by_set_and_number("tst", "20").id == "printing-20"
+        assert len(standin.requests_for('/cards/tst/')) == 1
+        client.close()
+    engine.dispose()
+
+
+def test_only_printings_fetched_from_scryfall_queue_their_set(db_session, standin):
+    standin.add_cards([_card(i) for i in range(1, 5)])
+    standin.add_cards([{**_card(5), 'set': 'new'}])
+    db_session.add(OracleCard(id="oracle-1", name="Card 1", cmc=1.0))
+    db_session.add(CardPrinting(id="printing-1", oracle_card_id="oracle-1", set_code="tst", collector_number="1"))
+    db_session.commit()
+    client = ScryfallClient(db_session, base_url=standin.url, prefetch=True)
+    client.prefetcher.idle_seconds = 60
+
+    # Local hits, one at a time and in a batch: their set is already in the catalog
+    client.get_printing_by_set_and_number("tst", "1")
+    client.get_printings_by_set_and_number([("tst", "1")])
+    assert client.prefetcher.wait_until_idle(timeout=0)
+
+    client.get_printings_by_set_and_number([("tst", "1"), ("new", "5")])
+    assert not client.prefetcher.wait_until_idle(timeout=0)
+    client.close()
+    assert standin.requests_for('/cards/search') == []
+
+
+def test_set_prefetching_can_be_cancelled(db_session, standin):
+    standin.add_cards([_card(i) for i in range(1, 5)])
+    client = ScryfallClient(db_session, base_url=standin.url, prefetch=True)
+    client.prefetcher.idle_seconds = 60
+    client.get_printing_by_set_and_number("tst", "1")
+
+    started = time.monotonic()
+    client.close()
+    assert time.monotonic() - started < 1
+    assert client.prefetcher.wait_until_idle(timeout=0)
+    assert standin.requests_for('/cards/search') == []
+
+
+def test_single_card_responses_are_served_from_the_disk_cache(standin, tmp_path):
+    standin.add_cards([_card(1)])
+    cache = ResponseCache(tmp_path / "responses")
+
+    def fresh_client() -> ScryfallClient:
+        # A database that never persisted the card, sharing the same response cache
+        engine = create_engine("sqlite://")
+        upgrade_database(engine)
+        return ScryfallClient(Session(engine), base_url=standin.url, response_cache=cache)
+
+    fresh_client().get_printing_by_set_and_number("tst", "1")
+    client = fresh_client()
+    assert client.get_printing_by_set_and_number("tst", "1").id == "printing-1"
+    assert len(standin.requests_for('/cards/tst/1')) == 1
+    assert client.stats.requests == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # A stale response is revalidated with its ETag and served again on '304 Not Modified'
+    cache.freshness = timedelta(0)
+    client = fresh_client()
+    assert client.get_printing_by_set_and_number("tst", "1").id == "printing-1"
+    assert 'If-None-Match' in standin.requests_for('/cards/tst/1')[-1][2]
+    assert cache.revalidations == 1
+
+
+def test_response_cache_evicts_the_least_recently_used_responses(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=250)
+
+    def response(body: bytes) -> requests.Response:
+        stored = requests.Response()
+        stored.status_code, stored._content = 200, body
+        return stored
+
+    cache.store("https://example.invalid/a", response(b"a" * 100))
+    cache.store("https://example.invalid/b", response(b"b" * 100))
+    cache.get("https://example.invalid/a")  # 'a' is now more recently used than 'b'
+    cache.store("https://example.invalid/c", response(b"c" * 100))
+
+    assert cache.get("https://example.invalid/b") is None
+    assert cache.get("https://example.invalid/a").body == b"a" * 100
+    assert cache.get("https://example.invalid/c").body == b"c" * 100
+
+
+def test_repeated_lookups_are_answered_from_the_lookup_cache(db_session):
+    for i in range(300):
+        db_session.add(OracleCard(id=f"oracle-{i}", name=f"Card {i}", cmc=0.0))
+        db_session.add(CardPrinting(id=f"printing-{i}", oracle_card_id=f"oracle-{i}", set_code="tst",
+                                    collector_number=str(i)))
+    db_session.commit()
+    client = ScryfallClient(db_session, base_url="http://127.0.0.1:9", offline=True)
+    identifiers = [("TST", str(i)) for i in range(300)]
+    names = [f"card {i}" for i in range(300)]
+    assert len(client.get_printings_by_set_and_number(identifiers)) == 300
+    assert len(client.get_oracle_cards_by_name(names)) == 300
+    assert client.get_printing_by_set_and_number("TST", "0").id == "printing-0"
+    assert client.get_oracle_card_by_name("Card 0").id == "oracle-0"
+
+    statements = []
+    event.listen(db_session.get_bind(), 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    db_session.expire_all()
+    # A warm batch loads its cached rows by primary key, with one query per batch
+    printings = client.get_printings_by_set_and_number(identifiers)
+    assert [printing.oracle_card.name for printing in printings.values()] == [f"Card {i}" for i in range(300)]
+    assert len(client.get_oracle_cards_by_name(names)) == 300
+    assert len(statements) == 2
+    assert "WHERE card_printings.id IN" in statements[0] and "WHERE oracle_cards.id IN" in statements[1]
+    # A single cached lookup loads its row by primary key, or from the identity map
+    for _ in range(20):
+        assert client.get_printing_by_set_and_number("tst", "0").id == "printing-0"
+        assert client.get_oracle_card_by_name("  CARD 0 ").id == "oracle-0"
+    assert len(statements) == 2
+    assert (client.lookup_cache.hits, client.lookup_cache.misses) == (641, 601)
+    assert client.lookup_cache.hit_rate == pytest.approx(641 / 1242)
+
+    # A row that disappeared is looked up again instead of being served from the cache
+    db_session.query(CardPrinting).filter_by(id="printing-0").delete()
+    db_session.commit()
+    with pytest.raises(CardNotFoundError):
+        client.get_printing_by_set_and_number("tst", "0")
+    assert client.get_printings_by_set_and_number([("tst", "0"), ("tst", "1")]).keys() == {("tst", "1")}
+    assert len(client.lookup_cache) == 600
+
+    invalidate_lookup_caches()
+    assert len(client.lookup_cache) == 0
+
+
+def test_lookup_cache_evicts_the_least_recently_used_keys():
+    cache = LookupCache(max_size=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"  # 'a' is now more recently used than 'b'
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert str(cache) == "3 hits, 1 misses (75% hit rate)"